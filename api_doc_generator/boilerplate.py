@@ -0,0 +1,121 @@
+import hashlib
+from collections import Counter
+from typing import Iterator, List, Tuple
+from .segmenter import FENCE_RE
+
+class BoilerplateDetector:
+    """
+    Finds lines repeated across a large fraction of pages (navigation,
+    sidebars, footers, "Edit this page" links) and strips them from content.
+
+    Each observed page contributes its set of distinct line digests to a
+    frequency table. A line counts as boilerplate once at least `min_pages`
+    pages were observed and it occurs on at least `threshold` of them. Such
+    lines are stripped at the start and end of a page, like headers and
+    "Edit this page" footers, and elsewhere only in runs of `min_run` or
+    more, so a recurring label like "Parameters" or "Returns" between
+    page-specific lines is kept. Lines inside fenced code blocks and very
+    short lines are never stripped.
+    """
+
+    def __init__(self, threshold: float = 0.5, min_pages: int = 5, sample_size: int = 20,
+                 min_line_length: int = 4, min_run: int = 3):
+        """
+        Initialize the detector
+
+        Args:
+            threshold (float): Fraction of pages a line must appear on to be boilerplate
+            min_pages (int): Pages to observe before anything is stripped
+            sample_size (int): Pages to observe before the detector reports `ready`
+            min_line_length (int): Shorter lines (e.g. "}" or "---") are always kept
+            min_run (int): Consecutive boilerplate lines, blank lines aside, needed to strip
+                them inside a page; at its start or end any run is stripped
+        """
+        self.threshold = threshold
+        self.min_pages = min_pages
+        self.sample_size = sample_size
+        self.min_line_length = min_line_length
+        self.min_run = min_run
+        self.pages = 0
+        self.stripped_lines = 0
+        self._counts: Counter = Counter()
+
+    @property
+    def ready(self) -> bool:
+        """True once enough pages were observed for stable frequencies"""
+        return self.pages >= self.sample_size
+
+    def _candidate_lines(self, content: str) -> Iterator[Tuple[str, bool]]:
+        """Yield (line, candidate) pairs; candidates are lines outside code fences"""
+        in_fence = False
+        for line in content.split('\n'):
+            if FENCE_RE.match(line):
+                in_fence = not in_fence
+                yield line, False
+            else:
+                yield line, not in_fence and len(line.strip()) >= self.min_line_length
+
+    @staticmethod
+    def _line_key(line: str) -> bytes:
+        """Frequency table key of a line: a 128-bit digest, so distinct lines practically never collide"""
+        return hashlib.blake2b(line.strip().encode('utf-8'), digest_size=16).digest()
+
+    def observe(self, content: str):
+        """Add a page's lines to the frequency table"""
+        self._counts.update({self._line_key(line) for line, candidate in self._candidate_lines(content) if candidate})
+        self.pages += 1
+
+    def to_dict(self) -> dict:
+        """Pages observed and the frequencies of the lines that are boilerplate now, as JSON-serializable data"""
+        return {
+            'pages': self.pages,
+            'lines': {key.hex(): count for key, count in self._counts.items() if count >= self.threshold * self.pages}
+        }
+
+    def load(self, state: dict):
+        """
+        Seed the frequency table with the boilerplate lines of a previous crawl
+
+        Pages restored unchanged from that crawl are not observed again, so
+        the pages re-fetched on top are stripped with the same lines.
+
+        Args:
+            state (dict): Output of `to_dict`
+        """
+        self.pages += state.get('pages', 0)
+        self._counts.update({bytes.fromhex(key): count for key, count in state.get('lines', {}).items()})
+
+    def is_boilerplate(self, line: str) -> bool:
+        """True if a line occurs on at least `threshold` of the observed pages"""
+        if self.pages < self.min_pages:
+            return False
+        return self._counts[self._line_key(line)] >= self.threshold * self.pages
+
+    def strip(self, content: str) -> str:
+        """
+        Remove boilerplate lines from page content
+
+        Args:
+            content (str): Cleaned page content
+
+        Returns:
+            str: Content without boilerplate lines
+        """
+        lines = []
+        dropped = set()
+        run: List[int] = []
+        at_start = True
+        for line, candidate in self._candidate_lines(content):
+            if candidate and self.is_boilerplate(line):
+                run.append(len(lines))
+            elif line.strip():
+                # Any other non-blank line ends the run
+                if len(run) >= self.min_run or at_start:
+                    dropped.update(run)
+                run = []
+                at_start = False
+            lines.append(line)
+        # The run that ends the page, e.g. a footer
+        dropped.update(run)
+        self.stripped_lines += len(dropped)
+        return '\n'.join(line for i, line in enumerate(lines) if i not in dropped)
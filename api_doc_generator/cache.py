@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_CACHE_TTL = 7 * 24 * 3600  # one week
+DEFAULT_READER_CACHE_TTL = 3600  # one hour; pages change, the embeddings of a chunk text do not
+DEFAULT_CACHE_SIZE = 512 * 1024 * 1024  # 512 MB
+
+class ResponseCache:
+    """
+    Persistent content-addressed cache for JSON API responses.
+
+    Entries live in a SQLite database under `cache_dir`, keyed by a hash of
+    the namespace (e.g. the service name) and the request payload. Values are
+    stored as zlib-compressed JSON. Expired entries are dropped on read and the
+    least recently used entries are evicted once the cache grows past `max_bytes`.
+    Namespaces can expire sooner or later than the rest, e.g. fetched pages.
+    """
+
+    def __init__(self, cache_dir: str, ttl: float = DEFAULT_CACHE_TTL,
+                 max_bytes: int = DEFAULT_CACHE_SIZE, filename: str = 'responses.sqlite',
+                 namespace_ttls: Optional[Dict[str, float]] = None):
+        """
+        Open (or create) the cache
+
+        Args:
+            cache_dir (str): Directory holding the SQLite database
+            ttl (float): Seconds before an entry expires; 0 disables expiry
+            max_bytes (int): Total size of stored values before LRU eviction kicks in
+            filename (str): Name of the database file inside `cache_dir`
+            namespace_ttls (Optional[Dict[str, float]]): Seconds before an entry of the given
+                namespaces expires, overriding `ttl`
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, filename)
+        self.ttl = ttl
+        self.namespace_ttls = dict(namespace_ttls or {})
+        self.max_bytes = max_bytes
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, '
+            'created REAL NOT NULL, accessed REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+        self._conn.commit()
+        self._size = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+
+    @staticmethod
+    def make_key(namespace: str, payload: Any) -> str:
+        """Hash a namespace and JSON-serializable payload into a cache key"""
+        encoded = json.dumps([namespace, payload], sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def get(self, namespace: str, payload: Any) -> Optional[Any]:
+        """
+        Look up the cached response for a request
+
+        Args:
+            namespace (str): Logical group of the request, e.g. 'reader'
+            payload (Any): Request payload the response was stored under
+
+        Returns:
+            Optional[Any]: The cached value, or None on a miss or expired entry
+        """
+        return self.get_many(namespace, [payload])[0]
+
+    def get_many(self, namespace: str, payloads: List[Any]) -> List[Optional[Any]]:
+        """
+        Look up the cached responses for many requests in one transaction
+
+        Args:
+            namespace (str): Logical group of the requests, e.g. 'embeddings'
+            payloads (List[Any]): Request payloads the responses were stored under
+
+        Returns:
+            List[Optional[Any]]: The cached value of each payload, or None on a miss or expired entry
+        """
+        keys = [self.make_key(namespace, payload) for payload in payloads]
+        ttl = self.namespace_ttls.get(namespace, self.ttl)
+        now = time.time()
+        values: List[Optional[Any]] = []
+        with self._lock:
+            for key in keys:
+                row = self._conn.execute(
+                    'SELECT value, size, created FROM entries WHERE key = ?', (key,)
+                ).fetchone()
+                if row is None:
+                    self.misses[namespace] += 1
+                    values.append(None)
+                    continue
+
+                value, size, created = row
+                if ttl and now - created > ttl:
+                    self._conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+                    self._size -= size
+                    self.misses[namespace] += 1
+                    values.append(None)
+                    continue
+
+                self._conn.execute('UPDATE entries SET accessed = ? WHERE key = ?', (now, key))
+                self.hits[namespace] += 1
+                values.append(value)
+            if keys:
+                self._conn.commit()
+
+        return [None if value is None else json.loads(zlib.decompress(value).decode('utf-8')) for value in values]
+
+    def set(self, namespace: str, payload: Any, value: Any):
+        """
+        Store the response for a request, evicting old entries if needed
+
+        Args:
+            namespace (str): Logical group of the request, e.g. 'reader'
+            payload (Any): Request payload used as the key
+            value (Any): JSON-serializable response to store
+        """
+        self.set_many(namespace, [(payload, value)])
+
+    def set_many(self, namespace: str, items: List[Tuple[Any, Any]]):
+        """
+        Store the responses for many requests in one transaction
+
+        Args:
+            namespace (str): Logical group of the requests, e.g. 'embeddings'
+            items (List[Tuple[Any, Any]]): (request payload, JSON-serializable response) pairs
+        """
+        entries = [
+            (self.make_key(namespace, payload),
+             zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8')))
+            for payload, value in items
+        ]
+        now = time.time()
+        with self._lock:
+            for key, blob in entries:
+                row = self._conn.execute('SELECT size FROM entries WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    self._size -= row[0]
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)',
+                    (key, blob, len(blob), now, now)
+                )
+                self._size += len(blob)
+            if self._size > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is back under 90% of max_bytes"""
+        target = self.max_bytes * 0.9
+        while self._size > target:
+            rows = self._conn.execute(
+                'SELECT key, size FROM entries ORDER BY accessed LIMIT 64'
+            ).fetchall()
+            if not rows:
+                self._size = 0
+                break
+            evicted = []
+            for key, size in rows:
+                if self._size <= target:
+                    break
+                evicted.append((key,))
+                self._size -= size
+            self._conn.executemany('DELETE FROM entries WHERE key = ?', evicted)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return hit/miss counters per namespace"""
+        namespaces = set(self.hits) | set(self.misses)
+        return {ns: {'hits': self.hits[ns], 'misses': self.misses[ns]} for ns in sorted(namespaces)}
+
+    def clear(self):
+        """Remove every entry from the cache"""
+        with self._lock:
+            self._conn.execute('DELETE FROM entries')
+            self._conn.commit()
+            self._size = 0
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
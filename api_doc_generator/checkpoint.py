@@ -0,0 +1,117 @@
+import base64
+import json
+import os
+from typing import List, Optional, Tuple
+import numpy as np
+
+def encode_vectors(vectors) -> Optional[dict]:
+    """Pack a 2D float array into a JSON-friendly dict of base64 float32 bytes"""
+    rows = np.asarray(vectors, dtype='<f4')
+    if rows.size == 0:
+        return None
+    return {'shape': list(rows.shape), 'data': base64.b64encode(rows.tobytes()).decode('ascii')}
+
+def decode_vectors(packed: Optional[dict]) -> np.ndarray:
+    """Inverse of `encode_vectors`"""
+    if not packed:
+        return np.empty((0, 0), dtype=np.float32)
+    rows = np.frombuffer(base64.b64decode(packed['data']), dtype='<f4')
+    return rows.reshape(packed['shape'])
+
+class CrawlJournal:
+    """
+    Append-only checkpoint of a running crawl.
+
+    Every completed page is appended as one JSON line holding its record,
+    depth and embedding vectors. Periodically a snapshot of the pending
+    frontier is appended as well. Replaying the file with `load` gives back
+    every completed page and the most recent frontier, so a crawl can resume
+    without fetching completed pages again.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the journal
+
+        Args:
+            path (str): Location of the journal file (JSON lines)
+        """
+        self.path = path
+        self._file = None
+
+    def exists(self) -> bool:
+        """True if a journal from a previous crawl is on disk"""
+        return os.path.exists(self.path) and os.path.getsize(self.path) > 0
+
+    def open(self, resume: bool):
+        """
+        Open the journal for appending
+
+        Args:
+            resume (bool): Keep the existing entries; otherwise start a new journal
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    def close(self):
+        """Flush and close the journal"""
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def _append(self, entry: dict):
+        self._file.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        self._file.flush()
+
+    def sync(self):
+        """Force appended entries to disk"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def append_page(self, url: str, depth: int, page: dict):
+        """
+        Record a completed page
+
+        Args:
+            url (str): Page URL
+            depth (int): Crawl depth of the page
+            page (dict): Page record; its embeddings are stored as packed float32
+        """
+        record = {key: value for key, value in page.items() if key != 'embeddings'}
+        self._append({
+            'type': 'page',
+            'url': url,
+            'depth': depth,
+            'page': record,
+            'embeddings': encode_vectors(page.get('embeddings') or [])
+        })
+
+    def append_frontier(self, pending: List[Tuple[str, int]]):
+        """Record the URLs still waiting to be crawled and sync the journal to disk"""
+        self._append({'type': 'frontier', 'pending': pending})
+        self.sync()
+
+    def load(self) -> Tuple[List[Tuple[str, int, dict, np.ndarray]], List[Tuple[str, int]]]:
+        """
+        Replay the journal
+
+        Returns:
+            Tuple: ([(url, depth, page, vectors), ...], pending frontier of the last snapshot).
+            A truncated last line from a crash is ignored.
+        """
+        pages = []
+        pending: List[Tuple[str, int]] = []
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry['type'] == 'page':
+                    pages.append((entry['url'], entry['depth'], entry['page'], decode_vectors(entry['embeddings'])))
+                elif entry['type'] == 'frontier':
+                    pending = [tuple(item) for item in entry['pending']]
+        return pages, pending
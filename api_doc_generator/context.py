@@ -0,0 +1,69 @@
+from typing import List
+import numpy as np
+
+# Rough size of a token in English text and code, good enough for budgeting prompts
+CHARS_PER_TOKEN = 4
+
+# Weight of novelty against representativeness in max-marginal-relevance selection
+DEFAULT_DIVERSITY = 0.5
+
+# Candidates considered by the selection, most representative first: this many
+# times the expected number of picks, but at least MIN_CANDIDATE_POOL chunks
+CANDIDATE_POOL_FACTOR = 20
+MIN_CANDIDATE_POOL = 4096
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens a text uses in a prompt"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def select_chunks(vectors: np.ndarray, token_counts: np.ndarray, budget: int,
+                  diversity: float = DEFAULT_DIVERSITY) -> List[int]:
+    """
+    Pick representative, non-redundant chunks that fit into a token budget
+
+    Greedy max-marginal-relevance over the embedding matrix: relevance is a
+    chunk's similarity to the centroid of all chunks, redundancy is its
+    highest similarity to an already selected chunk. Each step takes the
+    chunk with the best (1 - diversity) * relevance - diversity * redundancy
+    among those that still fit into the remaining budget.
+
+    Args:
+        vectors (np.ndarray): Chunk embeddings, one row per chunk
+        token_counts (np.ndarray): Estimated tokens of each chunk
+        budget (int): Maximum total tokens of the selected chunks
+        diversity (float): 0 picks the most central chunks, 1 the most dissimilar ones
+
+    Returns:
+        List[int]: Indices of the selected chunks, in ascending order
+    """
+    if not len(vectors) or budget <= 0:
+        return []
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms > 0, norms, 1)
+    token_counts = np.asarray(token_counts)
+
+    centroid = vectors.mean(axis=0)
+    centroid /= np.linalg.norm(centroid) or 1
+    relevance = vectors @ centroid
+
+    # Restrict the search to the most representative chunks; the rest are rarely picked
+    expected = max(1, int(budget / max(token_counts.mean(), 1)))
+    pool = np.argsort(-relevance)[:max(expected * CANDIDATE_POOL_FACTOR, MIN_CANDIDATE_POOL)]
+    vectors, relevance, token_counts = vectors[pool], relevance[pool], token_counts[pool]
+
+    redundancy = np.zeros(len(pool), dtype=np.float32)
+    available = np.ones(len(pool), dtype=bool)
+    selected = []
+    remaining = budget
+    while True:
+        available &= token_counts <= remaining
+        if not available.any():
+            break
+        scores = np.where(available, (1 - diversity) * relevance - diversity * redundancy, -np.inf)
+        best = int(np.argmax(scores))
+        selected.append(int(pool[best]))
+        remaining -= int(token_counts[best])
+        available[best] = False
+        np.maximum(redundancy, vectors @ vectors[best], out=redundancy)
+    return sorted(selected)
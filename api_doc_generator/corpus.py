@@ -0,0 +1,216 @@
+import json
+import os
+import time
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+
+CORPUS_VERSION = 1
+
+# Page fields left out of the corpus; the raw Reader API content is not needed for building
+EXCLUDED_FIELDS = ('raw_content', 'embeddings')
+
+# Embedding rows are stored as little-endian float32 whatever the crawl's embedding dtype
+VECTOR_DTYPE = np.dtype('<f4')
+
+def vectors_path(path: str) -> str:
+    """Sidecar file holding the embedding rows of a corpus"""
+    return os.path.splitext(path)[0] + '.vectors.f32'
+
+class CorpusWriter:
+    """
+    Streaming export of a crawl that can be built into documentation later.
+
+    Pages are appended one JSON line each as soon as they are complete, and
+    their embeddings are appended as raw float32 rows to a sidecar file; the
+    page line records where its rows start and their shape. The first line
+    describes the crawl and the last one, written when the crawl finishes,
+    the final page order:
+
+        {"type": "meta", "version": 1, "base_url": ..., "created": ...}
+        {"type": "page", "url": ..., "page": {...}, "embeddings": {"offset": ..., "shape": [n, dim]}}
+        {"type": "order", "urls": [...]}
+
+    A page that is written again, e.g. after resuming a crawl, replaces its
+    earlier line.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the writer
+
+        Args:
+            path (str): Location of the corpus file (JSON lines)
+        """
+        self.path = path
+        self.vectors_path = vectors_path(path)
+        self.pages = 0
+        self._file = None
+        self._vectors = None
+
+    def open(self, base_url: str, resume: bool = False):
+        """
+        Open the corpus for appending
+
+        Args:
+            base_url (str): Root URL of the crawl
+            resume (bool): Keep the pages of an interrupted crawl; otherwise start a new corpus
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        resume = resume and os.path.exists(self.path) and os.path.getsize(self.path) > 0
+        if resume:
+            # A crash can leave half a line behind; start the next entry on a line of its own
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                truncated = f.read(1) != b'\n'
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+        if resume and truncated:
+            self._file.write('\n')
+        self._vectors = open(self.vectors_path, 'ab' if resume else 'wb')
+        if not resume:
+            self._append({'type': 'meta', 'version': CORPUS_VERSION, 'base_url': base_url,
+                          'created': time.strftime('%Y-%m-%d %H:%M:%S')})
+
+    def _append(self, entry: dict):
+        self._file.write(json.dumps(entry, separators=(',', ':'), ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def append_page(self, url: str, page):
+        """
+        Append a completed page and its embeddings
+
+        Args:
+            url (str): Page URL
+            page: Page record (a dict or PageRecord)
+        """
+        embeddings = page.get('embeddings')
+        vectors = None
+        if embeddings is not None and len(embeddings):
+            rows = np.ascontiguousarray(np.asarray(embeddings, dtype=VECTOR_DTYPE))
+            # Write the rows before the line that points at them
+            self._vectors.seek(0, os.SEEK_END)
+            vectors = {'offset': self._vectors.tell(), 'shape': list(rows.shape)}
+            self._vectors.write(rows.tobytes())
+            self._vectors.flush()
+        record = {key: value for key, value in page.items() if key not in EXCLUDED_FIELDS}
+        self._append({'type': 'page', 'url': url, 'page': record, 'embeddings': vectors})
+        self.pages += 1
+
+    def close(self, order: Optional[List[str]] = None):
+        """
+        Finish the corpus
+
+        Args:
+            order (Optional[List[str]]): Final order of the pages; pages not listed
+                are dropped when the corpus is read
+        """
+        if self._file is None:
+            return
+        if order is not None:
+            self._append({'type': 'order', 'urls': order})
+        self._file.close()
+        self._vectors.close()
+        self._file = None
+        self._vectors = None
+
+class CorpusReader(Mapping):
+    """
+    Read-only mapping from URL to page record over a corpus written by CorpusWriter.
+
+    Opening the corpus scans it once and keeps only the byte offset of each
+    page's line; a page is parsed when it is looked up or reached during
+    iteration, and its `embeddings` are a view into the memory-mapped
+    sidecar. Pages come in the order recorded at the end of the crawl, or
+    in file order for a corpus whose crawl did not finish. A truncated last
+    line from a crash is ignored.
+    """
+
+    def __init__(self, path: str):
+        """
+        Index a corpus
+
+        Args:
+            path (str): Corpus file written by CorpusWriter
+
+        Raises:
+            ValueError: If the file is not a corpus or has an unsupported version
+        """
+        self.path = path
+        self.meta: dict = {}
+        self._offsets: Dict[str, int] = {}
+        order: Optional[List[str]] = None
+
+        with open(path, 'rb') as f:
+            offset = 0
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    offset += len(line)
+                    continue
+                if entry['type'] == 'meta':
+                    self.meta = entry
+                elif entry['type'] == 'page':
+                    # Re-insert so a page written again moves to its latest position
+                    self._offsets.pop(entry['url'], None)
+                    self._offsets[entry['url']] = offset
+                elif entry['type'] == 'order':
+                    order = entry['urls']
+                offset += len(line)
+
+        if self.meta.get('version') != CORPUS_VERSION:
+            raise ValueError(f"Unsupported corpus: {path}. Expected version {CORPUS_VERSION}, "
+                             f"got {self.meta.get('version')}")
+        if order is not None:
+            self._offsets = {url: self._offsets[url] for url in order if url in self._offsets}
+
+        sidecar = vectors_path(path)
+        self._vectors = (np.memmap(sidecar, dtype=VECTOR_DTYPE, mode='r')
+                         if os.path.exists(sidecar) and os.path.getsize(sidecar) else None)
+        self._file = open(path, 'rb')
+
+    @property
+    def base_url(self) -> str:
+        """Root URL of the crawl"""
+        return self.meta.get('base_url', '')
+
+    def _read_entry(self, offset: int) -> dict:
+        self._file.seek(offset)
+        return json.loads(self._file.readline())
+
+    def _embeddings(self, vectors: Optional[dict]) -> np.ndarray:
+        if not vectors or self._vectors is None:
+            return np.empty((0, 0), dtype=np.float32)
+        start = vectors['offset'] // VECTOR_DTYPE.itemsize
+        rows, dim = vectors['shape']
+        return self._vectors[start:start + rows * dim].reshape(rows, dim)
+
+    def __getitem__(self, url: str) -> dict:
+        entry = self._read_entry(self._offsets[url])
+        page = entry['page']
+        page['embeddings'] = self._embeddings(entry['embeddings'])
+        return page
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._offsets)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __contains__(self, url) -> bool:
+        return url in self._offsets
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        """(url, page) pairs in corpus order, parsing one page at a time"""
+        for url in self._offsets:
+            yield url, self[url]
+
+    def values(self) -> Iterator[dict]:
+        for _, page in self.items():
+            yield page
+
+    def close(self):
+        """Close the corpus file"""
+        self._file.close()
@@ -0,0 +1,97 @@
+from typing import Dict, List, Tuple
+import numpy as np
+
+# Cosine similarity of mean-pooled page embeddings above which pages count as duplicates
+DEFAULT_DUPLICATE_THRESHOLD = 0.97
+
+# Rows compared per matrix multiplication; a block holds block_size x pages similarities
+DEFAULT_BLOCK_SIZE = 1024
+
+def page_vectors(api_docs: Dict[str, dict]) -> Tuple[List[str], np.ndarray]:
+    """
+    Mean-pool each page's chunk embeddings into one unit-length vector
+
+    Args:
+        api_docs (Dict[str, dict]): Page records with `embeddings`
+
+    Returns:
+        Tuple[List[str], np.ndarray]: URLs of the pages that have embeddings, in
+        api_docs order, and their normalized float32 vectors (one row per URL)
+    """
+    urls = []
+    rows = []
+    for url, doc in api_docs.items():
+        if doc.get('embeddings') is None or not len(doc['embeddings']):
+            continue
+        embeddings = np.asarray(doc['embeddings'], dtype=np.float32)
+        urls.append(url)
+        rows.append(embeddings.mean(axis=0))
+    if not rows:
+        return [], np.empty((0, 0), dtype=np.float32)
+
+    vectors = np.vstack(rows)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms > 0, norms, 1)
+    return urls, vectors
+
+def similar_pairs(vectors: np.ndarray, threshold: float = DEFAULT_DUPLICATE_THRESHOLD,
+                  block_size: int = DEFAULT_BLOCK_SIZE) -> np.ndarray:
+    """
+    Find all pairs of rows whose cosine similarity is at least `threshold`
+
+    The similarity matrix is computed one block of rows at a time against the
+    rows from the start of the block onwards (the upper triangle), so memory
+    stays at block_size x len(vectors) floats.
+
+    Args:
+        vectors (np.ndarray): Unit-length row vectors
+        threshold (float): Minimum cosine similarity
+        block_size (int): Rows per matrix multiplication
+
+    Returns:
+        np.ndarray: (n, 2) array of row index pairs (i, j) with i < j
+    """
+    pairs = []
+    for start in range(0, len(vectors), block_size):
+        block = vectors[start:start + block_size]
+        similarities = block @ vectors[start:].T
+        rows, cols = np.nonzero(similarities >= threshold)
+        upper = cols > rows
+        pairs.append(np.column_stack((rows[upper] + start, cols[upper] + start)))
+    return np.vstack(pairs) if pairs else np.empty((0, 2), dtype=np.intp)
+
+def duplicate_clusters(api_docs: Dict[str, dict], threshold: float = DEFAULT_DUPLICATE_THRESHOLD,
+                       block_size: int = DEFAULT_BLOCK_SIZE) -> Dict[str, List[str]]:
+    """
+    Group near-duplicate pages, such as versioned or translated copies of a page
+
+    Pages are visited in api_docs order. A page that is not yet a duplicate
+    becomes a canonical page, and every later page whose mean-pooled embedding
+    is at least `threshold` similar to it joins its cluster. Pages are only
+    compared with the canonical page, never with other duplicates, so a chain
+    of pages that are each similar to the next does not merge pages that are
+    not similar to each other.
+
+    Args:
+        api_docs (Dict[str, dict]): Page records with `embeddings`
+        threshold (float): Minimum cosine similarity of duplicate pages
+        block_size (int): Rows per matrix multiplication
+
+    Returns:
+        Dict[str, List[str]]: Canonical URL -> URLs of its duplicates, for
+        clusters of two or more pages only
+    """
+    urls, vectors = page_vectors(api_docs)
+    canonical: Dict[int, int] = {}
+
+    # Pairs come sorted by their first row, so every page that could absorb
+    # page i is seen before page i itself is used as a canonical page
+    for i, j in similar_pairs(vectors, threshold, block_size):
+        if i not in canonical and j not in canonical:
+            canonical[j] = i
+
+    clusters: Dict[str, List[str]] = {}
+    for i, url in enumerate(urls):
+        if i in canonical:
+            clusters.setdefault(urls[canonical[i]], []).append(url)
+    return clusters
@@ -0,0 +1,309 @@
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from .embeddings import EmbeddingRange, EmbeddingStore
+
+# Page record fields stored in SQLite columns, read whenever a record is loaded
+SMALL_FIELDS = ('url', 'title', 'description', 'scraped_at', 'content_hash')
+
+# Bulky fields kept compressed in the blob file and only read when accessed
+BLOB_FIELDS = ('content', 'raw_content', 'chunks', 'code_samples', 'links')
+
+PAGE_FIELDS = SMALL_FIELDS + BLOB_FIELDS + ('embeddings',)
+
+# Values of blob fields a page record has before they are set
+FIELD_DEFAULTS = {'content': '', 'raw_content': '', 'chunks': [], 'code_samples': [], 'links': {}}
+
+# Writes between SQLite commits
+COMMIT_INTERVAL = 256
+
+# Rows fetched per query while iterating over the store
+ITERATION_BATCH_SIZE = 512
+
+# Columns a PageRecord is loaded from, in the order `PageRecord._from_row` expects
+RECORD_COLUMNS = ', '.join(SMALL_FIELDS + ('blobs', 'embedding_start', 'embedding_stop'))
+
+_NOT_LOADED = object()
+
+class PageRecord(MutableMapping):
+    """
+    Compact record of one scraped page.
+
+    Behaves like the page dicts the scraper used to build (`record['content']`,
+    `record.get('links')`, `dict(record)`), but holds its fields in slots and
+    only the keys of PAGE_FIELDS. A record loaded from a DocStore reads its
+    BLOB_FIELDS from disk the first time they are accessed, and assigning a
+    field writes it through to the store.
+    """
+
+    __slots__ = PAGE_FIELDS + ('_store', '_refs')
+
+    def __init__(self, page: Optional[dict] = None, **fields):
+        self._store: Optional['DocStore'] = None
+        self._refs: Dict[str, List[int]] = {}
+        for field in SMALL_FIELDS:
+            setattr(self, field, '')
+        for field, default in FIELD_DEFAULTS.items():
+            setattr(self, field, type(default)())
+        self.embeddings = []
+        for field, value in dict(page or {}, **fields).items():
+            self._set(field, value)
+
+    @classmethod
+    def _from_row(cls, store: 'DocStore', row: tuple) -> 'PageRecord':
+        """Record backed by `store` with its blob fields not loaded yet"""
+        record = cls.__new__(cls)
+        record._store = store
+        for field, value in zip(SMALL_FIELDS, row):
+            setattr(record, field, value or '')
+        refs, start, stop = row[len(SMALL_FIELDS):]
+        record._refs = json.loads(refs)
+        for field in BLOB_FIELDS:
+            setattr(record, field, _NOT_LOADED)
+        record.embeddings = store._embedding_range(start, stop)
+        return record
+
+    def _set(self, field: str, value: Any):
+        if field not in PAGE_FIELDS:
+            raise KeyError(f"Unknown page field: {field}. Available page fields: {', '.join(PAGE_FIELDS)}")
+        setattr(self, field, value)
+
+    def __getitem__(self, field: str) -> Any:
+        if field not in PAGE_FIELDS:
+            raise KeyError(field)
+        value = getattr(self, field)
+        if value is _NOT_LOADED:
+            ref = self._refs.get(field)
+            value = self._store._read_blob(ref) if ref else type(FIELD_DEFAULTS[field])()
+            setattr(self, field, value)
+        return value
+
+    def __setitem__(self, field: str, value: Any):
+        self._set(field, value)
+        if self._store is not None:
+            self._store._write_field(self, field, value)
+
+    def __delitem__(self, field: str):
+        raise TypeError("Page record fields cannot be deleted")
+
+    def __contains__(self, field) -> bool:
+        return field in PAGE_FIELDS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(PAGE_FIELDS)
+
+    def __len__(self) -> int:
+        return len(PAGE_FIELDS)
+
+    def __repr__(self) -> str:
+        return f"PageRecord({self.url!r})"
+
+class DocStore(MutableMapping):
+    """
+    Disk-backed mapping from page URL to PageRecord, used in place of the
+    in-memory `api_docs` dict.
+
+    Small fields, the embedding row range and the blob locations of each page
+    live in a SQLite table; content, raw content, chunks, code samples and
+    links are appended zlib-compressed to one blob file. Lookups return a
+    fresh PageRecord that loads blob fields on access, and iteration reads
+    pages in batches in insertion order, so only the pages in use are held in
+    memory. Rewriting a blob field appends a new copy; the old one stays in
+    the file until the store is cleared.
+
+        pages.sqlite  url -> small fields, blob offsets and embedding rows
+        pages.blobs   compressed field values
+
+    Embedding row ranges refer to the EmbeddingStore given to the constructor.
+    """
+
+    def __init__(self, directory: str, embedding_store: Optional[EmbeddingStore] = None,
+                 clear: bool = False):
+        """
+        Open (or create) the store
+
+        Args:
+            directory (str): Directory holding the store files
+            embedding_store (Optional[EmbeddingStore]): Matrix the pages' embeddings
+                point into; without one, pages are loaded without embeddings
+            clear (bool): Remove every page of a previous run
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.path = os.path.join(directory, 'pages.sqlite')
+        self.blobs_path = os.path.join(directory, 'pages.blobs')
+        self.embedding_store = embedding_store
+        self._lock = threading.RLock()
+        self._pending_writes = 0
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            'url TEXT PRIMARY KEY, title TEXT, description TEXT, scraped_at TEXT, content_hash TEXT, '
+            'blobs TEXT NOT NULL, embedding_start INTEGER, embedding_stop INTEGER, '
+            'position INTEGER NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS pages_position ON pages (position)')
+        if clear:
+            self._conn.execute('DELETE FROM pages')
+        self._conn.commit()
+        self._blobs = open(self.blobs_path, 'w+b' if clear else 'a+b')
+        self._next_position = self._conn.execute('SELECT COALESCE(MAX(position), -1) + 1 FROM pages').fetchone()[0]
+
+    def _embedding_range(self, start: Optional[int], stop: Optional[int]):
+        if start is None or self.embedding_store is None:
+            return []
+        return self.embedding_store.range(start, stop)
+
+    def _read_blob(self, ref: List[int]) -> Any:
+        offset, size = ref
+        with self._lock:
+            self._blobs.seek(offset)
+            data = self._blobs.read(size)
+        return json.loads(zlib.decompress(data).decode('utf-8'))
+
+    def _append_blob(self, value: Any) -> List[int]:
+        data = zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'))
+        with self._lock:
+            self._blobs.seek(0, os.SEEK_END)
+            offset = self._blobs.tell()
+            self._blobs.write(data)
+        return [offset, len(data)]
+
+    def _embedding_rows(self, embeddings) -> Tuple[Optional[int], Optional[int]]:
+        """Row range of a page's embeddings, appending plain vectors to the embedding store"""
+        if isinstance(embeddings, EmbeddingRange):
+            return embeddings.start, embeddings.stop
+        if embeddings is None or not len(embeddings) or self.embedding_store is None:
+            return None, None
+        return self.embedding_store.append(embeddings)
+
+    def _written(self):
+        self._pending_writes += 1
+        if self._pending_writes >= COMMIT_INTERVAL:
+            self.flush()
+
+    def _write_field(self, record: PageRecord, field: str, value: Any):
+        """Persist one assigned field of a store-backed record"""
+        with self._lock:
+            if field in BLOB_FIELDS:
+                record._refs[field] = self._append_blob(value)
+                self._conn.execute('UPDATE pages SET blobs = ? WHERE url = ?',
+                                   (json.dumps(record._refs), record.url))
+            elif field == 'embeddings':
+                self._conn.execute('UPDATE pages SET embedding_start = ?, embedding_stop = ? WHERE url = ?',
+                                   self._embedding_rows(value) + (record.url,))
+            elif field == 'url':
+                raise KeyError("The URL of a stored page cannot be changed")
+            else:
+                self._conn.execute(f'UPDATE pages SET {field} = ? WHERE url = ?', (value, record.url))
+            self._written()
+
+    def __getitem__(self, url: str) -> PageRecord:
+        with self._lock:
+            row = self._conn.execute(f'SELECT {RECORD_COLUMNS} FROM pages WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            raise KeyError(url)
+        return PageRecord._from_row(self, row)
+
+    def __setitem__(self, url: str, page):
+        """Store a page record, or any mapping with page fields, under `url`"""
+        refs = {
+            field: self._append_blob(page[field]) for field in BLOB_FIELDS
+            if page.get(field)
+        }
+        start, stop = self._embedding_rows(page.get('embeddings'))
+        values = [url] + [page.get(field) or '' for field in SMALL_FIELDS[1:]]
+        with self._lock:
+            row = self._conn.execute('SELECT position FROM pages WHERE url = ?', (url,)).fetchone()
+            if row is None:
+                position = self._next_position
+                self._next_position += 1
+            else:
+                position = row[0]
+            self._conn.execute(
+                'INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                values + [json.dumps(refs), start, stop, position]
+            )
+            self._written()
+
+    def __delitem__(self, url: str):
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM pages WHERE url = ?', (url,))
+            if not cursor.rowcount:
+                raise KeyError(url)
+            self._written()
+
+    def __contains__(self, url) -> bool:
+        with self._lock:
+            return self._conn.execute('SELECT 1 FROM pages WHERE url = ?', (url,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+
+    def __iter__(self) -> Iterator[str]:
+        for url, in self._iter_rows('url'):
+            yield url
+
+    def items(self) -> Iterator[Tuple[str, PageRecord]]:
+        """(url, record) pairs in insertion order, read a batch of pages at a time"""
+        for row in self._iter_rows(RECORD_COLUMNS):
+            yield row[0], PageRecord._from_row(self, row)
+
+    def values(self) -> Iterator[PageRecord]:
+        for _, record in self.items():
+            yield record
+
+    def _iter_rows(self, columns: str) -> Iterator[tuple]:
+        """Rows of `columns` in position order, queried in batches so writes during iteration are safe"""
+        position = -1
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f'SELECT {columns}, position FROM pages WHERE position > ? ORDER BY position LIMIT ?',
+                    (position, ITERATION_BATCH_SIZE)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield row[:-1]
+            position = rows[-1][-1]
+
+    def reorder(self, urls: List[str]):
+        """Make iteration follow `urls`; stored pages missing from it come last, in their current order"""
+        listed = set(urls)
+        with self._lock:
+            rest = [url for url in self if url not in listed]
+            self._conn.executemany('UPDATE pages SET position = ? WHERE url = ?',
+                                   ((i, url) for i, url in enumerate(list(urls) + rest)))
+            self._next_position = len(urls) + len(rest)
+            self.flush()
+
+    def flush(self):
+        """Commit pending writes and flush the blob file"""
+        with self._lock:
+            self._blobs.flush()
+            self._conn.commit()
+            self._pending_writes = 0
+
+    def clear(self):
+        """Remove every page and truncate the blob file"""
+        with self._lock:
+            self._conn.execute('DELETE FROM pages')
+            self._blobs.truncate(0)
+            self._next_position = 0
+            self.flush()
+
+    def close(self):
+        """Commit and close the store"""
+        with self._lock:
+            self.flush()
+            self._blobs.close()
+            self._conn.close()
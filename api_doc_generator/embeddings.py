@@ -0,0 +1,367 @@
+import hashlib
+import os
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from .cache import ResponseCache
+
+# The Embeddings API accepts up to 2048 inputs per request; stay well below it
+DEFAULT_BATCH_SIZE = 512
+
+def chunk_hash(text: str) -> str:
+    """Content hash used to deduplicate chunks across pages"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+EMBEDDING_DTYPES = ('float32', 'float16', 'int8')
+
+# Response cache namespace of the vectors of single chunks
+CHUNK_CACHE_NAMESPACE = 'chunk_embeddings'
+
+class EmbeddingStore:
+    """
+    Contiguous matrix holding every embedding vector of a crawl.
+
+    Rows are appended page by page, so each page owns a contiguous row range
+    (see `EmbeddingRange`). Vectors are kept as float32 by default, or
+    quantized to float16 or int8; int8 rows carry one float32 scale each
+    (symmetric absmax quantization). The matrix can be saved to `.npy` files
+    and memory-mapped back in with `load`.
+    """
+
+    def __init__(self, dtype: str = 'float32', capacity: int = 1024):
+        """
+        Initialize an empty store
+
+        Args:
+            dtype (str): Storage type, one of EMBEDDING_DTYPES
+            capacity (int): Rows allocated up front; the matrix doubles when full
+        """
+        if dtype not in EMBEDDING_DTYPES:
+            raise ValueError(f"Unknown embedding dtype: {dtype}. Available dtypes: {', '.join(EMBEDDING_DTYPES)}")
+        self.dtype = dtype
+        self.size = 0
+        self._capacity = capacity
+        self._matrix: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+
+    @property
+    def dim(self) -> Optional[int]:
+        """Vector dimension, known after the first append"""
+        return None if self._matrix is None else self._matrix.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the stored rows"""
+        if self._matrix is None:
+            return 0
+        scales = self._scales[:self.size].nbytes if self._scales is not None else 0
+        return self._matrix[:self.size].nbytes + scales
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _reserve(self, rows: int, dim: int):
+        """Make room for `rows` more rows, reallocating into a writable array if needed"""
+        if self._matrix is None:
+            self._matrix = np.empty((max(self._capacity, rows), dim), dtype=self.dtype)
+            if self.dtype == 'int8':
+                self._scales = np.empty(self._matrix.shape[0], dtype=np.float32)
+            return
+        if dim != self._matrix.shape[1]:
+            raise ValueError(f"Expected {self._matrix.shape[1]}-dimensional vectors, got {dim}")
+        needed = self.size + rows
+        if needed <= self._matrix.shape[0] and self._matrix.flags.writeable:
+            return
+
+        capacity = max(needed, 2 * self._matrix.shape[0])
+        matrix = np.empty((capacity, dim), dtype=self.dtype)
+        matrix[:self.size] = self._matrix[:self.size]
+        self._matrix = matrix
+        if self._scales is not None:
+            scales = np.empty(capacity, dtype=np.float32)
+            scales[:self.size] = self._scales[:self.size]
+            self._scales = scales
+
+    def append(self, vectors) -> Tuple[int, int]:
+        """
+        Append vectors as new rows
+
+        Args:
+            vectors: 2D array-like of shape (n, dim), e.g. a list of float lists
+
+        Returns:
+            Tuple[int, int]: The (start, stop) row range of the appended vectors
+        """
+        rows = np.asarray(vectors, dtype=np.float32)
+        if rows.ndim == 1:
+            rows = rows.reshape(1, -1)
+        start = self.size
+        if rows.shape[0] == 0:
+            return start, start
+
+        self._reserve(rows.shape[0], rows.shape[1])
+        stop = start + rows.shape[0]
+        if self.dtype == 'int8':
+            scales = np.abs(rows).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            self._matrix[start:stop] = np.clip(np.rint(rows / scales[:, None]), -127, 127)
+            self._scales[start:stop] = scales
+        else:
+            self._matrix[start:stop] = rows
+        self.size = stop
+        return start, stop
+
+    def rows(self, start: int, stop: int) -> np.ndarray:
+        """
+        Return rows as float32
+
+        A float32 store returns a view into the matrix; quantized stores
+        return a dequantized copy.
+        """
+        if self._matrix is None or start == stop:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        rows = self._matrix[start:stop]
+        if self.dtype == 'int8':
+            return rows.astype(np.float32) * self._scales[start:stop, None]
+        if self.dtype == 'float16':
+            return rows.astype(np.float32)
+        return rows
+
+    def range(self, start: int, stop: int) -> 'EmbeddingRange':
+        """Return a lightweight handle on a row range"""
+        return EmbeddingRange(self, start, stop)
+
+    @staticmethod
+    def scales_path(path: str) -> str:
+        return os.path.splitext(path)[0] + '.scales.npy'
+
+    def save(self, path: str):
+        """
+        Write the used rows to a `.npy` file (plus `<name>.scales.npy` for int8)
+
+        Args:
+            path (str): Destination `.npy` path
+        """
+        matrix = self._matrix[:self.size] if self._matrix is not None else np.empty((0, 0), dtype=self.dtype)
+        np.save(path, matrix)
+        if self.dtype == 'int8':
+            scales = self._scales[:self.size] if self._scales is not None else np.empty(0, dtype=np.float32)
+            np.save(self.scales_path(path), scales)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'EmbeddingStore':
+        """
+        Load a store written by `save`
+
+        Args:
+            path (str): `.npy` path passed to `save`
+            mmap (bool): Memory-map the file read-only instead of reading it into RAM
+
+        Returns:
+            EmbeddingStore: Store backed by the file; appending copies it into memory first
+        """
+        matrix = np.load(path, mmap_mode='r' if mmap else None)
+        store = cls(dtype=str(matrix.dtype))
+        store.size = matrix.shape[0]
+        if matrix.size:
+            store._matrix = matrix
+            if store.dtype == 'int8':
+                store._scales = np.load(cls.scales_path(path), mmap_mode='r' if mmap else None)
+        return store
+
+class EmbeddingRange(Sequence):
+    """
+    Row-range view into an EmbeddingStore, used as a page's `embeddings`
+
+    Behaves like a read-only sequence of float32 vectors and converts to a
+    2D array with `np.asarray`.
+    """
+
+    __slots__ = ('store', 'start', 'stop')
+
+    def __init__(self, store: EmbeddingStore, start: int, stop: int):
+        self.store = store
+        self.start = start
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, index):
+        return self.store.rows(self.start, self.stop)[index]
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        return iter(self.store.rows(self.start, self.stop))
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        rows = self.store.rows(self.start, self.stop)
+        return rows if dtype is None else rows.astype(dtype)
+
+    def tolist(self) -> List[List[float]]:
+        """Return the vectors as nested Python float lists"""
+        return self.store.rows(self.start, self.stop).tolist()
+
+    def __repr__(self) -> str:
+        return f"EmbeddingRange(rows {self.start}:{self.stop})"
+
+class EmbeddingBatcher:
+    """
+    Collects chunks from many pages into large, deduplicated embedding requests.
+
+    Pages register their chunks with `add`. Each unique chunk text is queued
+    for embedding once; `next_batch` hands out up to `batch_size` queued texts
+    and `resolve` keeps the returned vectors. Once every chunk of a page has a
+    vector, the page's vectors are appended to `store` as one contiguous row
+    range and the page is reported by `completed_pages`. Repeated chunks are
+    copied from the row where they were first stored.
+
+    With a cache, each chunk's vector is cached on its own, keyed by the model
+    and the chunk hash, so a re-crawl finds it however the chunks of the
+    earlier crawl were batched; only chunks missing from the cache are queued.
+    """
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE, store: Optional[EmbeddingStore] = None,
+                 cache: Optional[ResponseCache] = None, model: str = ''):
+        """
+        Initialize the batcher
+
+        Args:
+            batch_size (int): Maximum number of texts per embedding request
+            store (Optional[EmbeddingStore]): Matrix receiving page vectors
+                (default: a new float32 store)
+            cache (Optional[ResponseCache]): Cache of chunk vectors; None embeds every chunk
+            model (str): Embedding model, part of the cache key
+        """
+        self.batch_size = batch_size
+        self.store = store if store is not None else EmbeddingStore()
+        self.cache = cache
+        self.model = model
+        self.total_chunks = 0
+        self.requests = 0
+        self.cache_hits = 0
+        self._rows: Dict[str, int] = {}
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._pending: Dict[str, str] = {}
+        self._in_flight: Set[str] = set()
+        self._failed: Set[str] = set()
+        self._pages: Dict[str, List[str]] = {}
+
+    @property
+    def unique_chunks(self) -> int:
+        """Number of distinct chunk texts seen so far"""
+        return len(self._rows) + len(self._vectors) + len(self._pending) + len(self._in_flight) + len(self._failed)
+
+    def add(self, url: str, chunks: List[str]):
+        """
+        Register the chunks of a page
+
+        Args:
+            url (str): Page the chunks belong to
+            chunks (List[str]): Chunk texts in page order
+        """
+        hashes = []
+        new: Dict[str, str] = {}
+        for text in chunks:
+            key = chunk_hash(text)
+            hashes.append(key)
+            if not self._known(key):
+                new.setdefault(key, text)
+        if self.cache is not None and new:
+            cached = self.cache.get_many(CHUNK_CACHE_NAMESPACE, [self._cache_key(key) for key in new])
+            for key, vector in zip(list(new), cached):
+                if vector is not None:
+                    self._vectors[key] = np.asarray(vector, dtype=np.float32)
+                    self.cache_hits += 1
+                    del new[key]
+        self._pending.update(new)
+        self._pages[url] = hashes
+        self.total_chunks += len(chunks)
+
+    def _cache_key(self, key: str) -> dict:
+        """Cache payload of a chunk's vector"""
+        return {'model': self.model, 'chunk': key}
+
+    def _known(self, key: str) -> bool:
+        """True if a chunk hash is already stored, embedded, queued or failed"""
+        return (key in self._rows or key in self._vectors or key in self._pending
+                or key in self._in_flight or key in self._failed)
+
+    def has_full_batch(self) -> bool:
+        """True once enough unique texts are queued to fill a request"""
+        return len(self._pending) >= self.batch_size
+
+    def has_pending(self) -> bool:
+        """True while any queued text has not been handed out yet"""
+        return bool(self._pending)
+
+    def next_batch(self) -> List[Tuple[str, str]]:
+        """
+        Take up to `batch_size` queued texts for one embedding request
+
+        Returns:
+            List[Tuple[str, str]]: (chunk hash, text) pairs
+        """
+        batch = []
+        for key in list(self._pending)[:self.batch_size]:
+            batch.append((key, self._pending.pop(key)))
+            self._in_flight.add(key)
+        if batch:
+            self.requests += 1
+        return batch
+
+    def resolve(self, batch: List[Tuple[str, str]], vectors: List[List[float]]):
+        """
+        Store the vectors returned for a batch from `next_batch`, and cache each one
+
+        Texts the response has no vector for are marked as failed.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(vectors) < len(batch):
+            self.fail(batch[len(vectors):])
+            batch = batch[:len(vectors)]
+        for (key, _), vector in zip(batch, vectors):
+            self._in_flight.discard(key)
+            self._vectors[key] = vector
+        if self.cache is not None:
+            self.cache.set_many(CHUNK_CACHE_NAMESPACE, [
+                (self._cache_key(key), vector.tolist()) for (key, _), vector in zip(batch, vectors)
+            ])
+
+    def fail(self, batch: List[Tuple[str, str]]):
+        """Mark a batch as failed so the pages waiting on it can be released"""
+        for key, _ in batch:
+            self._in_flight.discard(key)
+            self._failed.add(key)
+
+    def _place(self, hashes: List[str]) -> 'EmbeddingRange':
+        """Append the vectors of one page to the store as a contiguous row range"""
+        rows = [self._vectors[key] if key in self._vectors else self.store.rows(self._rows[key], self._rows[key] + 1)[0]
+                for key in hashes]
+        start, stop = self.store.append(rows)
+        for offset, key in enumerate(hashes):
+            if key in self._vectors:
+                del self._vectors[key]
+                self._rows[key] = start + offset
+        return self.store.range(start, stop)
+
+    def completed_pages(self) -> List[Tuple[str, Optional['EmbeddingRange']]]:
+        """
+        Pop every page whose chunks have all been resolved
+
+        Returns:
+            List[Tuple[str, Optional[EmbeddingRange]]]: (url, rows) pairs, where
+            rows is None if any of the page's chunks failed to embed. Failed
+            chunks are forgotten once their pages are released, so a later page
+            with the same chunk queues it again
+        """
+        done = []
+        for url, hashes in list(self._pages.items()):
+            if any(key in self._failed for key in hashes):
+                done.append((url, None))
+            elif all(key in self._vectors or key in self._rows for key in hashes):
+                done.append((url, self._place(hashes) if hashes else []))
+            else:
+                continue
+            del self._pages[url]
+        # Every page waiting on a failed chunk was released above
+        self._failed.clear()
+        return done
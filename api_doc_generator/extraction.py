@@ -0,0 +1,83 @@
+import re
+from typing import List, Tuple
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+
+# Prefer the C-based lxml parser and fall back to the pure-Python one
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+FENCED_CODE_RE = re.compile(r'```[\w]*\n(.*?)```', re.DOTALL)
+TRAILING_NUMBER_RE = re.compile(r'\s*_?\d+\s*$')
+LEADING_NUMBER_RE = re.compile(r'^\s*_?\d+\s*', re.MULTILINE)
+BLANK_LINES_RE = re.compile(r'\n\s*\n+')
+
+# Elements whose text is never part of the readable page content
+SKIPPED_TAGS = {'script', 'style'}
+CODE_TAGS = ('pre', 'code')
+
+def clean_code_block(code: str) -> str:
+    """Clean a code block by removing unnecessary whitespace and line numbers."""
+    if not code:
+        return ""
+
+    # Remove line number references (e.g., _25, _41, _42, or plain numbers)
+    code = TRAILING_NUMBER_RE.sub('', code)  # Remove trailing numbers
+    code = LEADING_NUMBER_RE.sub('', code)  # Remove leading numbers
+    code = BLANK_LINES_RE.sub('\n\n', code)  # Normalize multiple newlines
+
+    # Remove leading/trailing whitespace while preserving indentation
+    lines = code.splitlines()
+    # Remove empty lines from start and end
+    while lines and not lines[0].strip():
+        lines.pop(0)
+    while lines and not lines[-1].strip():
+        lines.pop()
+
+    if not lines:
+        return ""
+
+    # Find minimum indentation (excluding empty lines)
+    min_indent = min(len(line) - len(line.lstrip())
+                     for line in lines if line.strip())
+
+    # Remove minimum indentation from all lines
+    cleaned_lines = [line[min_indent:] if line.strip() else ''
+                     for line in lines]
+
+    return '\n'.join(cleaned_lines).strip()
+
+def extract_page(content: str) -> Tuple[str, List[str]]:
+    """
+    Extract readable text and code samples from a page in a single pass
+
+    The content is parsed once and walked once: text nodes outside script
+    and style elements become the cleaned text (one line per string), and
+    the outermost <pre>/<code> elements become code samples. Markdown fenced
+    code blocks are picked up from the raw content. Code samples are cleaned
+    and deduplicated, keeping their first occurrence.
+
+    Args:
+        content (str): Page content from the Reader API (HTML and/or markdown)
+
+    Returns:
+        Tuple[str, List[str]]: Cleaned text and code samples
+    """
+    soup = BeautifulSoup(content, HTML_PARSER)
+    code_blocks = FENCED_CODE_RE.findall(content)
+    lines = []
+
+    for node in soup.descendants:
+        if isinstance(node, Tag):
+            if node.name in CODE_TAGS and node.find_parent(CODE_TAGS) is None:
+                code_blocks.append(node.get_text())
+        elif type(node) in (NavigableString, CData) and node.parent.name not in SKIPPED_TAGS:
+            line = node.strip()
+            if line:
+                lines.append(line)
+
+    cleaned = (clean_code_block(block) for block in code_blocks if block.strip())
+    code_samples = list(dict.fromkeys(block for block in cleaned if block))
+    return '\n'.join(lines), code_samples
@@ -0,0 +1,134 @@
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track where a visitor came from
+TRACKING_PARAMS = {'gclid', 'fbclid', 'msclkid', 'mc_cid', 'mc_eid', '_ga', '_gl', 'ref_src'}
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a URL so that variants of the same page compare equal
+
+    Lowercases scheme and host, drops default ports, fragments, tracking
+    query parameters (utm_* and friends) and trailing slashes, and sorts the
+    remaining query parameters.
+
+    Args:
+        url (str): Absolute URL
+
+    Returns:
+        str: Canonical form of the URL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/') or '/'
+
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm') and key.lower() not in TRACKING_PARAMS
+    ))
+    return urlunsplit((scheme, host, path, query, ''))
+
+class CrawlFrontier:
+    """
+    Queue of URLs still to crawl, deduplicated at enqueue time.
+
+    URLs are canonicalized before they are checked against the seen-set, so
+    each page is queued at most once. Pending URLs are kept in one deque per
+    depth and always handed out shallowest first; `max_depth` rejects URLs
+    that are too deep and `max_pages` caps how many URLs are handed out.
+    """
+
+    def __init__(self, max_pages: Optional[int] = None, max_depth: Optional[int] = None):
+        """
+        Initialize an empty frontier
+
+        Args:
+            max_pages (Optional[int]): Stop handing out URLs after this many
+            max_depth (Optional[int]): Reject URLs more than this many links from a seed
+        """
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.dequeued = 0
+        self._queues: Dict[int, Deque[str]] = {}
+        self._seen: Set[str] = set()
+        self._pending = 0
+
+    def __len__(self) -> int:
+        """Number of URLs waiting to be crawled"""
+        return self._pending
+
+    def __bool__(self) -> bool:
+        """True while `pop` would return a URL"""
+        return self._pending > 0 and not self.exhausted
+
+    def __contains__(self, url: str) -> bool:
+        return canonicalize_url(url) in self._seen
+
+    @property
+    def exhausted(self) -> bool:
+        """True once `max_pages` URLs have been handed out"""
+        return self.max_pages is not None and self.dequeued >= self.max_pages
+
+    def mark_seen(self, url: str):
+        """Remember a URL as already crawled without queueing it"""
+        self._seen.add(canonicalize_url(url))
+
+    def snapshot(self) -> List[Tuple[str, int]]:
+        """Return the pending URLs with their depths, shallowest first"""
+        return [(url, depth) for depth in sorted(self._queues) for url in self._queues[depth]]
+
+    def push(self, url: str, depth: int = 0) -> bool:
+        """
+        Queue a URL unless it was seen before or is too deep
+
+        Args:
+            url (str): URL to crawl
+            depth (int): Number of links followed from a seed URL
+
+        Returns:
+            bool: True if the URL was queued
+        """
+        canonical = canonicalize_url(url)
+        if canonical in self._seen or (self.max_depth is not None and depth > self.max_depth):
+            return False
+        self._seen.add(canonical)
+        self._queues.setdefault(depth, deque()).append(canonical)
+        self._pending += 1
+        return True
+
+    def extend(self, urls: Iterable[str], depth: int = 0) -> int:
+        """
+        Queue many URLs at the same depth, keeping their order
+
+        Args:
+            urls (Iterable[str]): URLs to crawl, e.g. the pages of a sitemap
+            depth (int): Number of links followed from a seed URL
+
+        Returns:
+            int: Number of URLs queued
+        """
+        return sum(self.push(url, depth) for url in urls)
+
+    def pop(self) -> Optional[Tuple[str, int]]:
+        """
+        Take the next URL, shallowest depth first
+
+        Returns:
+            Optional[Tuple[str, int]]: (canonical URL, depth), or None if the
+            frontier is empty or `max_pages` has been reached
+        """
+        if not self:
+            return None
+        depth = min(depth for depth, queue in self._queues.items() if queue)
+        self._pending -= 1
+        self.dequeued += 1
+        return self._queues[depth].popleft(), depth
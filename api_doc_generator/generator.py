@@ -1,9 +1,24 @@
+import io
 import os
 import markdown
-from typing import Dict, List
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, TextIO, Tuple
+import html
 import json
+import re
+import textwrap
+import numpy as np
 import time
 import google.generativeai as genai
+from .cache import ResponseCache, DEFAULT_CACHE_TTL
+from .context import CHARS_PER_TOKEN, estimate_tokens, select_chunks
+from .dedup import duplicate_clusters
+from .html_shards import (HTML_LAYOUTS, INDEX_FILENAME, STYLESHEET_FILENAME, ShardManifest,
+                          create_markdown_converter, first_heading, render_shard,
+                          shard_filename, shard_hash, shard_key)
+from .metrics import Metrics
+from .search_index import SearchIndexBuilder
 
 class ModelConfig:
     """Configuration for different Gemini model variants"""
@@ -13,32 +28,38 @@ class ModelConfig:
         "gemini-2.0-flash": {
             "description": "Next generation features, superior speed, native tool use, and multimodal generation",
             "capabilities": ["text", "images", "audio", "video"],
-            "experimental": True
+            "experimental": True,
+            "prompt_token_budget": 64000
         },
         "gemini-1.5-flash": {
             "description": "Fast and versatile performance across diverse tasks",
             "capabilities": ["text", "images", "audio", "video"],
-            "experimental": False
+            "experimental": False,
+            "prompt_token_budget": 64000
         },
         "gemini-1.5-flash-8b": {
             "description": "High volume and lower intelligence tasks",
             "capabilities": ["text", "images", "audio", "video"],
-            "experimental": False
+            "experimental": False,
+            "prompt_token_budget": 32000
         },
         "gemini-1.5-pro": {
             "description": "Complex reasoning tasks requiring more intelligence",
             "capabilities": ["text", "images", "audio", "video"],
-            "experimental": False
+            "experimental": False,
+            "prompt_token_budget": 128000
         },
         "gemini-2.0-flash-thinking-exp": {
             "description": "Reasoning for complex problems with Thinking mode",
             "capabilities": ["text"],
-            "experimental": True
+            "experimental": True,
+            "prompt_token_budget": 32000
         },
         "gemini-exp-1206": {
             "description": "Quality improvements, celebrate 1 year of Gemini",
             "capabilities": ["text"],
-            "experimental": True
+            "experimental": True,
+            "prompt_token_budget": 128000
         }
     }
     
@@ -51,6 +72,7 @@ class ModelConfig:
         return {
             "model_name": model_name,
             "experimental": cls.MODELS[model_name]["experimental"],
+            "prompt_token_budget": cls.MODELS[model_name]["prompt_token_budget"],
             "generation_config": {
                 "temperature": temperature,
                 "top_k": 20,
@@ -81,158 +103,431 @@ class ModelConfig:
             ]
         }
 
-class DocumentationGenerator:
-    def __init__(self, api_docs: Dict[str, dict], output_dir: str, 
-                 model_name: str = "gemini-1.5-pro", temperature: float = 0.3):
-        """
-        Initialize the documentation generator
-        
-        Args:
-            api_docs (Dict[str, dict]): Collected API documentation
-            output_dir (str): Directory to save generated documentation
-            model_name (str): Name of the Gemini model to use
-            temperature (float): Temperature for model generation (0.0-1.0)
-        """
-        self.api_docs = api_docs
-        self.output_dir = output_dir
-        self.model_name = model_name
-        self.temperature = temperature
-        os.makedirs(output_dir, exist_ok=True)
-        
-    def _generate_markdown(self) -> str:
-        """Generate markdown documentation from API docs"""
-        sections = []
-        
-        # Add header
-        sections.append("# API Integration Guide\n")
-        sections.append(f"Generated on: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-        
-        # Process each page
-        for url, doc in self.api_docs.items():
-            # Add page title
-            title = doc.get('title', 'Untitled Page')
-            sections.append(f"\n## {title}\n")
-            
-            # Add description if available
-            if doc.get('description'):
-                sections.append(f"\n{doc['description']}\n")
-            
-            # Add URL reference
-            sections.append(f"\nSource: [{url}]({url})\n")
-            
-            # Add main content
-            if doc.get('content'):
-                sections.append("\n### Content\n")
-                sections.append(doc['content'])
-            
-            # Add code samples if available
-            if doc.get('code_samples'):
-                sections.append("\n### Code Examples\n")
-                for i, sample in enumerate(doc['code_samples'], 1):
-                    sections.append(f"\nExample {i}:\n")
-                    sections.append(f"```\n{sample}\n```\n")
-            
-            # Add related links if available
-            if doc.get('links'):
-                sections.append("\n### Related Links\n")
-                for text, link in doc['links'].items():
-                    sections.append(f"- [{text}]({link})\n")
-        
-        return "\n".join(sections)
-    
-    def _generate_html(self, markdown_content: str) -> str:
-        """Convert markdown to HTML with styling"""
-        # Convert markdown to HTML
-        html_content = markdown.markdown(
-            markdown_content,
-            extensions=['fenced_code', 'tables', 'toc']
-        )
-        
-        # Create HTML with styling
-        return f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>API Documentation</title>
-    <style>
-        body {{
+# Review modes: 'single' sends the whole document in one prompt, 'select' sends
+# the chunks that best represent it within the model's prompt token budget,
+# 'map-reduce' reviews it in parts and merges the partial reviews, and 'auto'
+# sends the whole document if it fits the budget and selects chunks otherwise
+REVIEW_MODES = ('auto', 'single', 'select', 'map-reduce')
+DEFAULT_REVIEW_SHARD_CHARS = 60000
+PAGE_HEADING_RE = re.compile(r'\n(?=## )')
+
+# The build timestamp is left out of review prompts so unchanged docs hit the review cache
+GENERATED_ON_RE = re.compile(r'^Generated on: .*\n', re.MULTILINE)
+
+# Sidecar file with the client-side search index, next to the HTML page
+SEARCH_INDEX_FILENAME = 'api_documentation.search.json'
+
+# Search box of the HTML page; the index is only fetched once the box is used
+SEARCH_BOX = f"""<div id="search">
+        <input id="search-input" type="search" placeholder="Search documentation" autocomplete="off"
+               data-index="{SEARCH_INDEX_FILENAME}">
+        <ol id="search-results"></ol>
+    </div>
+    """
+
+SEARCH_SCRIPT = """
+<script>
+(function () {
+    var input = document.getElementById('search-input');
+    var list = document.getElementById('search-results');
+    var loading = null;
+    var MAX_RESULTS = 20;
+    var MAX_PREFIX_TERMS = 50;
+
+    function load() {
+        if (!loading) {
+            loading = fetch(input.dataset.index).then(function (response) {
+                return response.json();
+            }).then(function (index) {
+                // Posting lists hold ascending section ids as deltas
+                index.postings = index.postings.map(function (deltas) {
+                    var id = 0;
+                    return deltas.map(function (delta) { return id += delta; });
+                });
+                index.stopwords = new Set(index.stopwords);
+                return index;
+            });
+        }
+        return loading;
+    }
+
+    function tokenize(index, text) {
+        return (text.toLowerCase().match(/[\\p{L}\\p{N}_]+/gu) || []).filter(function (term) {
+            return term.length >= 2 && !index.stopwords.has(term);
+        });
+    }
+
+    // Sections containing the term, or a term starting with it (for the word being typed)
+    function lookup(index, term) {
+        var terms = index.terms;
+        var low = 0, high = terms.length;
+        while (low < high) {
+            var mid = (low + high) >> 1;
+            if (terms[mid] < term) { low = mid + 1; } else { high = mid; }
+        }
+        var scores = new Map();
+        for (var i = low; i < terms.length && i < low + MAX_PREFIX_TERMS && terms[i].lastIndexOf(term, 0) === 0; i++) {
+            var weight = terms[i] === term ? 2 : 1;
+            index.postings[i].forEach(function (id) {
+                scores.set(id, Math.max(scores.get(id) || 0, weight));
+            });
+        }
+        return scores;
+    }
+
+    function search(index, query) {
+        var terms = tokenize(index, query);
+        if (!terms.length) { return []; }
+        var scores = null;
+        terms.forEach(function (term) {
+            var matches = lookup(index, term);
+            if (scores === null) {
+                scores = matches;
+                return;
+            }
+            var combined = new Map();
+            scores.forEach(function (score, id) {
+                if (matches.has(id)) { combined.set(id, score + matches.get(id)); }
+            });
+            scores = combined;
+        });
+        // Prefer sections whose heading mentions the query terms
+        scores.forEach(function (score, id) {
+            var title = index.sections[id][1].toLowerCase();
+            terms.forEach(function (term) {
+                if (title.indexOf(term) !== -1) { score += 1; }
+            });
+            scores.set(id, score);
+        });
+        return Array.from(scores.keys()).sort(function (a, b) {
+            return scores.get(b) - scores.get(a) || a - b;
+        }).slice(0, MAX_RESULTS);
+    }
+
+    function render(index, ids) {
+        list.innerHTML = '';
+        ids.forEach(function (id) {
+            var item = document.createElement('li');
+            var link = document.createElement('a');
+            link.href = index.sections[id][0];
+            link.textContent = index.sections[id][1];
+            item.appendChild(link);
+            list.appendChild(item);
+        });
+    }
+
+    input.addEventListener('focus', load, { once: true });
+    input.addEventListener('input', function () {
+        load().then(function (index) {
+            render(index, search(index, input.value));
+        }, function () {
+            list.innerHTML = '<li>Search needs the page to be served over HTTP, e.g. python -m http.server</li>';
+        });
+    });
+})();
+</script>"""
+
+# Stylesheet embedded in the generated HTML page
+HTML_STYLE = """    <style>
+        body {
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, Cantarell, 'Open Sans', 'Helvetica Neue', sans-serif;
             line-height: 1.6;
             max-width: 800px;
             margin: 0 auto;
             padding: 2rem;
             color: #333;
-        }}
-        h1, h2, h3 {{
+        }
+        h1, h2, h3 {
             color: #2c3e50;
             margin-top: 2rem;
-        }}
-        h1 {{ font-size: 2.5rem; }}
-        h2 {{ font-size: 2rem; }}
-        h3 {{ font-size: 1.5rem; }}
-        a {{
+        }
+        h1 { font-size: 2.5rem; }
+        h2 { font-size: 2rem; }
+        h3 { font-size: 1.5rem; }
+        a {
             color: #3498db;
             text-decoration: none;
-        }}
-        a:hover {{
+        }
+        a:hover {
             text-decoration: underline;
-        }}
-        pre {{
+        }
+        pre {
             background: #f8f9fa;
             border-radius: 4px;
             padding: 1rem;
             overflow-x: auto;
-        }}
-        code {{
+        }
+        code {
             font-family: 'Fira Code', 'Consolas', monospace;
             font-size: 0.9rem;
             background: #f8f9fa;
             padding: 0.2rem 0.4rem;
             border-radius: 3px;
-        }}
-        blockquote {{
+        }
+        blockquote {
             border-left: 4px solid #3498db;
             margin: 1rem 0;
             padding: 0.5rem 1rem;
             background: #f8f9fa;
-        }}
-        img {{
+        }
+        img {
             max-width: 100%;
             height: auto;
-        }}
-        hr {{
+        }
+        hr {
             border: none;
             border-top: 2px solid #eee;
             margin: 2rem 0;
-        }}
-        table {{
+        }
+        table {
             border-collapse: collapse;
             width: 100%;
             margin: 1rem 0;
-        }}
-        th, td {{
+        }
+        th, td {
             border: 1px solid #ddd;
             padding: 0.5rem;
             text-align: left;
-        }}
-        th {{
+        }
+        th {
             background: #f8f9fa;
-        }}
-        @media (max-width: 600px) {{
-            body {{
+        }
+        #search {
+            position: sticky;
+            top: 0;
+            background: #fff;
+            padding: 0.5rem 0;
+            z-index: 1;
+        }
+        #search input {
+            width: 100%;
+            box-sizing: border-box;
+            padding: 0.5rem;
+            font-size: 1rem;
+            border: 1px solid #ddd;
+            border-radius: 4px;
+        }
+        #search-results {
+            margin: 0.25rem 0 0;
+            padding-left: 1.5rem;
+            max-height: 50vh;
+            overflow-y: auto;
+        }
+        #search-results:empty {
+            display: none;
+        }
+        @media (max-width: 600px) {
+            body {
                 padding: 1rem;
-            }}
-            h1 {{ font-size: 2rem; }}
-            h2 {{ font-size: 1.5rem; }}
-            h3 {{ font-size: 1.25rem; }}
-        }}
+            }
+            h1 { font-size: 2rem; }
+            h2 { font-size: 1.5rem; }
+            h3 { font-size: 1.25rem; }
+        }
     </style>
-</head>
+"""
+
+# The same rules as a standalone stylesheet, shared by all files of a sharded HTML output
+STYLESHEET = textwrap.dedent(HTML_STYLE.split('<style>', 1)[1].rsplit('</style>', 1)[0]).strip() + "\n"
+
+# Link back to the index page at the top of every HTML shard
+SHARD_NAV = f"""<nav><a href="{INDEX_FILENAME}">&larr; Contents</a></nav>
+"""
+
+class DocumentationGenerator:
+    def __init__(self, api_docs: Mapping[str, dict], output_dir: str, 
+                 model_name: str = "gemini-1.5-pro", temperature: float = 0.3,
+                 duplicate_threshold: Optional[float] = None,
+                 review_mode: str = 'auto', review_workers: int = 4,
+                 review_shard_chars: int = DEFAULT_REVIEW_SHARD_CHARS, cache_dir: Optional[str] = None,
+                 cache_ttl: float = DEFAULT_CACHE_TTL, refresh_review: bool = False,
+                 html_layout: str = 'single', html_workers: Optional[int] = None,
+                 gemini_endpoint: Optional[str] = None, metrics: Optional[Metrics] = None):
+        """
+        Initialize the documentation generator
+        
+        Args:
+            api_docs (Mapping[str, dict]): Collected API documentation, a dict or a DocStore;
+                pages are read one at a time while the output is written
+            output_dir (str): Directory to save generated documentation
+            model_name (str): Name of the Gemini model to use
+            temperature (float): Temperature for model generation (0.0-1.0)
+            duplicate_threshold (Optional[float]): Cosine similarity of mean-pooled page
+                embeddings above which pages are merged into one canonical section, e.g.
+                0.97; None documents every page
+            review_mode (str): How the AI review is requested, one of REVIEW_MODES
+            review_workers (int): Parts of a map-reduce review sent to the model at the same time
+            review_shard_chars (int): Maximum characters of documentation per review part
+            cache_dir (Optional[str]): Directory for the persistent Gemini response cache;
+                None disables caching
+            cache_ttl (float): Seconds before a cached review expires
+            refresh_review (bool): Ask Gemini again instead of reusing cached reviews,
+                and cache the new responses
+            html_layout (str): 'single' for one HTML page, 'page' for one file per page or
+                'prefix' for one file per URL directory, written to `<output_dir>/html`
+            html_workers (Optional[int]): Processes rendering HTML files in parallel;
+                None uses one per CPU
+            gemini_endpoint (Optional[str]): Base URL of a Gemini-compatible REST API, e.g. a
+                local stand-in; defaults to the GEMINI_API_ENDPOINT environment variable
+                and otherwise to Google's endpoint
+            metrics (Optional[Metrics]): Registry for stage timings and counters, e.g. the
+                scraper's; a new one is created if omitted
+        """
+        if review_mode not in REVIEW_MODES:
+            raise ValueError(f"Unknown review mode: {review_mode}. Available review modes: {', '.join(REVIEW_MODES)}")
+        if html_layout not in HTML_LAYOUTS:
+            raise ValueError(f"Unknown HTML layout: {html_layout}. Available HTML layouts: {', '.join(HTML_LAYOUTS)}")
+            
+        self.api_docs = api_docs
+        self.output_dir = output_dir
+        self.model_name = model_name
+        self.temperature = temperature
+        self.duplicate_threshold = duplicate_threshold
+        self._clusters: Optional[Dict[str, List[str]]] = None
+        self.review_mode = review_mode
+        self.review_workers = review_workers
+        self.review_shard_chars = review_shard_chars
+        
+        # Reviews are cached by prompt and model configuration, so unchanged docs rebuild instantly
+        self.cache = ResponseCache(cache_dir, ttl=cache_ttl, filename='reviews.sqlite') if cache_dir else None
+        self.refresh_review = refresh_review
+        
+        # Large crawls can be written as many small HTML files instead of one huge page
+        self.html_layout = html_layout
+        self.html_workers = html_workers
+        self.gemini_endpoint = gemini_endpoint or os.getenv('GEMINI_API_ENDPOINT')
+        self.metrics = metrics or Metrics()
+        os.makedirs(output_dir, exist_ok=True)
+        
+    def _iter_markdown_sections(self) -> Iterator[str]:
+        """
+        Yield the markdown document one section at a time
+        
+        The first item is the document header, then one item per page, so
+        callers can write each section out before the next one is built.
+        Joining the items with newlines gives the complete document.
+        """
+        yield "\n".join([
+            "# API Integration Guide\n",
+            f"Generated on: {time.strftime('%Y-%m-%d %H:%M:%S')}\n"
+        ])
+        
+        # Process each page
+        for _, section in self._iter_page_sections():
+            yield section
+
+    def _iter_page_sections(self) -> Iterator[Tuple[str, str]]:
+        """Yield (url, markdown) for every page, skipping near-duplicates of an earlier page"""
+        clusters = self._duplicate_clusters()
+        duplicates = {url for urls in clusters.values() for url in urls}
+        for url, doc in self.api_docs.items():
+            if url not in duplicates:
+                with self.metrics.time('markdown'):
+                    section = self._generate_page_markdown(url, doc, clusters.get(url))
+                yield url, section
+
+    def _duplicate_clusters(self) -> Dict[str, List[str]]:
+        """Map each canonical page URL to the URLs of its near-duplicate pages"""
+        if self.duplicate_threshold is None:
+            return {}
+        if self._clusters is None:
+            with self.metrics.time('dedup'):
+                self._clusters = duplicate_clusters(self.api_docs, self.duplicate_threshold)
+            if self._clusters:
+                merged = sum(len(urls) for urls in self._clusters.values())
+                print(f"Merged {merged} near-duplicate pages into {len(self._clusters)} canonical pages")
+        return self._clusters
+
+    def _generate_page_markdown(self, url: str, doc: dict, duplicates: Optional[List[str]] = None) -> str:
+        """Generate the markdown section of a single page, cross-referencing its duplicates"""
+        sections = []
+        
+        # Add page title
+        title = doc.get('title', 'Untitled Page')
+        sections.append(f"\n## {title}\n")
+        
+        # Add description if available
+        if doc.get('description'):
+            sections.append(f"\n{doc['description']}\n")
+        
+        # Add URL reference
+        sections.append(f"\nSource: [{url}]({url})\n")
+        
+        # Point to near-duplicate pages (e.g. other versions) that are not documented separately
+        if duplicates:
+            sections.append("\nAlso documented at:\n")
+            for duplicate in duplicates:
+                sections.append(f"- [{duplicate}]({duplicate})\n")
+        
+        # Add main content
+        if doc.get('content'):
+            sections.append("\n### Content\n")
+            sections.append(doc['content'])
+        
+        # Add code samples if available
+        if doc.get('code_samples'):
+            sections.append("\n### Code Examples\n")
+            for i, sample in enumerate(doc['code_samples'], 1):
+                sections.append(f"\nExample {i}:\n")
+                sections.append(f"```\n{sample}\n```\n")
+        
+        # Add related links if available
+        if doc.get('links'):
+            sections.append("\n### Related Links\n")
+            for text, link in doc['links'].items():
+                sections.append(f"- [{text}]({link})\n")
+        
+        return "\n".join(sections)
+
+    def _generate_markdown(self) -> str:
+        """Generate markdown documentation from API docs"""
+        return "\n".join(self._iter_markdown_sections())
+
+    def _create_markdown_converter(self) -> markdown.Markdown:
+        """Create a converter that can be reused section by section"""
+        return create_markdown_converter()
+
+    def _html_header(self, with_search: bool = False, title: str = "API Documentation",
+                     stylesheet: Optional[str] = None) -> str:
+        """
+        Opening part of the HTML page, up to and including <body> and the search box
+        
+        Args:
+            with_search (bool): Add the search box
+            title (str): Page title
+            stylesheet (Optional[str]): Link this stylesheet instead of embedding HTML_STYLE
+        """
+        style = f'    <link rel="stylesheet" href="{stylesheet}">\n' if stylesheet else HTML_STYLE
+        return """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>""" + html.escape(title) + """</title>
+""" + style + """</head>
 <body>
-    {html_content}
+    """ + (SEARCH_BOX if with_search else "")
+
+    def _html_footer(self, with_search: bool = False) -> str:
+        """Closing part of the HTML page, including the search script"""
+        return (SEARCH_SCRIPT if with_search else "") + """
 </body>
 </html>"""
+
+    def _index_section(self, search_index: SearchIndexBuilder, converter: markdown.Markdown,
+                       section: str, filename: str = ''):
+        """Add a section just converted by `converter` to the search index under its first heading"""
+        heading = first_heading(converter)
+        if heading:
+            search_index.add_section(f"{filename}#{heading[0]}", heading[1], section)
+
+    def _generate_html(self, markdown_content: str) -> str:
+        """Convert markdown to HTML with styling"""
+        # Convert markdown to HTML
+        html_content = self._create_markdown_converter().convert(markdown_content)
+        
+        # Create HTML with styling
+        return self._html_header() + html_content + self._html_footer()
     
     def _generate_ai_review_prompt(self, source_url: str, markdown_content: str) -> str:
         """Generate a prompt for AI to review the documentation"""
@@ -272,35 +567,159 @@ Please provide:
 4. Recommendations for better organization or clarity
 5. Links to additional resources that should be referenced"""
 
-    def _review_documentation(self, source_url: str, markdown_content: str) -> str:
-        """Use AI to review and provide feedback on the documentation"""
-        import google.generativeai as genai
-        import os
+    def _generate_shard_review_prompt(self, source_url: str, shard: str, index: int, total: int) -> str:
+        """Generate a prompt reviewing one part of the documentation (map step)"""
+        return f"""You are a technical documentation expert reviewing part {index} of {total} of an API integration guide.
+
+SOURCE URL: {source_url}
+GOAL: Create comprehensive documentation for API integration from the source URL.
+
+Review only the pages below. Be specific and name the pages you refer to:
+1. Missing or unclear integration steps, prerequisites, authentication details
+2. Incorrect or incomplete code examples, endpoints, parameters and responses
+3. Structure and clarity problems
+4. Additional content, examples or resources these pages need
+
+DOCUMENTATION PART {index} OF {total}:
+{shard}"""
+
+    def _generate_merge_prompt(self, source_url: str, reviews: List[str]) -> str:
+        """Generate a prompt merging partial reviews into one review (reduce step)"""
+        partial_reviews = "\n\n".join(
+            f"PARTIAL REVIEW {i}:\n{review}" for i, review in enumerate(reviews, 1)
+        )
+        return f"""You are a technical documentation expert. The API integration documentation generated from {source_url} was reviewed in parts. Merge the partial reviews below into a single review of the whole documentation. Combine overlapping findings, keep the specific page references and drop repetition.
+
+{partial_reviews}
+
+Please provide:
+1. An assessment of the documentation's completeness and accuracy
+2. Specific areas that need improvement
+3. Suggestions for additional content or examples needed
+4. Recommendations for better organization or clarity
+5. Links to additional resources that should be referenced"""
+
+    @staticmethod
+    def _pack_texts(texts: Iterable[str], limit: int, min_items: int = 1) -> Iterator[List[str]]:
+        """Greedily group texts so each group stays within `limit` characters or holds `min_items` texts"""
+        group: List[str] = []
+        size = 0
+        for text in texts:
+            if group and (size + len(text) <= limit or len(group) < min_items):
+                group.append(text)
+                size += len(text)
+            else:
+                if group:
+                    yield group
+                group = [text]
+                size = len(text)
+        if group:
+            yield group
+
+    @staticmethod
+    def _iter_review_pages(document: TextIO) -> Iterator[str]:
+        """
+        Read the documentation line by line and yield it split at page headings
         
-        # Configure Gemini
-        genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
+        The pages are the same as PAGE_HEADING_RE.split of the whole text, but
+        only one of them is held in memory at a time.
+        """
+        page: List[str] = []
+        for line in document:
+            if line.startswith('## ') and page:
+                # PAGE_HEADING_RE consumes the newline before the heading
+                yield ''.join(page)[:-1]
+                page = []
+            page.append(line)
+        if page:
+            yield ''.join(page)
+
+    def _iter_review_shards(self, open_document: Callable[[], TextIO]) -> Iterator[str]:
+        """Split the documentation at page headings into parts of about `review_shard_chars` characters"""
+        limit = self.review_shard_chars
         
-        try:
-            # Get model configuration
-            model_config = ModelConfig.get_model_config(self.model_name, self.temperature)
-            
-            if model_config["experimental"]:
-                print(f"Warning: Using experimental model {self.model_name}")
-            
-            # Create model with configurations
-            model = genai.GenerativeModel(
-                model_name=model_config["model_name"],
-                generation_config=model_config["generation_config"],
-                safety_settings=model_config["safety_settings"]
-            )
-            
-            # Generate review prompt
-            prompt = self._generate_ai_review_prompt(source_url, markdown_content)
-            
+        def pieces():
+            with open_document() as document:
+                for i, page in enumerate(self._iter_review_pages(document)):
+                    if i == 0:
+                        page = GENERATED_ON_RE.sub('', page, count=1)
+                    yield from (page[j:j + limit] for j in range(0, len(page), limit))
+                    
+        for group in self._pack_texts(pieces(), limit):
+            yield "\n".join(group)
+
+    def _select_review_context(self, token_budget: int) -> Optional[Tuple[str, int, int]]:
+        """
+        Build review input from the chunks that best represent the documentation
+        
+        Chunks of every documented page (near-duplicates excluded) are ranked
+        with `select_chunks` over their embeddings, and the chunks that fit into
+        `token_budget` are rendered under their page titles in document order.
+        
+        Returns:
+            Optional[Tuple[str, int, int]]: (markdown, selected chunks, total chunks),
+            or None if no page has chunk embeddings
+        """
+        duplicates = {url for urls in self._duplicate_clusters().values() for url in urls}
+        # Only (url, position) of each chunk is kept; the selected texts are read back afterwards
+        refs: List[Tuple[str, int]] = []
+        token_counts = []
+        vectors = []
+        for url, doc in self.api_docs.items():
+            embeddings = doc.get('embeddings')
+            if url in duplicates or embeddings is None or not len(embeddings) \
+                    or len(embeddings) != len(doc.get('chunks', [])):
+                continue
+            refs.extend((url, i) for i in range(len(embeddings)))
+            # Page headers take a share of the budget too, so reserve room for them
+            token_counts.extend(estimate_tokens(chunk) + 2 for chunk in doc['chunks'])
+            vectors.append(np.asarray(embeddings, dtype=np.float32))
+        if not refs:
+            return None
+        
+        selected = select_chunks(np.vstack(vectors), np.array(token_counts), token_budget * 9 // 10)
+        
+        sections = []
+        current_url = None
+        for i in selected:
+            url, position = refs[i]
+            if url != current_url:
+                doc = self.api_docs[url]
+                chunks = doc['chunks']
+                sections.append(f"## {doc.get('title', 'Untitled Page')}\n\nSource: {url}\n")
+                current_url = url
+            sections.append(chunks[position] + "\n")
+        header = (f"(Excerpt: {len(selected)} of {len(refs)} content chunks, selected to "
+                  f"represent the whole documentation within the prompt budget)\n")
+        return "\n".join([header] + sections), len(selected), len(refs)
+
+    def _create_model(self, model_config: dict) -> genai.GenerativeModel:
+        """Create the Gemini model described by a ModelConfig configuration"""
+        return genai.GenerativeModel(
+            model_name=model_config["model_name"],
+            generation_config=model_config["generation_config"],
+            safety_settings=model_config["safety_settings"]
+        )
+
+    def _send_prompt(self, model: genai.GenerativeModel, model_config: dict, prompt: str) -> str:
+        """Send a prompt in a new chat and collect the streamed response, using the review cache"""
+        payload = {
+            'prompt': prompt,
+            'model_name': model_config["model_name"],
+            'generation_config': model_config["generation_config"],
+            'safety_settings': model_config["safety_settings"]
+        }
+        if self.cache is not None and not self.refresh_review:
+            cached = self.cache.get('gemini', payload)
+            self.metrics.inc('cache_hits_total' if cached is not None else 'cache_misses_total', service='gemini')
+            if cached is not None:
+                return cached
+        
+        with self.metrics.time('gemini'):
             # Configure chat parameters
             chat = model.start_chat(history=[])
             
-            # Get AI review with streaming
+            # Get AI response with streaming
             response = chat.send_message(
                 prompt,
                 stream=True,
@@ -309,14 +728,162 @@ Please provide:
             )
             
             # Collect streamed response
-            review_parts = []
+            parts = []
             for chunk in response:
                 if chunk.text:
-                    review_parts.append(chunk.text)
-            review = ''.join(review_parts)
+                    parts.append(chunk.text)
+            text = ''.join(parts)
+        self._record_gemini_usage(response, prompt, text)
+        
+        if self.cache is not None and text:
+            self.cache.set('gemini', payload, text)
+        return text
+
+    def _record_gemini_usage(self, response, prompt: str, text: str):
+        """Count the traffic and tokens of a Gemini call, estimating tokens the response does not report"""
+        usage = getattr(response, 'usage_metadata', None)
+        self.metrics.inc('requests_total', service='gemini', status=200)
+        self.metrics.inc('bytes_sent_total', len(prompt.encode('utf-8')), service='gemini')
+        self.metrics.inc('bytes_received_total', len(text.encode('utf-8')), service='gemini')
+        self.metrics.inc('tokens_total', getattr(usage, 'prompt_token_count', 0) or estimate_tokens(prompt),
+                         service='gemini', direction='prompt')
+        self.metrics.inc('tokens_total', getattr(usage, 'candidates_token_count', 0) or estimate_tokens(text),
+                         service='gemini', direction='response')
+
+    def _send_prompts(self, pool: ThreadPoolExecutor, model: genai.GenerativeModel,
+                      model_config: dict, prompts: Iterable[str], total: int) -> List[str]:
+        """
+        Send prompts concurrently and return the responses in prompt order
+        
+        Prompts are drawn from `prompts` as earlier ones finish, so no more
+        than twice `review_workers` of them are held at a time. Failed prompts
+        are reported and left out.
+        
+        Raises:
+            RuntimeError: If every prompt failed
+        """
+        pending = deque()
+        responses = []
+        
+        def collect():
+            i, future = pending.popleft()
+            try:
+                responses.append(future.result())
+            except Exception as e:
+                print(f"Warning: AI review of part {i} of {total} failed - {str(e)}")
+                
+        for i, prompt in enumerate(prompts, 1):
+            pending.append((i, pool.submit(self._send_prompt, model, model_config, prompt)))
+            if len(pending) >= 2 * self.review_workers:
+                collect()
+        while pending:
+            collect()
+        if not responses:
+            raise RuntimeError("every part of the review failed")
+        return responses
+
+    def _map_reduce_review(self, model: genai.GenerativeModel, model_config: dict,
+                           source_url: str, open_document: Callable[[], TextIO]) -> Tuple[str, int]:
+        """
+        Review the documentation in parts and merge the partial reviews
+        
+        The parts are read from the document as they are sent and reviewed
+        concurrently by up to `review_workers` threads, so only the parts in
+        flight are held in memory. Partial reviews that do not fit into one
+        merge prompt are merged in concurrent rounds first, so the review takes
+        about as long as the slowest part plus a few merge steps.
+        
+        Args:
+            open_document (Callable[[], TextIO]): Opens the markdown for reading;
+                called once to count the parts and once to send them
+        
+        Returns:
+            Tuple[str, int]: Merged review and number of parts reviewed
+        """
+        parts = sum(1 for _ in self._iter_review_shards(open_document))
+        with ThreadPoolExecutor(max_workers=self.review_workers) as pool:
+            reviews = self._send_prompts(pool, model, model_config, (
+                self._generate_shard_review_prompt(source_url, shard, i, parts)
+                for i, shard in enumerate(self._iter_review_shards(open_document), 1)
+            ), parts)
+            while len(reviews) > 1 and sum(map(len, reviews)) > self.review_shard_chars:
+                groups = list(self._pack_texts(reviews, self.review_shard_chars, min_items=2))
+                reviews = self._send_prompts(pool, model, model_config, [
+                    self._generate_merge_prompt(source_url, group) for group in groups
+                ], len(groups))
+        if len(reviews) == 1:
+            return reviews[0], parts
+        return self._send_prompt(model, model_config, self._generate_merge_prompt(source_url, reviews)), parts
+
+    def _generate_review_section(self, source_url: str, open_document: Callable[[], TextIO]) -> Optional[str]:
+        """
+        Use AI to review the documentation
+        
+        In 'auto' mode, documentation that does not fit into the model's
+        prompt token budget is reviewed from the chunks picked by
+        `_select_review_context`, or with `_map_reduce_review` if there are no
+        chunk embeddings to pick from. 'single' always sends the whole document.
+        
+        The mode is chosen from the document's length, counted line by line;
+        the whole document is only read into memory for a 'single' review.
+        
+        Args:
+            source_url (str): URL of the documentation
+            open_document (Callable[[], TextIO]): Opens the markdown for reading,
+                e.g. the .md file written by `generate`
+        
+        Returns:
+            Optional[str]: Markdown of the "AI Documentation Review" section,
+            including its leading separator, or None if the review failed
+        """
+        import google.generativeai as genai
+        import os
+        
+        # Configure Gemini
+        if self.gemini_endpoint:
+            genai.configure(api_key=os.getenv('GOOGLE_API_KEY'), transport='rest',
+                            client_options={'api_endpoint': self.gemini_endpoint})
+        else:
+            genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
+        
+        try:
+            # Get model configuration
+            model_config = ModelConfig.get_model_config(self.model_name, self.temperature)
+            
+            if model_config["experimental"]:
+                print(f"Warning: Using experimental model {self.model_name}")
             
-            # Add review to documentation with metadata
-            final_content = f"""{markdown_content}
+            # Create model with configurations
+            model = self._create_model(model_config)
+            with open_document() as document:
+                document_chars = sum(len(line) for line in document)
+            document_tokens = (document_chars + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+            
+            # Tokens left for documentation once the instructions are accounted for
+            budget = model_config["prompt_token_budget"] - estimate_tokens(self._generate_ai_review_prompt(source_url, ''))
+            selection = None
+            if self.review_mode == 'select' or (
+                    self.review_mode == 'auto' and document_tokens > budget):
+                selection = self._select_review_context(budget)
+                
+            if selection is not None:
+                context, selected, total = selection
+                review = self._send_prompt(model, model_config,
+                                           self._generate_ai_review_prompt(source_url, context))
+                mode = f"select ({selected} of {total} chunks)"
+            elif self.review_mode == 'map-reduce' or (
+                    self.review_mode != 'single' and document_tokens > budget):
+                review, parts = self._map_reduce_review(model, model_config, source_url, open_document)
+                mode = f"map-reduce ({parts} parts)"
+            else:
+                with open_document() as document:
+                    markdown_content = GENERATED_ON_RE.sub('', document.read(), count=1)
+                review = self._send_prompt(model, model_config,
+                                           self._generate_ai_review_prompt(source_url, markdown_content))
+                mode = "single"
+            
+            # Review section with metadata
+            return f"""
 
 ---
 
@@ -327,32 +894,191 @@ Description: {ModelConfig.MODELS[self.model_name]["description"]}
 Temperature: {self.temperature}
 Max Tokens: {model_config["generation_config"]["max_output_tokens"]}
 Experimental: {model_config["experimental"]}
+Review Mode: {mode}
 
 {review}"""
-            return final_content
             
         except Exception as e:
             print(f"Warning: AI review failed - {str(e)}")
-            return markdown_content
+            return None
+
+    def _review_documentation(self, source_url: str, markdown_content: str) -> str:
+        """Use AI to review and provide feedback on the documentation"""
+        review_section = self._generate_review_section(source_url, lambda: io.StringIO(markdown_content))
+        return markdown_content + (review_section or '')
     
+    def _review_markdown_file(self, source_url: str, markdown_path: str) -> Optional[str]:
+        """Review the markdown written so far and return the review section, if any"""
+        with self.metrics.time('review'):
+            review_section = self._generate_review_section(
+                source_url, lambda: open(markdown_path, encoding='utf-8'))
+        if self.cache is not None:
+            print(f"Review cache: {self.cache.hits['gemini']} hits, {self.cache.misses['gemini']} misses")
+        return review_section
+
+    def _generate_index_markdown(self, shards: List[Tuple[str, str, List[str]]],
+                                 headings: Dict[str, List[Optional[Tuple[str, str]]]]) -> str:
+        """Markdown of the index page of a sharded HTML output, linking every page"""
+        lines = [
+            "# API Integration Guide\n",
+            f"Generated on: {time.strftime('%Y-%m-%d %H:%M:%S')}\n",
+            "## Contents\n"
+        ]
+        for filename, key, urls in shards:
+            if self.html_layout == 'prefix':
+                lines.append(f"\n### {key}\n")
+            for url, heading in zip(urls, headings[filename]):
+                anchor, title = heading or ('', self.api_docs[url].get('title', 'Untitled Page'))
+                lines.append(f"- [{title}]({filename}#{anchor})" if anchor else f"- [{title}]({filename})")
+        return "\n".join(lines) + "\n"
+
+    def _generate_html_shards(self, review_section: Optional[str]):
+        """
+        Write the HTML output as one file per page or URL directory plus an index page
+        
+        Files go to `<output_dir>/html` with a shared style.css. Each file is
+        hashed together with its page template; files whose hash matches the
+        previous run are left alone, and the others are rendered in parallel
+        by a process pool. The index page and search index cover all files.
+        
+        Only the page URLs of every file are collected up front. The markdown
+        of a file's pages is built when the file is reached and dropped once
+        the file is written and indexed, with at most twice `html_workers`
+        files in flight, so memory does not grow with the number of pages.
+        """
+        html_dir = os.path.join(self.output_dir, 'html')
+        os.makedirs(html_dir, exist_ok=True)
+        with open(os.path.join(html_dir, STYLESHEET_FILENAME), 'w', encoding='utf-8') as f:
+            f.write(STYLESHEET)
+            
+        # Group pages into shards, keeping crawl order
+        clusters = self._duplicate_clusters()
+        duplicates = {url for urls in clusters.values() for url in urls}
+        groups: Dict[str, List[str]] = {}
+        for url in self.api_docs:
+            if url not in duplicates:
+                groups.setdefault(shard_key(url, self.html_layout), []).append(url)
+        taken: Dict[str, str] = {}
+        shards = [(shard_filename(key, taken), key, urls) for key, urls in groups.items()]
+        
+        manifest = ShardManifest(html_dir)
+        template = self._html_header(True, stylesheet=STYLESHEET_FILENAME) + SHARD_NAV + self._html_footer(True)
+        entries: Dict[str, dict] = {}
+        headings: Dict[str, List[Optional[Tuple[str, str]]]] = {}
+        search_index = SearchIndexBuilder()
+        in_flight = deque()
+        rendered = 0
+        
+        def finish():
+            # Write the oldest shard in flight, then index its pages in document order
+            nonlocal rendered
+            filename, title, sections, source_hash, stale, rendering = in_flight.popleft()
+            if stale:
+                with self.metrics.time('html_shards'):
+                    body, shard_headings = rendering.result() if rendering else render_shard(sections)
+                with open(os.path.join(html_dir, filename), 'w', encoding='utf-8') as f:
+                    f.write(self._html_header(True, f"{title} - API Documentation", STYLESHEET_FILENAME) +
+                            SHARD_NAV + body + "\n" + self._html_footer(True))
+                entries[filename] = {'hash': source_hash, 'headings': shard_headings}
+                rendered += 1
+            else:
+                shard_headings = manifest.headings(filename)
+                entries[filename] = manifest.entries[filename]
+            headings[filename] = shard_headings
+            for section, heading in zip(sections, headings[filename]):
+                if heading:
+                    search_index.add_section(f"{filename}#{heading[0]}", heading[1], section)
+                    
+        # Changed shards are rendered in worker processes, started on the first submit
+        pool = ProcessPoolExecutor(max_workers=self.html_workers) \
+            if len(shards) > 1 and self.html_workers != 1 else None
+        limit = 2 * (self.html_workers or os.cpu_count() or 1)
+        try:
+            for filename, key, urls in shards:
+                title = self.api_docs[urls[0]].get('title', 'Untitled Page') if self.html_layout == 'page' else key
+                sections = []
+                for url in urls:
+                    with self.metrics.time('markdown'):
+                        sections.append(self._generate_page_markdown(url, self.api_docs[url], clusters.get(url)))
+                source_hash = shard_hash(template, title, *sections)
+                stale = not manifest.is_current(filename, source_hash)
+                rendering = pool.submit(render_shard, sections) if stale and pool else None
+                in_flight.append((filename, title, sections, source_hash, stale, rendering))
+                if len(in_flight) >= limit:
+                    finish()
+            while in_flight:
+                finish()
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        manifest.save(entries)
+        print(f"Rendered {rendered} of {len(shards)} HTML files ({len(shards) - rendered} unchanged)")
+        
+        # Index page with the table of contents and the review
+        converter = self._create_markdown_converter()
+        with open(os.path.join(html_dir, INDEX_FILENAME), 'w', encoding='utf-8') as f:
+            f.write(self._html_header(True, stylesheet=STYLESHEET_FILENAME))
+            f.write(converter.reset().convert(self._generate_index_markdown(shards, headings)) + "\n")
+            if review_section:
+                f.write(converter.reset().convert(review_section) + "\n")
+                self._index_section(search_index, converter, review_section, INDEX_FILENAME)
+            f.write(self._html_footer(True))
+        search_index.write(os.path.join(html_dir, SEARCH_INDEX_FILENAME))
+
     def generate(self):
-        """Generate both markdown and HTML documentation"""
-        # Generate markdown
-        markdown_content = self._generate_markdown()
+        """
+        Generate both markdown and HTML documentation
+        
+        Pages are streamed: each page's section is rendered and written to the
+        .md and .html files before the next one is built, so memory does not
+        grow with the number of pages. The AI review reads the .md file back
+        (whole only for a 'single' review) and is appended to both files at the end.
         
+        Each page is also added to a search index under its heading anchor,
+        written next to the HTML page as SEARCH_INDEX_FILENAME and loaded by
+        the page when its search box is first used.
+        
+        With a sharded `html_layout` the HTML is written by `_generate_html_shards`
+        instead of as one page.
+        """
         # Get first URL as source
         source_url = next(iter(self.api_docs.keys()))
         
-        # Review documentation
-        reviewed_content = self._review_documentation(source_url, markdown_content)
-        
-        # Save markdown
         markdown_path = os.path.join(self.output_dir, 'api_documentation.md')
-        with open(markdown_path, 'w', encoding='utf-8') as f:
-            f.write(reviewed_content)
+        if self.html_layout != 'single':
+            with open(markdown_path, 'w', encoding='utf-8') as md_file:
+                for i, section in enumerate(self._iter_markdown_sections()):
+                    md_file.write(section if i == 0 else "\n" + section)
+            review_section = self._review_markdown_file(source_url, markdown_path)
+            if review_section:
+                with open(markdown_path, 'a', encoding='utf-8') as md_file:
+                    md_file.write(review_section)
+            self._generate_html_shards(review_section)
+            return
             
-        # Generate HTML
-        html_content = self._generate_html(reviewed_content)
         html_path = os.path.join(self.output_dir, 'api_documentation.html')
-        with open(html_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        converter = self._create_markdown_converter()
+        search_index = SearchIndexBuilder()
+        
+        with open(markdown_path, 'w', encoding='utf-8') as md_file, \
+                open(html_path, 'w', encoding='utf-8') as html_file:
+            html_file.write(self._html_header(with_search=True))
+            
+            for i, section in enumerate(self._iter_markdown_sections()):
+                md_file.write(section if i == 0 else "\n" + section)
+                with self.metrics.time('html'):
+                    html_file.write(converter.reset().convert(section) + "\n")
+                if i > 0:
+                    self._index_section(search_index, converter, section)
+            md_file.flush()
+            
+            # Review documentation
+            review_section = self._review_markdown_file(source_url, markdown_path)
+            if review_section:
+                md_file.write(review_section)
+                html_file.write(converter.reset().convert(review_section) + "\n")
+                self._index_section(search_index, converter, review_section)
+                
+            html_file.write(self._html_footer(with_search=True))
+            
+        search_index.write(os.path.join(self.output_dir, SEARCH_INDEX_FILENAME))
@@ -0,0 +1,145 @@
+import hashlib
+import html
+import json
+import os
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+import markdown
+from markdown.extensions.toc import slugify
+
+# 'single' writes one HTML page; 'page' one file per documented page and
+# 'prefix' one file per URL directory, each with an index page and shared CSS
+HTML_LAYOUTS = ('single', 'page', 'prefix')
+
+SHARD_MANIFEST_FILENAME = 'shards.json'
+STYLESHEET_FILENAME = 'style.css'
+INDEX_FILENAME = 'index.html'
+
+FILENAME_RE = re.compile(r'[^a-z0-9]+')
+
+def unique_slugify() -> Callable[[str, str], str]:
+    """
+    Heading id generator shared by every section converted with the same
+    Markdown instance, so ids stay unique across the whole document
+    """
+    counts: Dict[str, int] = {}
+
+    def unique_slug(value: str, separator: str) -> str:
+        slug = slugify(value, separator)
+        count = counts.get(slug, 0)
+        counts[slug] = count + 1
+        return slug if count == 0 else f"{slug}_{count}"
+    return unique_slug
+
+def create_markdown_converter() -> markdown.Markdown:
+    """Create a converter that can be reused section by section"""
+    return markdown.Markdown(
+        extensions=['fenced_code', 'tables', 'toc'],
+        extension_configs={'toc': {'slugify': unique_slugify()}}
+    )
+
+def first_heading(converter: markdown.Markdown) -> Optional[Tuple[str, str]]:
+    """(id, text) of the first heading of the section `converter` converted last"""
+    if not converter.toc_tokens:
+        return None
+    heading = converter.toc_tokens[0]
+    return heading['id'], html.unescape(heading['name'])
+
+def render_shard(sections: List[str]) -> Tuple[str, List[Optional[Tuple[str, str]]]]:
+    """
+    Convert the markdown sections of one HTML file; runs in worker processes
+
+    Args:
+        sections (List[str]): Markdown of each page in the file
+
+    Returns:
+        Tuple: HTML body of the file and the first heading of each section
+    """
+    converter = create_markdown_converter()
+    parts = []
+    headings = []
+    for section in sections:
+        parts.append(converter.reset().convert(section))
+        headings.append(first_heading(converter))
+    return "\n".join(parts), headings
+
+def shard_key(url: str, layout: str) -> str:
+    """URL path a page is grouped by: the page itself, or its parent directory"""
+    path = urlparse(url).path.rstrip('/')
+    if layout == 'prefix':
+        path = path.rsplit('/', 1)[0]
+    return path or '/'
+
+def shard_filename(key: str, taken: Dict[str, str]) -> str:
+    """
+    File name of a shard, unique among the names already in `taken`
+
+    Args:
+        key (str): Shard key from `shard_key`
+        taken (Dict[str, str]): File name -> key of the shards named so far; updated
+
+    Returns:
+        str: File name ending in .html
+    """
+    base = FILENAME_RE.sub('-', key.lower()).strip('-') or 'home'
+    if base == 'index':
+        base = 'index-page'
+    name = f"{base}.html"
+    count = 1
+    while name in taken:
+        count += 1
+        name = f"{base}-{count}.html"
+    taken[name] = key
+    return name
+
+def shard_hash(*parts: str) -> str:
+    """Hash of everything a shard file is rendered from"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+class ShardManifest:
+    """
+    Source hashes and headings of the HTML shards written by the last run.
+
+    A shard whose hash is unchanged and whose file still exists is not
+    rendered or written again. Its headings are kept so the search index
+    can still point into it.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Load the manifest of `directory`, or start an empty one
+
+        Args:
+            directory (str): Directory holding the HTML shards
+        """
+        self.directory = directory
+        self.path = os.path.join(directory, SHARD_MANIFEST_FILENAME)
+        self.entries: Dict[str, dict] = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def is_current(self, filename: str, source_hash: str) -> bool:
+        """True if the shard file exists and was rendered from the same source"""
+        entry = self.entries.get(filename)
+        return (entry is not None and entry['hash'] == source_hash
+                and os.path.exists(os.path.join(self.directory, filename)))
+
+    def headings(self, filename: str) -> List[Optional[Tuple[str, str]]]:
+        """Headings recorded for a shard"""
+        return [tuple(heading) if heading else None for heading in self.entries[filename]['headings']]
+
+    def save(self, entries: Dict[str, dict]):
+        """Replace the manifest and delete shard files that are no longer part of the output"""
+        for filename in set(self.entries) - set(entries):
+            path = os.path.join(self.directory, filename)
+            if os.path.exists(path):
+                os.remove(path)
+        self.entries = entries
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f)
@@ -0,0 +1,260 @@
+import json
+import os
+import sqlite3
+from typing import Iterator, List, Mapping, Optional, Tuple
+import numpy as np
+
+# Corpora with at least this many chunks get a cluster-partitioned (IVF) index by default
+IVF_MIN_CHUNKS = 50000
+
+# Clusters probed per query in IVF mode
+DEFAULT_NPROBE = 16
+
+# Rows scored per matrix multiplication while assigning vectors to clusters
+ASSIGN_BLOCK_SIZE = 16384
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length so dot products are cosine similarities"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+def assign_clusters(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the most similar centroid for every row, computed block by block"""
+    return np.concatenate([
+        np.argmax(vectors[start:start + ASSIGN_BLOCK_SIZE] @ centroids.T, axis=1)
+        for start in range(0, len(vectors), ASSIGN_BLOCK_SIZE)
+    ]) if len(vectors) else np.empty(0, dtype=np.intp)
+
+def kmeans(vectors: np.ndarray, n_clusters: int, iterations: int = 10,
+           sample_per_cluster: int = 64, seed: int = 0) -> np.ndarray:
+    """
+    Spherical k-means on a sample of unit-length vectors
+
+    Args:
+        vectors (np.ndarray): Unit-length rows
+        n_clusters (int): Number of centroids
+        iterations (int): Lloyd iterations
+        sample_per_cluster (int): Training rows per centroid
+        seed (int): Seed for sampling and initialization
+
+    Returns:
+        np.ndarray: (n_clusters, dim) unit-length centroids
+    """
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), n_clusters * sample_per_cluster)
+    sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))])
+    centroids = sample[rng.choice(sample_size, n_clusters, replace=False)].copy()
+
+    for _ in range(iterations):
+        labels = assign_clusters(sample, centroids)
+        order = np.argsort(labels, kind='stable')
+        clusters, starts = np.unique(labels[order], return_index=True)
+        # Clusters that lost all their rows keep their previous centroid
+        centroids[clusters] = np.add.reduceat(sample[order], starts, axis=0)
+        centroids = normalize_rows(centroids)
+    return centroids
+
+class VectorIndex:
+    """
+    Persisted semantic search index over the chunks of a crawl.
+
+    Chunk vectors are stored as one unit-length float32 matrix that is
+    memory-mapped for search, and the chunk text, URL and page title live in
+    a SQLite table keyed by matrix row, so a query only reads the rows it
+    returns. Small corpora are searched exhaustively. Large ones can be
+    partitioned into k-means clusters (IVF): rows are stored grouped by
+    cluster and a query only scores the `nprobe` clusters nearest to it.
+
+        index.json    base URL, dimension, chunk count and cluster offsets
+        vectors.npy   chunk matrix (float32, grouped by cluster in IVF mode)
+        centroids.npy cluster centroids (IVF mode only)
+        chunks.sqlite row -> url, title, text
+    """
+
+    def __init__(self, directory: str):
+        """
+        Initialize the index
+
+        Args:
+            directory (str): Directory holding the index files
+        """
+        self.directory = directory
+        self.meta_path = os.path.join(directory, 'index.json')
+        self.vectors_path = os.path.join(directory, 'vectors.npy')
+        self.centroids_path = os.path.join(directory, 'centroids.npy')
+        self.chunks_path = os.path.join(directory, 'chunks.sqlite')
+        self.meta: dict = {}
+        self.vectors: Optional[np.ndarray] = None
+        self.centroids: Optional[np.ndarray] = None
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def exists(self) -> bool:
+        """True if an index was built in the directory"""
+        return os.path.exists(self.meta_path)
+
+    @property
+    def base_url(self) -> str:
+        """Root URL of the crawl the index was built from"""
+        return self.meta.get('base_url', '')
+
+    def build(self, api_docs: Mapping[str, dict], base_url: str, n_clusters: Optional[int] = None) -> int:
+        """
+        Write the index for every chunk that has an embedding
+
+        Pages are read twice, once for the vectors and once to stream the chunk
+        texts into the table, so the texts are never all held in memory.
+
+        Args:
+            api_docs (Mapping[str, dict]): Page records with `chunks` and `embeddings`
+            base_url (str): Root URL of the crawl
+            n_clusters (Optional[int]): IVF clusters; 0 builds an exact-search index and
+                None uses about sqrt(chunks) clusters from IVF_MIN_CHUNKS chunks on
+
+        Returns:
+            int: Number of indexed chunks
+        """
+        urls: List[str] = []
+        vectors = []
+        for url, doc in api_docs.items():
+            embeddings = doc.get('embeddings')
+            if embeddings is None or not len(embeddings) or len(embeddings) != len(doc.get('chunks', [])):
+                continue
+            urls.append(url)
+            vectors.append(np.asarray(embeddings, dtype=np.float32))
+        matrix = normalize_rows(np.vstack(vectors)) if vectors else np.empty((0, 0), dtype=np.float32)
+        count = len(matrix) if vectors else 0
+
+        if n_clusters is None:
+            n_clusters = int(np.sqrt(count)) if count >= IVF_MIN_CHUNKS else 0
+        n_clusters = min(n_clusters, count)
+
+        # Matrix row of every chunk, in the order the pages are read
+        row_of = np.arange(count)
+        offsets = None
+        centroids = None
+        if n_clusters > 0:
+            centroids = kmeans(matrix, n_clusters)
+            labels = assign_clusters(matrix, centroids)
+            order = np.argsort(labels, kind='stable')
+            matrix = matrix[order]
+            row_of[order] = np.arange(count)
+            offsets = np.searchsorted(labels[order], np.arange(n_clusters + 1)).tolist()
+
+        self.close()
+        os.makedirs(self.directory, exist_ok=True)
+        np.save(self.vectors_path, matrix)
+        if centroids is not None:
+            np.save(self.centroids_path, centroids)
+        elif os.path.exists(self.centroids_path):
+            os.remove(self.centroids_path)
+
+        tmp_path = self.chunks_path + '.tmp'
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        conn = sqlite3.connect(tmp_path)
+        conn.execute('CREATE TABLE chunks (row INTEGER PRIMARY KEY, url TEXT, title TEXT, text TEXT)')
+        conn.executemany('INSERT INTO chunks VALUES (?, ?, ?, ?)', (
+            (int(row), url, title, text)
+            for row, (url, title, text) in zip(row_of, self._iter_chunks(api_docs, urls))
+        ))
+        conn.commit()
+        conn.close()
+        os.replace(tmp_path, self.chunks_path)
+
+        self.meta = {
+            'base_url': base_url,
+            'count': count,
+            'dim': int(matrix.shape[1]) if count else 0,
+            'offsets': offsets
+        }
+        with open(self.meta_path, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+        return count
+
+    @staticmethod
+    def _iter_chunks(api_docs: Mapping[str, dict], urls: List[str]) -> Iterator[Tuple[str, str, str]]:
+        """(url, title, text) of every chunk of the given pages, one page at a time"""
+        for url in urls:
+            doc = api_docs[url]
+            title = doc.get('title', '')
+            for chunk in doc['chunks']:
+                yield url, title, chunk
+
+    def open(self) -> 'VectorIndex':
+        """Memory-map the index for searching"""
+        with open(self.meta_path, encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.vectors = np.load(self.vectors_path, mmap_mode='r')
+        if self.meta.get('offsets') is not None:
+            self.centroids = np.load(self.centroids_path)
+        self._conn = sqlite3.connect(self.chunks_path, check_same_thread=False)
+        return self
+
+    def close(self):
+        """Close the chunk table"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _candidates(self, query: np.ndarray, nprobe: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rows of the `nprobe` clusters nearest to the query, and their scores
+
+        Clusters can be small or empty, so further clusters are probed, nearest
+        first, until the candidates hold at least `k` rows.
+        """
+        offsets = self.meta['offsets']
+        order = np.argsort(-(self.centroids @ query))
+        sizes = np.diff(offsets)[order]
+        nprobe = max(nprobe, int(np.searchsorted(np.cumsum(sizes), k)) + 1)
+        nearest = order[:nprobe]
+        rows = np.concatenate([np.arange(offsets[c], offsets[c + 1]) for c in sorted(nearest)])
+        scores = np.concatenate([
+            self.vectors[offsets[c]:offsets[c + 1]] @ query for c in sorted(nearest)
+        ])
+        return rows, scores
+
+    def search(self, query_vector, k: int = 10, nprobe: int = DEFAULT_NPROBE,
+               exact: bool = False) -> List[dict]:
+        """
+        Find the chunks most similar to a query embedding
+
+        Args:
+            query_vector: Embedding of the query
+            k (int): Number of results
+            nprobe (int): Clusters scored per query in IVF mode
+            exact (bool): Score every chunk even if the index has clusters
+
+        Returns:
+            List[dict]: Results with 'score', 'url', 'title' and 'text', best first
+        """
+        if self._conn is None:
+            self.open()
+        if not self.meta['count'] or k <= 0:
+            return []
+        query = normalize_rows(query_vector)
+
+        if self.centroids is not None and not exact:
+            rows, scores = self._candidates(query, nprobe, k)
+        else:
+            rows, scores = None, self.vectors @ query
+
+        k = min(k, len(scores))
+        if not k:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        matches = [(int(rows[i] if rows is not None else i), float(scores[i])) for i in top]
+
+        placeholders = ','.join('?' * len(matches))
+        records = {
+            row: (url, title, text) for row, url, title, text in self._conn.execute(
+                f'SELECT row, url, title, text FROM chunks WHERE row IN ({placeholders})',
+                [row for row, _ in matches]
+            )
+        }
+        return [
+            {'score': score, 'url': records[row][0], 'title': records[row][1], 'text': records[row][2]}
+            for row, score in matches
+        ]
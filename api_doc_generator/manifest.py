@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+from .embeddings import EmbeddingStore
+
+# Page fields kept in the manifest; raw_content is left out to keep it small
+MANIFEST_FIELDS = ('title', 'description', 'content', 'chunks', 'code_samples',
+                   'links', 'url', 'scraped_at', 'content_hash')
+
+def content_hash(content: str) -> str:
+    """Hash of the page content returned by the Reader API"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+class CrawlManifest:
+    """
+    Record of the previous crawl used to skip work for unchanged pages.
+
+    For every URL the manifest stores the content hash, the HTTP validators
+    (ETag / Last-Modified) seen on the page itself and the derived artifacts:
+    cleaned content, code samples, links, chunks and the row range of the
+    page's vectors in `embeddings.npy`. Everything lives in one directory:
+
+        manifest.json   URL -> page entry
+        embeddings.npy  embedding matrix of the previous crawl (memory-mapped)
+        changes.json    added / changed / unchanged / removed URLs of the last crawl
+        boilerplate.json  boilerplate line frequencies, when boilerplate was stripped
+    """
+
+    def __init__(self, directory: str):
+        """
+        Load the manifest from `directory`, or start an empty one
+
+        Args:
+            directory (str): Directory holding the manifest files
+        """
+        self.directory = directory
+        self.path = os.path.join(directory, 'manifest.json')
+        self.embeddings_path = os.path.join(directory, 'embeddings.npy')
+        self.entries: Dict[str, dict] = {}
+        self.embeddings: Optional[EmbeddingStore] = None
+        self.boilerplate: Optional[dict] = None
+
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        if os.path.exists(self.embeddings_path):
+            self.embeddings = EmbeddingStore.load(self.embeddings_path)
+        boilerplate_path = os.path.join(directory, 'boilerplate.json')
+        if os.path.exists(boilerplate_path):
+            with open(boilerplate_path, encoding='utf-8') as f:
+                self.boilerplate = json.load(f)
+
+    def get(self, url: str) -> Optional[dict]:
+        """Return the entry recorded for a URL, if any"""
+        return self.entries.get(url)
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers from the recorded validators"""
+        entry = self.entries.get(url) or {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def restore(self, url: str, store: EmbeddingStore) -> Optional[dict]:
+        """
+        Rebuild the page record of an unchanged URL
+
+        The page's vectors are copied from the previous embedding matrix into
+        `store`, so the record points at rows of the current crawl.
+
+        Args:
+            url (str): Page to restore
+            store (EmbeddingStore): Embedding matrix of the current crawl
+
+        Returns:
+            Optional[dict]: Page record without raw_content, or None if the
+            entry or its embeddings are missing
+        """
+        entry = self.entries.get(url)
+        if entry is None:
+            return None
+
+        page = {field: entry.get(field) for field in MANIFEST_FIELDS}
+        page['raw_content'] = ''
+        page['embeddings'] = []
+        rows = entry.get('embedding_rows')
+        if rows:
+            if self.embeddings is None:
+                return None
+            start, stop = store.append(self.embeddings.rows(*rows))
+            page['embeddings'] = store.range(start, stop)
+        return page
+
+    def save(self, api_docs: Dict[str, dict], store: EmbeddingStore,
+             validators: Dict[str, Dict[str, str]], changes: Dict[str, list],
+             boilerplate: Optional[dict] = None):
+        """
+        Replace the manifest with the results of the current crawl
+
+        Args:
+            api_docs (Dict[str, dict]): Pages collected by the crawl
+            store (EmbeddingStore): Embedding matrix the pages point into
+            validators (Dict[str, Dict[str, str]]): ETag / Last-Modified per URL
+            changes (Dict[str, list]): Change report of the crawl
+            boilerplate (Optional[dict]): State of the crawl's BoilerplateDetector, if any
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        entries = {}
+        for url, doc in api_docs.items():
+            entry = {field: doc.get(field) for field in MANIFEST_FIELDS}
+            embeddings = doc.get('embeddings')
+            entry['embedding_rows'] = [embeddings.start, embeddings.stop] if hasattr(embeddings, 'start') else None
+            entry.update(validators.get(url, {}))
+            entries[url] = entry
+
+        # Write next to the old files and swap them in, since the old
+        # embedding matrix may still be memory-mapped
+        tmp_embeddings = self.embeddings_path + '.tmp.npy'
+        store.save(tmp_embeddings)
+        os.replace(tmp_embeddings, self.embeddings_path)
+        if store.dtype == 'int8':
+            os.replace(EmbeddingStore.scales_path(tmp_embeddings),
+                       EmbeddingStore.scales_path(self.embeddings_path))
+        self._write_json(self.path, entries)
+        self._write_json(os.path.join(self.directory, 'changes.json'), changes)
+        boilerplate_path = os.path.join(self.directory, 'boilerplate.json')
+        if boilerplate is not None:
+            self._write_json(boilerplate_path, boilerplate)
+        elif os.path.exists(boilerplate_path):
+            os.remove(boilerplate_path)
+        self.entries = entries
+        self.boilerplate = boilerplate
+
+    @staticmethod
+    def _write_json(path: str, data):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
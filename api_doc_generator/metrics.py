@@ -0,0 +1,198 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+# Upper bounds in seconds of the latency histogram buckets; slower calls land in +Inf
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Prefix of every series in the Prometheus text format
+METRICS_PREFIX = 'api_doc_'
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def series_name(name: str, labels: Labels) -> str:
+    """Prometheus-style series name, e.g. 'bytes_sent_total{service="reader"}'"""
+    if not labels:
+        return name
+    return name + '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+class Histogram:
+    """Bucketed distribution of observed durations"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile by linear interpolation inside its bucket
+
+        Args:
+            q (float): Quantile between 0 and 1, e.g. 0.95
+
+        Returns:
+            float: Estimated value, within the range of the observations
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = max(self.buckets[i - 1] if i > 0 else 0.0, self.min)
+                upper = min(self.buckets[i] if i < len(self.buckets) else self.max, self.max)
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.max
+
+    def cumulative_counts(self) -> List[int]:
+        """Observations at or below each bucket bound, +Inf last, as Prometheus expects"""
+        total = 0
+        cumulative = []
+        for count in self.counts:
+            total += count
+            cumulative.append(total)
+        return cumulative
+
+class Metrics:
+    """
+    Thread-safe registry of per-stage latency histograms and counters.
+
+    Stages are timed with `time()` around API calls, parsing, rendering and
+    the review; counters track bytes in and out, requests by status, retries,
+    cache hits and tokens. Stages can overlap when crawling concurrently, so
+    their total times may add up to more than the wall-clock time. The
+    registry can be exported as JSON (`to_dict`), in the Prometheus text
+    exposition format (`to_prometheus`) or as a table (`report`).
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.counters: Dict[Tuple[str, Labels], float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _labels(labels: Dict[str, str]) -> Labels:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def observe(self, stage: str, seconds: float, **labels: str):
+        """Record one duration of a stage"""
+        key = (stage, self._labels(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def time(self, stage: str, **labels: str) -> Iterator[None]:
+        """Time the enclosed block as one observation of a stage, even if it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, **labels)
+
+    def inc(self, name: str, amount: float = 1, **labels: str):
+        """Add to a counter"""
+        with self._lock:
+            self.counters[(name, self._labels(labels))] += amount
+
+    def counter(self, name: str, **labels: str) -> float:
+        """Current value of a counter, 0 if it was never incremented"""
+        with self._lock:
+            return self.counters.get((name, self._labels(labels)), 0)
+
+    def to_dict(self) -> dict:
+        """JSON-serializable snapshot with quantiles per stage and every counter"""
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+        return {
+            'elapsed_seconds': time.time() - self.started,
+            'stages': {
+                series_name(stage, labels): {
+                    'count': histogram.count,
+                    'total_seconds': histogram.sum,
+                    'mean_seconds': histogram.sum / histogram.count,
+                    'p50_seconds': histogram.quantile(0.5),
+                    'p95_seconds': histogram.quantile(0.95),
+                    'p99_seconds': histogram.quantile(0.99),
+                    'max_seconds': histogram.max
+                }
+                for (stage, labels), histogram in histograms
+            },
+            'counters': {series_name(name, labels): value for (name, labels), value in counters}
+        }
+
+    def to_prometheus(self) -> str:
+        """Snapshot in the Prometheus text exposition format"""
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+
+        histogram_name = f"{METRICS_PREFIX}stage_duration_seconds"
+        lines = [
+            f"# HELP {histogram_name} Duration of pipeline stages",
+            f"# TYPE {histogram_name} histogram"
+        ]
+        for (stage, labels), histogram in histograms:
+            labels = (('stage', stage),) + labels
+            bounds = [repr(bound) for bound in histogram.buckets] + ['+Inf']
+            for bound, count in zip(bounds, histogram.cumulative_counts()):
+                lines.append(f"{series_name(histogram_name + '_bucket', labels + (('le', bound),))} {count}")
+            lines.append(f"{series_name(histogram_name + '_sum', labels)} {histogram.sum}")
+            lines.append(f"{series_name(histogram_name + '_count', labels)} {histogram.count}")
+
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {METRICS_PREFIX}{name} counter")
+                typed.add(name)
+            lines.append(f"{series_name(METRICS_PREFIX + name, labels)} {float(value)!r}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """Write the metrics to `path`: Prometheus text for .prom or .txt files, JSON otherwise"""
+        with open(path, 'w', encoding='utf-8') as f:
+            if path.endswith(('.prom', '.txt')):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.to_dict(), f, indent=2)
+
+    def report(self) -> str:
+        """Human-readable table of the stages, slowest in total first, and the counters"""
+        snapshot = self.to_dict()
+        lines = [
+            f"{'Stage':<36}{'calls':>8}{'total s':>10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}"
+        ]
+        for name, stats in sorted(snapshot['stages'].items(), key=lambda item: -item[1]['total_seconds']):
+            lines.append(
+                f"{name:<36}{stats['count']:>8}{stats['total_seconds']:>10.2f}"
+                f"{stats['mean_seconds'] * 1000:>10.1f}{stats['p50_seconds'] * 1000:>10.1f}"
+                f"{stats['p95_seconds'] * 1000:>10.1f}{stats['max_seconds'] * 1000:>10.1f}"
+            )
+        if snapshot['counters']:
+            lines.append("")
+            for name, value in snapshot['counters'].items():
+                formatted = f"{value:,.0f}" if float(value).is_integer() else f"{value:,.2f}"
+                lines.append(f"{name:<56}{formatted:>14}")
+        lines.append(f"\nWall-clock time: {snapshot['elapsed_seconds']:.2f} s")
+        return "\n".join(lines)
@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+# Requests per second allowed for each Jina AI service before any adaptation
+DEFAULT_RATE_LIMITS = {
+    'reader': 200 / 60,
+    'segmenter': 200 / 60,
+    'embeddings': 500 / 60
+}
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header value into a number of seconds
+
+    Args:
+        value (Optional[str]): Header value, either delta-seconds or an HTTP date
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket for a single endpoint whose refill rate adapts to throttling.
+
+    The rate is halved whenever the service answers HTTP 429 and grows back
+    additively on every successful call, up to `max_rate`. A Retry-After value
+    blocks the bucket until that moment has passed.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None,
+                 min_rate: float = 0.1, max_rate: Optional[float] = None,
+                 backoff_factor: float = 0.5, recovery_steps: int = 20):
+        """
+        Initialize the limiter
+
+        Args:
+            rate (float): Initial requests per second
+            burst (Optional[float]): Bucket capacity (default: one second worth of requests)
+            min_rate (float): Lower bound for the rate after repeated throttling
+            max_rate (Optional[float]): Upper bound when recovering (default: `rate`)
+            backoff_factor (float): Multiplier applied to the rate on HTTP 429
+            recovery_steps (int): Successful calls needed to climb from 0 back to `max_rate`
+        """
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate or rate
+        self.capacity = burst or max(1.0, rate)
+        self.backoff_factor = backoff_factor
+        self.recovery_step = self.max_rate / recovery_steps
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take one token and return how long the caller must wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+
+            wait = max(0.0, self.blocked_until - now)
+            if self.tokens < 0:
+                wait = max(wait, -self.tokens / self.rate)
+            return wait
+
+    def acquire(self):
+        """Block the current thread until a request may be sent"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Suspend the current task until a request may be sent"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def on_success(self):
+        """Speed up again after a request went through"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.recovery_step)
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        """
+        Back off after the service answered HTTP 429
+
+        Args:
+            retry_after (Optional[float]): Seconds from the Retry-After header, if any
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate * self.backoff_factor)
+            self.tokens = min(self.tokens, 0.0)
+            self.updated = now
+            if retry_after is not None:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
@@ -1,14 +1,29 @@
+import asyncio
+from collections import deque
 import httpx
-from typing import Set, List, Dict, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Set, List, Dict, MutableMapping, Optional, Tuple
 import logging
 from tqdm import tqdm
 import time
 import os
 from dotenv import load_dotenv
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import retry, wait_exponential, retry_if_exception_type
 import json
-from bs4 import BeautifulSoup
-import re
+from urllib.parse import urlparse
+from .boilerplate import BoilerplateDetector
+from .cache import ResponseCache, DEFAULT_CACHE_TTL, DEFAULT_READER_CACHE_TTL
+from .checkpoint import CrawlJournal
+from .corpus import CorpusWriter
+from .docstore import DocStore
+from .embeddings import EmbeddingBatcher, EmbeddingStore, DEFAULT_BATCH_SIZE
+from .extraction import clean_code_block, extract_page
+from .frontier import CrawlFrontier, canonicalize_url
+from .manifest import CrawlManifest, content_hash
+from .metrics import Metrics
+from .rate_limiter import AdaptiveRateLimiter, DEFAULT_RATE_LIMITS, parse_retry_after
+from .segmenter import LocalSegmenter, MAX_CHUNK_LENGTH, CHUNK_OVERLAP, SEGMENTER_BACKENDS
+from .sitemap import SiteMap
 
 # Get your Jina AI API key for free: https://jina.ai/?sui=apikey
 load_dotenv()
@@ -17,23 +32,185 @@ JINA_API_KEY = os.getenv('JINA_API_KEY')
 if not JINA_API_KEY:
     raise ValueError("Please set your JINA_API_KEY in the .env file. Get one at https://jina.ai/?sui=apikey")
 
+# Jina AI endpoints used by the scraper, keyed by service
+JINA_ENDPOINTS = {
+    'reader': 'https://r.jina.ai/',
+    'segmenter': 'https://segment.jina.ai/',
+    'embeddings': 'https://api.jina.ai/v1/embeddings'
+}
+
+# Model of the Embeddings API, for chunks and search queries alike
+EMBEDDING_MODEL = 'jina-embeddings-v3'
+
+SERVICE_NAMES = {
+    'reader': 'Reader API',
+    'segmenter': 'Segmenter API',
+    'embeddings': 'Embeddings API'
+}
+
 class JinaAPIError(Exception):
     """Custom exception for Jina AI API errors"""
     pass
 
+class RateLimitError(JinaAPIError):
+    """Raised when a Jina AI service throttles us with HTTP 429 or Retry-After"""
+    pass
+
+_backoff = wait_exponential(multiplier=1, min=4, max=10)
+
+# Service each retried method calls, for the retry counters
+RETRIED_SERVICES = {
+    '_call_reader_api': 'reader',
+    '_call_reader_api_async': 'reader',
+    '_segment_content': 'segmenter',
+    '_segment_content_async': 'segmenter',
+    '_get_embeddings': 'embeddings',
+    '_get_embeddings_async': 'embeddings'
+}
+
+def _wait_before_retry(retry_state) -> float:
+    """Throttled calls retry immediately because the rate limiter already enforces the delay"""
+    if isinstance(retry_state.outcome.exception(), RateLimitError):
+        return 0
+    return _backoff(retry_state)
+
+def _stop_retrying(retry_state) -> bool:
+    """Give throttled calls a few more attempts than other failures"""
+    limit = 6 if isinstance(retry_state.outcome.exception(), RateLimitError) else 3
+    return retry_state.attempt_number >= limit
+
+def _record_retry(retry_state):
+    """Count a retry and its backoff in the scraper's metrics"""
+    scraper = retry_state.args[0]
+    service = RETRIED_SERVICES.get(retry_state.fn.__name__, retry_state.fn.__name__)
+    scraper.metrics.inc('retries_total', service=service,
+                        error=type(retry_state.outcome.exception()).__name__)
+    scraper.metrics.inc('retry_wait_seconds_total', retry_state.next_action.sleep, service=service)
+
+# Shared retry policy for every Jina AI call (works for sync and async methods)
+jina_retry = retry(
+    stop=_stop_retrying,
+    wait=_wait_before_retry,
+    retry=retry_if_exception_type((httpx.RequestError, JinaAPIError)),
+    before_sleep=_record_retry
+)
+
 class APIScraper:
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, rate_limits: Optional[Dict[str, float]] = None,
+                 cache_dir: Optional[str] = None, cache_ttl: float = DEFAULT_CACHE_TTL,
+                 reader_cache_ttl: float = DEFAULT_READER_CACHE_TTL,
+                 embedding_batch_size: int = DEFAULT_BATCH_SIZE, embedding_dtype: str = 'float32',
+                 manifest_dir: Optional[str] = None, checkpoint_path: Optional[str] = None,
+                 checkpoint_interval: int = 50, workers: int = 0, segmenter: str = 'jina',
+                 boilerplate_threshold: Optional[float] = 0.5, metrics: Optional[Metrics] = None,
+                 store_dir: Optional[str] = None, corpus_path: Optional[str] = None,
+                 use_sitemap: bool = True):
         """
         Initialize the API documentation scraper using Jina AI APIs
         
         Args:
             base_url (str): The root URL of the API documentation to scrape
+            rate_limits (Optional[Dict[str, float]]): Requests per second per service
+                ('reader', 'segmenter', 'embeddings'), overriding DEFAULT_RATE_LIMITS
+            cache_dir (Optional[str]): Directory for the persistent response cache;
+                None disables caching
+            cache_ttl (float): Seconds before a cached Segmenter or Embeddings response expires
+            reader_cache_ttl (float): Seconds before a cached Reader response, i.e. a fetched
+                page, expires; kept short so a re-run sees pages that changed
+            embedding_batch_size (int): Maximum number of unique chunks per Embeddings API request
+            embedding_dtype (str): Storage type of the embedding matrix ('float32', 'float16' or 'int8')
+            manifest_dir (Optional[str]): Directory of the crawl manifest used for incremental
+                re-crawls; None processes every page from scratch
+            checkpoint_path (Optional[str]): Journal file for resumable crawls; None disables checkpoints
+            checkpoint_interval (int): Crawled pages between frontier snapshots in the journal;
+                pending embeddings are sent before each snapshot so every scraped page is journaled,
+                except the first pages of a crawl while they are held back for boilerplate detection
+            workers (int): Worker processes for HTML cleaning and code extraction in the
+                concurrent crawler; 0 runs them on the event loop thread
+            segmenter (str): Chunking backend, 'jina' for the Segmenter API or
+                'local' for the built-in LocalSegmenter
+            boilerplate_threshold (Optional[float]): Strip runs of lines that occur on at least
+                this fraction of pages before segmentation; None keeps page content as is
+            metrics (Optional[Metrics]): Registry for stage timings and counters, e.g. one
+                shared with the DocumentationGenerator; a new one is created if omitted
+            store_dir (Optional[str]): Directory of a DocStore that pages are written to as
+                they are scraped, so `api_docs` does not hold the corpus in memory; None
+                keeps pages in a dict
+            corpus_path (Optional[str]): JSONL corpus that completed pages are streamed to,
+                with their embeddings in a sidecar file, for building documentation
+                later with CorpusReader; None disables the export
+            use_sitemap (bool): Read robots.txt and the sitemaps of the site before crawling,
+                queueing every sitemap page up front and skipping disallowed paths;
+                False discovers pages by following links only
         """
+        if segmenter not in SEGMENTER_BACKENDS:
+            raise ValueError(f"Unknown segmenter: {segmenter}. Available segmenters: {', '.join(SEGMENTER_BACKENDS)}")
+            
         self.base_url = base_url
+        self._base_domain = urlparse(base_url).netloc
+        self.frontier = CrawlFrontier()
         self.visited_urls: Set[str] = set()
-        self.api_docs: Dict[str, dict] = {}
         self.client = httpx.Client(timeout=30.0)
         
+        # One adaptive token bucket per Jina AI service, since each has its own quota
+        limits = dict(DEFAULT_RATE_LIMITS, **(rate_limits or {}))
+        self.rate_limiters: Dict[str, AdaptiveRateLimiter] = {
+            service: AdaptiveRateLimiter(rate) for service, rate in limits.items()
+        }
+        
+        # Responses are cached by request payload, so unchanged pages cost no API calls
+        self.cache = ResponseCache(
+            cache_dir, ttl=cache_ttl, namespace_ttls={'reader': reader_cache_ttl}
+        ) if cache_dir else None
+        
+        # Chunks from many pages are embedded together, each unique text only once,
+        # and every page's vectors end up as a row range of one contiguous matrix;
+        # vectors are cached per chunk, so cache hits do not depend on how chunks were batched
+        self.embedding_store = EmbeddingStore(dtype=embedding_dtype)
+        self.embedding_batcher = EmbeddingBatcher(embedding_batch_size, self.embedding_store,
+                                                  cache=self.cache, model=EMBEDDING_MODEL)
+        
+        # Page records go to disk as they are scraped and are read back field by field
+        self.doc_store = DocStore(store_dir, self.embedding_store, clear=True) if store_dir else None
+        self.api_docs: MutableMapping[str, dict] = self.doc_store if self.doc_store is not None else {}
+        
+        # Pages whose validators or content hash match the previous crawl reuse its artifacts
+        self.manifest = CrawlManifest(manifest_dir) if manifest_dir else None
+        self.validators: Dict[str, Dict[str, str]] = {}
+        self.changes: Dict[str, List[str]] = {'added': [], 'changed': [], 'unchanged': [], 'removed': []}
+        
+        # Completed pages are journaled so an interrupted crawl can resume
+        self.journal = CrawlJournal(checkpoint_path) if checkpoint_path else None
+        self.checkpoint_interval = checkpoint_interval
+        self._depths: Dict[str, int] = {}
+        self._completed_since_checkpoint = 0
+        
+        # robots.txt and sitemaps are read when the crawl starts
+        self.use_sitemap = use_sitemap
+        self.site_map: Optional[SiteMap] = None
+        
+        # Completed pages are also exported so documentation can be rebuilt without crawling
+        self.corpus = CorpusWriter(corpus_path) if corpus_path else None
+        
+        # CPU-bound extraction can be moved off the event loop into worker processes
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        
+        # Chunking can run locally instead of calling segment.jina.ai for every page
+        self.segmenter = segmenter
+        self.local_segmenter = LocalSegmenter() if segmenter == 'local' else None
+        
+        # Navigation, sidebars and footers repeated on every page are stripped before
+        # chunking; the first pages wait until enough pages were seen to tell them apart
+        self.boilerplate = BoilerplateDetector(boilerplate_threshold) if boilerplate_threshold else None
+        self._deferred_pages: List[str] = []
+        if self.boilerplate is not None and self.manifest is not None and self.manifest.boilerplate:
+            # Unchanged pages are restored already stripped; strip re-fetched pages with the same lines
+            self.boilerplate.load(self.manifest.boilerplate)
+        
+        # Stage latencies, traffic, retries, cache hits and tokens for --profile
+        self.metrics = metrics or Metrics()
+        
         # Configure logging
         logging.basicConfig(
             level=logging.INFO,
@@ -49,48 +226,181 @@ class APIScraper:
             'Content-Type': 'application/json'
         }
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-        retry=retry_if_exception_type((httpx.RequestError, JinaAPIError))
-    )
-    def _call_reader_api(self, url: str) -> dict:
+    @staticmethod
+    def _reader_payload(url: str) -> dict:
+        """Build the Reader API request body for a URL"""
+        return {
+            'url': url,
+            'with_links_summary': True,
+            'with_images_summary': True
+        }
+
+    @staticmethod
+    def _segmenter_payload(content: str) -> dict:
+        """Build the Segmenter API request body for a piece of content"""
+        return {
+            'content': content,
+            'return_chunks': True,
+            'max_chunk_length': MAX_CHUNK_LENGTH,
+            'chunk_overlap': CHUNK_OVERLAP
+        }
+
+    @staticmethod
+    def _embeddings_payload(texts: List[str]) -> dict:
+        """Build the Embeddings API request body for a list of texts"""
+        return {
+            'model': EMBEDDING_MODEL,
+            'input': texts
+        }
+
+    def _check_response(self, service: str, response: httpx.Response) -> dict:
         """
-        Call Jina AI Reader API with retry logic
+        Feed the response status back into the service's rate limiter
         
         Args:
-            url (str): URL to scrape
+            service (str): Service the response came from
+            response (httpx.Response): Raw HTTP response
             
         Returns:
-            dict: Parsed JSON response from Reader API
+            dict: Parsed JSON body of a successful response
+            
+        Raises:
+            RateLimitError: On HTTP 429, or an error response carrying Retry-After
+            httpx.HTTPStatusError: For other error responses
+        """
+        limiter = self.rate_limiters[service]
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        
+        if response.status_code == 429 or (response.is_error and retry_after is not None):
+            limiter.on_throttle(retry_after)
+            self.logger.warning(
+                f"{SERVICE_NAMES[service]} throttled (HTTP {response.status_code}), "
+                f"slowing down to {limiter.rate:.2f} requests/s"
+            )
+            raise RateLimitError(f"{SERVICE_NAMES[service]} rate limit exceeded")
+            
+        response.raise_for_status()
+        limiter.on_success()
+        return response.json()
+
+    @staticmethod
+    def _billed_tokens(result: dict) -> int:
+        """Tokens a Jina AI response reports as used; each service puts them somewhere else"""
+        data = result.get('data')
+        usage = result.get('usage') or (data.get('usage') if isinstance(data, dict) else None) or {}
+        return int(usage.get('total_tokens') or usage.get('tokens') or result.get('num_tokens') or 0)
+
+    def _cached_response(self, service: str, payload: dict, refresh: bool) -> Optional[dict]:
+        """Cached response for a request, counting the hit or miss"""
+        if not self.cache or refresh:
+            return None
+        cached = self.cache.get(service, payload)
+        self.metrics.inc('cache_hits_total' if cached is not None else 'cache_misses_total', service=service)
+        return cached
+
+    def _record_response(self, service: str, response: httpx.Response, result: dict):
+        """Count the traffic and tokens of a successful API call"""
+        self.metrics.inc('bytes_sent_total', len(response.request.content), service=service)
+        self.metrics.inc('bytes_received_total', len(response.content), service=service)
+        self.metrics.inc('tokens_total', self._billed_tokens(result), service=service)
+
+    def _request(self, service: str, payload: dict, extract: Callable[[dict], Any],
+                 refresh: bool = False, use_cache: bool = True) -> Any:
+        """
+        POST a payload to a Jina AI endpoint and extract the result
+        
+        Args:
+            service (str): Key into JINA_ENDPOINTS ('reader', 'segmenter' or 'embeddings')
+            payload (dict): JSON request body
+            extract (Callable[[dict], Any]): Turns the JSON response into the return value
+            refresh (bool): Skip the cached response, e.g. when the page is known to have changed
+            use_cache (bool): Look up and store the response in the response cache; False for
+                requests whose results are cached elsewhere, e.g. batches of chunk embeddings
+            
+        Returns:
+            Any: Whatever `extract` returns
             
         Raises:
             JinaAPIError: If the API returns an error response
             httpx.RequestError: For network-related errors
         """
         try:
-            response = self.client.post(
-                'https://r.jina.ai/',
-                headers=self._get_headers(),
-                json={
-                    'url': url,
-                    'with_links_summary': True,
-                    'with_images_summary': True
-                }
-            )
-            response.raise_for_status()
-            return response.json()
+            cached = self._cached_response(service, payload, refresh) if use_cache else None
+            if cached is not None:
+                return extract(cached)
+                
+            with self.metrics.time('rate_limit_wait', service=service):
+                self.rate_limiters[service].acquire()
+            with self.metrics.time(service):
+                response = self.client.post(
+                    JINA_ENDPOINTS[service],
+                    headers=self._get_headers(),
+                    json=payload
+                )
+            self.metrics.inc('requests_total', service=service, status=response.status_code)
+            result = self._check_response(service, response)
+            self._record_response(service, response, result)
+            if self.cache and use_cache:
+                self.cache.set(service, payload, result)
+            return extract(result)
+        except JinaAPIError:
+            raise
+        except httpx.RequestError as e:
+            self.logger.error(f"{SERVICE_NAMES[service]} error: {str(e)}")
+            raise
+        except Exception as e:
+            raise JinaAPIError(f"Unexpected error in {SERVICE_NAMES[service]}: {str(e)}")
+
+    async def _request_async(self, client: httpx.AsyncClient, service: str, payload: dict,
+                             extract: Callable[[dict], Any], refresh: bool = False,
+                             use_cache: bool = True) -> Any:
+        """Async counterpart of `_request` using a shared httpx.AsyncClient"""
+        try:
+            cached = self._cached_response(service, payload, refresh) if use_cache else None
+            if cached is not None:
+                return extract(cached)
+                
+            with self.metrics.time('rate_limit_wait', service=service):
+                await self.rate_limiters[service].acquire_async()
+            with self.metrics.time(service):
+                response = await client.post(
+                    JINA_ENDPOINTS[service],
+                    headers=self._get_headers(),
+                    json=payload
+                )
+            self.metrics.inc('requests_total', service=service, status=response.status_code)
+            result = self._check_response(service, response)
+            self._record_response(service, response, result)
+            if self.cache and use_cache:
+                self.cache.set(service, payload, result)
+            return extract(result)
+        except JinaAPIError:
+            raise
         except httpx.RequestError as e:
-            self.logger.error(f"Reader API error for {url}: {str(e)}")
+            self.logger.error(f"{SERVICE_NAMES[service]} error: {str(e)}")
             raise
         except Exception as e:
-            raise JinaAPIError(f"Unexpected error in Reader API: {str(e)}")
+            raise JinaAPIError(f"Unexpected error in {SERVICE_NAMES[service]}: {str(e)}")
+
+    @jina_retry
+    def _call_reader_api(self, url: str, refresh: bool = False) -> dict:
+        """
+        Call Jina AI Reader API with retry logic
+        
+        Args:
+            url (str): URL to scrape
+            refresh (bool): Bypass the response cache
+            
+        Returns:
+            dict: Parsed JSON response from Reader API
+            
+        Raises:
+            JinaAPIError: If the API returns an error response
+            httpx.RequestError: For network-related errors
+        """
+        return self._request('reader', self._reader_payload(url), lambda result: result, refresh)
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-        retry=retry_if_exception_type((httpx.RequestError, JinaAPIError))
-    )
+    @jina_retry
     def _segment_content(self, content: str) -> List[str]:
         """
         Segment content using Jina AI Segmenter API
@@ -105,37 +415,17 @@ class APIScraper:
             JinaAPIError: If the API returns an error response
             httpx.RequestError: For network-related errors
         """
-        try:
-            response = self.client.post(
-                'https://segment.jina.ai/',
-                headers=self._get_headers(),
-                json={
-                    'content': content,
-                    'return_chunks': True,
-                    'max_chunk_length': 1000,
-                    'chunk_overlap': 100
-                }
-            )
-            response.raise_for_status()
-            result = response.json()
-            return result.get('chunks', [])
-        except httpx.RequestError as e:
-            self.logger.error(f"Segmenter API error: {str(e)}")
-            raise
-        except Exception as e:
-            raise JinaAPIError(f"Unexpected error in Segmenter API: {str(e)}")
+        return self._request('segmenter', self._segmenter_payload(content),
+                             lambda result: result.get('chunks', []))
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-        retry=retry_if_exception_type((httpx.RequestError, JinaAPIError))
-    )
-    def _get_embeddings(self, texts: List[str]) -> List[List[float]]:
+    @jina_retry
+    def _get_embeddings(self, texts: List[str], use_cache: bool = True) -> List[List[float]]:
         """
         Get embeddings for text chunks using Jina AI Embeddings API
         
         Args:
             texts (List[str]): List of text chunks to get embeddings for
+            use_cache (bool): Cache the response as a whole; the batcher caches chunk vectors itself
             
         Returns:
             List[List[float]]: List of embeddings vectors
@@ -144,84 +434,271 @@ class APIScraper:
             JinaAPIError: If the API returns an error response
             httpx.RequestError: For network-related errors
         """
-        try:
-            response = self.client.post(
-                'https://api.jina.ai/v1/embeddings',
-                headers=self._get_headers(),
-                json={
-                    'model': 'jina-embeddings-v3',
-                    'input': texts
-                }
-            )
-            response.raise_for_status()
-            return [item['embedding'] for item in response.json()['data']]
-        except httpx.RequestError as e:
-            self.logger.error(f"Embeddings API error: {str(e)}")
-            raise
-        except Exception as e:
-            raise JinaAPIError(f"Unexpected error in Embeddings API: {str(e)}")
+        return self._request('embeddings', self._embeddings_payload(texts),
+                             lambda result: [item['embedding'] for item in result['data']],
+                             use_cache=use_cache)
+
+    @jina_retry
+    async def _call_reader_api_async(self, client: httpx.AsyncClient, url: str,
+                                     refresh: bool = False) -> dict:
+        """Async counterpart of `_call_reader_api`"""
+        return await self._request_async(client, 'reader', self._reader_payload(url),
+                                         lambda result: result, refresh)
+
+    @jina_retry
+    async def _segment_content_async(self, client: httpx.AsyncClient, content: str) -> List[str]:
+        """Async counterpart of `_segment_content`"""
+        return await self._request_async(client, 'segmenter', self._segmenter_payload(content),
+                                         lambda result: result.get('chunks', []))
+
+    @jina_retry
+    async def _get_embeddings_async(self, client: httpx.AsyncClient, texts: List[str],
+                                    use_cache: bool = True) -> List[List[float]]:
+        """Async counterpart of `_get_embeddings`"""
+        return await self._request_async(client, 'embeddings', self._embeddings_payload(texts),
+                                         lambda result: [item['embedding'] for item in result['data']],
+                                         use_cache=use_cache)
+
+    def _segment_page(self, content: str) -> List[str]:
+        """Split page content into chunks with the configured segmenter backend"""
+        if self.local_segmenter is not None:
+            with self.metrics.time('local_segmenter'):
+                return self.local_segmenter.segment(content)
+        return self._segment_content(content)
+
+    async def _segment_page_async(self, client: httpx.AsyncClient, content: str) -> List[str]:
+        """Async counterpart of `_segment_page`"""
+        if self.local_segmenter is not None:
+            with self.metrics.time('local_segmenter'):
+                return self.local_segmenter.segment(content)
+        return await self._segment_content_async(client, content)
 
     def _extract_code_samples(self, content: str) -> List[str]:
-        """Extract code samples from content using simple heuristics"""
-        # Look for code blocks in markdown and HTML
-        code_blocks = re.findall(r'```[\w]*\n(.*?)```', content, re.DOTALL)
-        code_blocks.extend(re.findall(r'<pre><code>(.*?)</code></pre>', content, re.DOTALL))
-        
-        # Parse HTML content for additional code blocks
-        soup = BeautifulSoup(content, 'html.parser')
-        for code_elem in soup.find_all(['code', 'pre']):
-            if code_elem.text.strip():
-                code_blocks.append(code_elem.text.strip())
-                
-        return [self._clean_code_block(block) for block in code_blocks if block.strip()]
+        """Extract deduplicated code samples from content"""
+        return extract_page(content)[1]
 
     def _clean_code_block(self, code: str) -> str:
         """Clean a code block by removing unnecessary whitespace and line numbers."""
-        if not code:
-            return ""
+        return clean_code_block(code)
+
+    def _clean_html(self, content: str) -> str:
+        """Clean HTML content and extract meaningful text"""
+        return extract_page(content)[0]
+
+    async def _extract_async(self, reader_response: dict) -> Optional[Tuple[str, List[str]]]:
+        """
+        Run `extract_page` in the worker pool, if there is one
         
-        # Remove line number references (e.g., _25, _41, _42, or plain numbers)
-        code = re.sub(r'\s*_?\d+\s*$', '', code)  # Remove trailing numbers
-        code = re.sub(r'^\s*_?\d+\s*', '', code, flags=re.MULTILINE)  # Remove leading numbers
-        code = re.sub(r'\n\s*\n+', '\n\n', code)  # Normalize multiple newlines
+        Returns:
+            Optional[Tuple[str, List[str]]]: Cleaned text and code samples, or None
+            when extraction should happen inline
+        """
+        if self._executor is None:
+            return None
+        loop = asyncio.get_running_loop()
+        # Includes the time the page waits for a free worker
+        with self.metrics.time('extract', mode='worker'):
+            return await loop.run_in_executor(self._executor, extract_page, reader_response['data']['content'])
+
+    def _parse_reader_response(self, url: str, reader_response: dict,
+                               extracted: Optional[Tuple[str, List[str]]] = None) -> dict:
+        """
+        Turn a Reader API response into a page record without chunks or embeddings
         
-        # Remove leading/trailing whitespace while preserving indentation
-        lines = code.splitlines()
-        # Remove empty lines from start and end
-        while lines and not lines[0].strip():
-            lines.pop(0)
-        while lines and not lines[-1].strip():
-            lines.pop()
+        Args:
+            url (str): URL the response belongs to
+            reader_response (dict): Parsed JSON response from Reader API
+            extracted (Optional[Tuple[str, List[str]]]): Result of `extract_page` for the
+                response content if it was already computed, e.g. in a worker process
             
-        if not lines:
-            return ""
+        Returns:
+            dict: Page record with cleaned content, code samples and links
+        """
+        content = reader_response['data']['content']
+        
+        # Parse the page once for both the cleaned text and the code samples
+        if extracted is None:
+            with self.metrics.time('extract', mode='inline'):
+                extracted = extract_page(content)
+        cleaned_content, code_samples = extracted
+        
+        return {
+            'title': reader_response['data'].get('title', ''),
+            'description': reader_response['data'].get('description', ''),
+            'content': cleaned_content,
+            'raw_content': content,
+            'chunks': [],
+            'embeddings': [],
+            'code_samples': code_samples,
+            'links': reader_response['data'].get('links', {}),
+            'url': url,
+            'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'content_hash': content_hash(content)
+        }
+
+    def _discover_urls(self, links: Dict[str, str]) -> List[str]:
+        """Return the links of a page that belong to the documentation site, robots.txt aside"""
+        return [url for url in links.values() if self.is_valid_url(url)]
+
+    def _skip_disallowed(self, url: str, count: bool = True) -> bool:
+        """
+        Tell whether robots.txt disallows a URL the crawl is about to queue
+        
+        Disallowed URLs are marked as seen in the frontier, so each one is
+        counted in robots_disallowed_total once, however many pages link to it.
+        
+        Args:
+            url (str): URL to check
+            count (bool): Count the URL; off for links counted by an earlier run
             
-        # Find minimum indentation (excluding empty lines)
-        min_indent = min(len(line) - len(line.lstrip()) 
-                        for line in lines if line.strip())
+        Returns:
+            bool: True if the URL must not be crawled
+        """
+        if self.site_map is None or self.site_map.allowed(url):
+            return False
+        if url not in self.frontier:
+            self.frontier.mark_seen(url)
+            if count:
+                self.metrics.inc('robots_disallowed_total')
+        return True
+
+    def _compare_validators(self, url: str, response: httpx.Response) -> Optional[bool]:
+        """
+        Compare a page's ETag / Last-Modified with the ones in the manifest
+        
+        Returns:
+            Optional[bool]: False if the page is unchanged, True if it changed,
+            None if the server gives no usable validators or the page is new
+        """
+        entry = self.manifest.get(url) or {}
+        previous = {key: entry[key] for key in ('etag', 'last_modified') if entry.get(key)}
         
-        # Remove minimum indentation from all lines
-        cleaned_lines = [line[min_indent:] if line.strip() else '' 
-                        for line in lines]
+        if response.status_code == 304 and previous:
+            self.validators[url] = previous
+            return False
+            
+        current = {}
+        if response.headers.get('ETag'):
+            current['etag'] = response.headers['ETag']
+        if response.headers.get('Last-Modified'):
+            current['last_modified'] = response.headers['Last-Modified']
+        self.validators[url] = current
         
-        return '\n'.join(cleaned_lines).strip()
+        if not current or not previous or response.is_error:
+            return None
+        return current != previous
 
-    def _clean_html(self, content: str) -> str:
-        """Clean HTML content and extract meaningful text"""
-        soup = BeautifulSoup(content, 'html.parser')
-        
-        # Remove script and style elements
-        for script in soup(['script', 'style']):
-            script.decompose()
-            
-        # Get text and preserve some structure
-        lines = []
-        for elem in soup.stripped_strings:
-            line = elem.strip()
-            if line:
-                lines.append(line)
-                
-        return '\n'.join(lines)
+    def _check_validators(self, url: str) -> Optional[bool]:
+        """Send a conditional HEAD request to the page itself (not the Reader API)"""
+        try:
+            response = self.client.head(url, headers=self.manifest.conditional_headers(url),
+                                        follow_redirects=True)
+        except httpx.HTTPError:
+            return None
+        return self._compare_validators(url, response)
+
+    async def _check_validators_async(self, client: httpx.AsyncClient, url: str) -> Optional[bool]:
+        """Async counterpart of `_check_validators`"""
+        try:
+            response = await client.head(url, headers=self.manifest.conditional_headers(url),
+                                         follow_redirects=True)
+        except httpx.HTTPError:
+            return None
+        return self._compare_validators(url, response)
+
+    def _reuse_page(self, url: str, api_info: Optional[dict] = None) -> bool:
+        """
+        Restore a page from the manifest instead of segmenting and embedding it again
+        
+        Args:
+            url (str): Page URL
+            api_info (Optional[dict]): Freshly fetched page; its content hash must
+                match the manifest. None when the validators already proved the
+                page unchanged.
+            
+        Returns:
+            bool: True if the page was restored into api_docs
+        """
+        if self.manifest is None:
+            return False
+        entry = self.manifest.get(url)
+        if entry is None or (api_info is not None and entry.get('content_hash') != api_info['content_hash']):
+            return False
+            
+        page = self.manifest.restore(url, self.embedding_store)
+        if page is None:
+            return False
+        if api_info is not None:
+            page['raw_content'] = api_info['raw_content']
+            page['scraped_at'] = api_info['scraped_at']
+            
+        self.api_docs[url] = page
+        self.changes['unchanged'].append(url)
+        self._complete_page(url)
+        return True
+
+    def _record_change(self, url: str):
+        """Note whether a freshly processed page is new or changed since the last crawl"""
+        if self.manifest is not None:
+            self.changes['changed' if self.manifest.get(url) else 'added'].append(url)
+
+    def _pages_to_chunk(self, url: str) -> List[str]:
+        """
+        Return the scraped pages whose content can be segmented now
+        
+        Without boilerplate stripping that is just `url`. Otherwise each page
+        is observed by the detector and held back until it has seen enough
+        pages, at which point all held-back pages are released at once.
+        """
+        if self.boilerplate is None:
+            return [url]
+        self.boilerplate.observe(self.api_docs[url]['content'])
+        self._deferred_pages.append(url)
+        if not self.boilerplate.ready:
+            return []
+        return self._take_deferred_pages()
+
+    def _take_deferred_pages(self) -> List[str]:
+        """Release the pages held back for boilerplate detection that are still in api_docs"""
+        pages, self._deferred_pages = self._deferred_pages, []
+        return [url for url in pages if url in self.api_docs]
+
+    def _strip_boilerplate(self, url: str) -> str:
+        """Remove boilerplate lines from a page's content and return the result"""
+        doc = self.api_docs[url]
+        if self.boilerplate is not None:
+            doc['content'] = self.boilerplate.strip(doc['content'])
+        return doc['content']
+
+    def _queue_chunks(self, url: str, chunks: List[str]):
+        """Store a page's chunks and queue them for batched embedding"""
+        self.api_docs[url]['chunks'] = chunks
+        self.metrics.inc('chunks_total', len(chunks))
+        self._record_change(url)
+        hits = self.embedding_batcher.cache_hits
+        self.embedding_batcher.add(url, chunks)
+        if self.cache:
+            self.metrics.inc('cache_hits_total', self.embedding_batcher.cache_hits - hits, service='chunk_embeddings')
+
+    def _chunk_page(self, url: str):
+        """
+        Segment a scraped page and queue its chunks for embedding
+        
+        A page that cannot be segmented is dropped from api_docs.
+        """
+        try:
+            self._queue_chunks(url, self._segment_page(self._strip_boilerplate(url)))
+        except (JinaAPIError, httpx.RequestError) as e:
+            self.logger.error(f"Error segmenting {url}: {str(e)}")
+            del self.api_docs[url]
+
+    async def _chunk_page_async(self, client: httpx.AsyncClient, url: str):
+        """Async counterpart of `_chunk_page`"""
+        try:
+            self._queue_chunks(url, await self._segment_page_async(client, self._strip_boilerplate(url)))
+        except (JinaAPIError, httpx.RequestError) as e:
+            self.logger.error(f"Error segmenting {url}: {str(e)}")
+            del self.api_docs[url]
 
     def scrape_page(self, url: str) -> List[str]:
         """
@@ -240,53 +717,226 @@ class APIScraper:
             return []
             
         self.visited_urls.add(url)
-        discovered_urls = []
         
         try:
-            # Use Jina AI Reader API to get page content
-            reader_response = self._call_reader_api(url)
-            content = reader_response['data']['content']
-            
-            # Clean HTML content
-            cleaned_content = self._clean_html(content)
-            
-            # Extract links and metadata
-            links = reader_response['data'].get('links', {})
-            title = reader_response['data'].get('title', '')
-            description = reader_response['data'].get('description', '')
-            
-            # Extract code samples
-            code_samples = self._extract_code_samples(content)
-            
-            # Segment content into chunks
-            chunks = self._segment_content(cleaned_content)
-            
-            # Get embeddings for chunks
-            embeddings = self._get_embeddings(chunks) if chunks else []
-            
-            # Store API documentation information
-            api_info = {
-                'title': title,
-                'description': description,
-                'content': cleaned_content,
-                'raw_content': content,
-                'chunks': chunks,
-                'embeddings': embeddings,
-                'code_samples': code_samples,
-                'links': links,
-                'url': url,
-                'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S')
-            }
+            # Skip the Reader API entirely if the page's validators say it is unchanged
+            changed = self._check_validators(url) if self.manifest else None
+            if changed is False and self._reuse_page(url):
+                self.metrics.inc('pages_total', result='unchanged')
+                return self._discover_urls(self.api_docs[url]['links'])
+                
+            # Use Jina AI Reader API to get page content; with a manifest, a cached response could
+            # be stale unless the validators proved the page unchanged
+            refresh = self.manifest is not None and changed is not False
+            api_info = self._parse_reader_response(url, self._call_reader_api(url, refresh=refresh))
+            if self._reuse_page(url, api_info):
+                self.metrics.inc('pages_total', result='unchanged')
+                return self._discover_urls(api_info['links'])
             
+            # Segment content into chunks and queue them for batched embedding
+            self.metrics.inc('pages_total', result='scraped')
             self.api_docs[url] = api_info
-            
-            # Add discovered URLs
-            discovered_urls.extend([url for url in links.values() if self.is_valid_url(url)])
+            for ready_url in self._pages_to_chunk(url):
+                self._chunk_page(ready_url)
+            self.flush_embeddings(force=False)
+            return self._discover_urls(api_info['links'])
                     
         except (JinaAPIError, httpx.RequestError) as e:
             self.logger.error(f"Error scraping {url}: {str(e)}")
+            self.metrics.inc('pages_total', result='failed')
+            
+        return []
+
+    async def _scrape_page_async(self, client: httpx.AsyncClient, url: str) -> List[str]:
+        """
+        Async counterpart of `scrape_page` used by the concurrent crawler
+        
+        Args:
+            client (httpx.AsyncClient): Shared client for all in-flight pages
+            url (str): URL to scrape
+            
+        Returns:
+            List[str]: List of discovered URLs
+        """
+        if url in self.visited_urls:
+            return []
+            
+        self.visited_urls.add(url)
+        
+        try:
+            changed = await self._check_validators_async(client, url) if self.manifest else None
+            if changed is False and self._reuse_page(url):
+                self.metrics.inc('pages_total', result='unchanged')
+                return self._discover_urls(self.api_docs[url]['links'])
+                
+            refresh = self.manifest is not None and changed is not False
+            reader_response = await self._call_reader_api_async(client, url, refresh=refresh)
+            api_info = self._parse_reader_response(url, reader_response,
+                                                   await self._extract_async(reader_response))
+            if self._reuse_page(url, api_info):
+                self.metrics.inc('pages_total', result='unchanged')
+                return self._discover_urls(api_info['links'])
+            
+            self.metrics.inc('pages_total', result='scraped')
+            self.api_docs[url] = api_info
+            await asyncio.gather(*(self._chunk_page_async(client, ready_url)
+                                   for ready_url in self._pages_to_chunk(url)))
+            await self.flush_embeddings_async(client, force=False)
+            return self._discover_urls(api_info['links'])
+            
+        except (JinaAPIError, httpx.RequestError) as e:
+            self.logger.error(f"Error scraping {url}: {str(e)}")
+            self.metrics.inc('pages_total', result='failed')
+            
+        return []
+
+    def _assign_embeddings(self):
+        """Point fully embedded pages in api_docs at their rows of the embedding matrix"""
+        for url, rows in self.embedding_batcher.completed_pages():
+            if rows is None:
+                self.logger.error(f"Could not embed all chunks of {url}")
+            elif url in self.api_docs:
+                self.api_docs[url]['embeddings'] = rows
+            if url in self.api_docs:
+                self._complete_page(url)
+
+    def _complete_page(self, url: str):
+        """Journal and export a page once all of its artifacts, embeddings included, are final"""
+        if self.journal is None and self.corpus is None:
+            return
+        page = self.api_docs[url]
+        if self.corpus is not None:
+            self.corpus.append_page(url, page)
+        if self.journal is None:
+            return
+        self.journal.append_page(url, self._depths.get(url, 0), page)
+
+    def _checkpoint_due(self) -> bool:
+        """Count a crawled page and tell whether the next frontier checkpoint is due"""
+        if self.journal is None:
+            return False
+        self._completed_since_checkpoint += 1
+        return self._completed_since_checkpoint >= self.checkpoint_interval
+
+    def _write_checkpoint(self):
+        """
+        Snapshot the frontier into the journal
+        
+        Call it right after flushing embeddings, so every page scraped so far is
+        journaled and a resumed crawl does not fetch it again. Pages still held
+        back for boilerplate detection are not journaled yet; a resumed crawl
+        finds them again from the start URL and the links of journaled pages.
+        """
+        self.journal.append_frontier(self.frontier.snapshot())
+        self._completed_since_checkpoint = 0
+
+    def _open_journal(self, resume: bool):
+        """
+        Open the crawl journal, restoring completed pages and the frontier when resuming
+        
+        Pages that were scraped but not yet journaled when the crawl stopped are
+        found again through the links of the journaled pages.
+        """
+        if resume and self.journal.exists():
+            pages, pending = self.journal.load()
+            for url, depth, page, vectors in pages:
+                page['embeddings'] = []
+                if len(vectors):
+                    start, stop = self.embedding_store.append(vectors)
+                    page['embeddings'] = self.embedding_store.range(start, stop)
+                self.api_docs[url] = page
+                self.visited_urls.add(url)
+                self._depths[url] = depth
+                self.frontier.mark_seen(url)
+            self.frontier.dequeued = len(self.api_docs)
             
-        return discovered_urls
+            for url, depth in pending:
+                self.frontier.push(url, depth)
+            for url, depth, page, _ in pages:
+                for new_url in self._discover_urls(page.get('links', {})):
+                    if not self._skip_disallowed(new_url, count=False):
+                        self.frontier.push(new_url, depth + 1)
+            self.logger.info(
+                f"Resuming crawl from {self.journal.path}: {len(self.api_docs)} pages restored, "
+                f"{len(self.frontier)} pending"
+            )
+        self.journal.open(resume)
+
+    def flush_embeddings(self, force: bool = True, deferred: bool = True):
+        """
+        Send queued chunks to the Embeddings API and assign vectors to their pages
+        
+        Pages scraped with `scrape_page` only receive their `embeddings` once
+        the batch holding their chunks has been sent, so call this after
+        scraping pages outside of `crawl`.
+        
+        Args:
+            force (bool): Send a final, partially filled batch
+            deferred (bool): With `force`, also segment pages still held back for
+                boilerplate detection
+        """
+        if force and deferred:
+            for url in self._take_deferred_pages():
+                self._chunk_page(url)
+        batcher = self.embedding_batcher
+        while batcher.has_full_batch() or (force and batcher.has_pending()):
+            batch = batcher.next_batch()
+            try:
+                batcher.resolve(batch, self._get_embeddings([text for _, text in batch], use_cache=False))
+            except (JinaAPIError, httpx.RequestError) as e:
+                self.logger.error(f"Error embedding {len(batch)} chunks: {str(e)}")
+                batcher.fail(batch)
+        self._assign_embeddings()
+
+    async def flush_embeddings_async(self, client: httpx.AsyncClient, force: bool = True,
+                                     deferred: bool = True):
+        """Async counterpart of `flush_embeddings`"""
+        if force and deferred:
+            await asyncio.gather(*(self._chunk_page_async(client, url) for url in self._take_deferred_pages()))
+        batcher = self.embedding_batcher
+        while batcher.has_full_batch() or (force and batcher.has_pending()):
+            batch = batcher.next_batch()
+            try:
+                vectors = await self._get_embeddings_async(client, [text for _, text in batch], use_cache=False)
+                batcher.resolve(batch, vectors)
+            except (JinaAPIError, httpx.RequestError) as e:
+                self.logger.error(f"Error embedding {len(batch)} chunks: {str(e)}")
+                batcher.fail(batch)
+        self._assign_embeddings()
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a search query with the same model as the crawled chunks
+        
+        Args:
+            text (str): Query text
+            
+        Returns:
+            List[float]: Query embedding
+            
+        Raises:
+            JinaAPIError: If the Embeddings API returns an error response
+        """
+        return self._get_embeddings([text])[0]
+
+    def save_embeddings(self, path: str):
+        """
+        Persist the embedding matrix and each page's row range
+        
+        Writes `path` (a `.npy` file that `EmbeddingStore.load` can memory-map)
+        and `<name>.rows.json` mapping every URL to its [start, stop) rows.
+        
+        Args:
+            path (str): Destination `.npy` path
+        """
+        self.embedding_store.save(path)
+        rows = {
+            url: [doc['embeddings'].start, doc['embeddings'].stop]
+            for url, doc in self.api_docs.items()
+            if hasattr(doc['embeddings'], 'start')
+        }
+        with open(os.path.splitext(path)[0] + '.rows.json', 'w', encoding='utf-8') as f:
+            json.dump(rows, f)
 
     def is_valid_url(self, url: str) -> bool:
         """
@@ -298,34 +948,222 @@ class APIScraper:
         Returns:
             bool: True if URL is valid and belongs to same domain
         """
-        from urllib.parse import urlparse
-        base_domain = urlparse(self.base_url).netloc
-        url_domain = urlparse(url).netloc
-        return base_domain in url_domain
+        return self._base_domain in urlparse(url).netloc
+
+    def _log_crawl_stats(self):
+        """Log embedding deduplication and response cache hits and misses per service"""
+        batcher = self.embedding_batcher
+        self.logger.info(
+            f"Embedded {batcher.unique_chunks} unique chunks out of {batcher.total_chunks} "
+            f"({batcher.cache_hits} from the cache) in {batcher.requests} Embeddings API requests "
+            f"({self.embedding_store.nbytes / 1024 / 1024:.1f} MB of {self.embedding_store.dtype} vectors)."
+        )
+        if self.boilerplate is not None:
+            self.logger.info(f"Stripped {self.boilerplate.stripped_lines} boilerplate lines "
+                             f"(detected from {self.boilerplate.pages} pages).")
+        if not self.cache:
+            return
+        for service, counts in self.cache.stats().items():
+            self.logger.info(
+                f"{SERVICE_NAMES.get(service, service)} cache: "
+                f"{counts['hits']} hits, {counts['misses']} misses"
+            )
+
+    def _link_order(self) -> List[str]:
+        """
+        Return the URLs of api_docs ordered breadth-first from base_url along each page's links
+        
+        This is the order the sequential crawler produces. Pages that cannot be
+        reached this way (e.g. restored from a journal) follow, sorted by URL.
+        """
+        ordered: Dict[str, None] = {}
+        queue = deque([canonicalize_url(self.base_url)])
+        while queue:
+            url = queue.popleft()
+            if url in ordered or url not in self.api_docs:
+                continue
+            ordered[url] = None
+            for link in self._discover_urls(self.api_docs[url].get('links', {})):
+                queue.append(canonicalize_url(link))
+        return list(ordered) + sorted(set(self.api_docs) - set(ordered))
+
+    def _load_site_map(self):
+        """Read robots.txt and the sitemaps of the site; links are checked against robots.txt from now on"""
+        with self.metrics.time('site_map'):
+            self.site_map = SiteMap(self.base_url).load(self.client)
+
+    def _queue_site_map_pages(self) -> int:
+        """
+        Queue the sitemap pages that robots.txt allows one hop from base_url, most recently modified first
+        
+        Returns:
+            int: Number of pages queued
+        """
+        queued = self.frontier.extend(self.site_map.seeds(), 1)
+        disallowed = sum(self._skip_disallowed(url) for url in self.site_map.pages)
+        self.metrics.inc('pages_seeded_total', queued)
+        self.logger.info(
+            f"Queued {queued} pages from {self.site_map.sitemaps_read} sitemaps "
+            f"({disallowed} disallowed by robots.txt)"
+        )
+        return queued
+
+    def _sort_pages(self):
+        """Put api_docs into link order, in place for a DocStore"""
+        order = self._link_order()
+        if self.doc_store is not None:
+            self.doc_store.reorder(order)
+        else:
+            self.api_docs = {url: self.api_docs[url] for url in order}
+
+    def _finish_crawl(self) -> MutableMapping[str, dict]:
+        """Log crawl statistics and update the manifest once all pages are embedded"""
+        self.logger.info(f"Crawling completed. Processed {len(self.visited_urls)} pages.")
+        self._log_crawl_stats()
+        if self.doc_store is not None:
+            self.doc_store.flush()
+        
+        if self.journal is not None:
+            self.journal.append_frontier(self.frontier.snapshot())
+            self.journal.close()
+        if self.corpus is not None:
+            self.corpus.close(order=list(self.api_docs))
+            self.logger.info(f"Exported {len(self.api_docs)} pages to {self.corpus.path}")
+            
+        if self.manifest is not None:
+            self.changes['removed'] = [url for url in self.manifest.entries if url not in self.api_docs]
+            self.manifest.save(self.api_docs, self.embedding_store, self.validators, self.changes,
+                               self.boilerplate.to_dict() if self.boilerplate is not None else None)
+            self.logger.info(
+                "Changes since last crawl: " +
+                ", ".join(f"{len(urls)} {kind}" for kind, urls in self.changes.items())
+            )
+            for kind in ('added', 'changed', 'removed'):
+                for url in self.changes[kind]:
+                    self.logger.info(f"  {kind}: {url}")
+        return self.api_docs
 
-    def crawl(self) -> Dict[str, dict]:
+    def crawl(self, concurrency: int = 1, max_pages: Optional[int] = None,
+              max_depth: Optional[int] = None, resume: bool = False) -> MutableMapping[str, dict]:
         """
         Start the crawling process from the base URL using Jina AI APIs
         
+        Args:
+            concurrency (int): Number of pages fetched in parallel. 1 keeps the
+                sequential crawler; anything higher uses the asyncio crawler.
+            max_pages (Optional[int]): Stop after this many pages
+            max_depth (Optional[int]): Do not follow links more than this many hops from base_url
+            resume (bool): Continue from the checkpoint journal instead of starting over
+        
         Returns:
-            Dict[str, dict]: Collected API documentation
+            MutableMapping[str, dict]: Collected API documentation, keyed by canonical URL;
+            a DocStore of PageRecords when `store_dir` is set, otherwise a dict
             
         Example:
             >>> scraper = APIScraper("https://docs.example.com/api")
-            >>> docs = scraper.crawl()
+            >>> docs = scraper.crawl(concurrency=8, max_pages=500)
             >>> print(f"Scraped {len(docs)} pages")
         """
-        urls_to_visit = [self.base_url]
+        self.frontier = CrawlFrontier(max_pages=max_pages, max_depth=max_depth)
+        if self.use_sitemap:
+            self._load_site_map()
+        if self.journal is not None:
+            self._open_journal(resume)
+        if self.corpus is not None:
+            self.corpus.open(self.base_url, resume)
+        if self._skip_disallowed(self.base_url):
+            self.logger.warning(f"robots.txt disallows {self.base_url}, crawling only the sitemap pages it allows")
+        else:
+            self.frontier.push(self.base_url, 0)
+        seeded = self._queue_site_map_pages() if self.site_map is not None else 0
         
+        if concurrency > 1:
+            return asyncio.run(self.crawl_async(concurrency))
+        if self.workers > 0:
+            self.logger.info("Worker processes are only used by the concurrent crawler (concurrency > 1).")
+            
         with tqdm(desc="Crawling pages", unit="page") as pbar:
-            while urls_to_visit:
-                # Respect rate limits
-                time.sleep(0.3)  # ~200 requests per minute
-                
-                url = urls_to_visit.pop(0)
-                new_urls = self.scrape_page(url)
-                urls_to_visit.extend(new_urls)
+            while self.frontier:
+                url, depth = self.frontier.pop()
+                self._depths[url] = depth
+                for new_url in self.scrape_page(url):
+                    if not self._skip_disallowed(new_url):
+                        self.frontier.push(new_url, depth + 1)
                 pbar.update(1)
+                if self._checkpoint_due():
+                    # Embed and journal the pages scraped so far before recording the frontier
+                    self.flush_embeddings(deferred=False)
+                    self._write_checkpoint()
                 
-        self.logger.info(f"Crawling completed. Processed {len(self.visited_urls)} pages.")
-        return self.api_docs
+        self.flush_embeddings()
+        if seeded:
+            # Sitemap pages are crawled most recently modified first; document them in link order
+            self._sort_pages()
+        return self._finish_crawl()
+
+    async def crawl_async(self, concurrency: int = 8) -> MutableMapping[str, dict]:
+        """
+        Crawl `self.frontier` with up to `concurrency` pages in flight on a shared httpx.AsyncClient
+        
+        Produces the same `api_docs` mapping as `crawl`. Pages complete in
+        whatever order the network allows, so `api_docs` is reordered
+        afterwards into breadth-first link order, which does not depend on
+        timing. With `workers` set, page cleaning and code extraction run in a
+        ProcessPoolExecutor. Called by `crawl`, which sets up the frontier.
+        
+        Args:
+            concurrency (int): Maximum number of pages scraped at the same time
+            
+        Returns:
+            MutableMapping[str, dict]: Collected API documentation
+        """
+        frontier = self.frontier
+        changed = asyncio.Condition()
+        in_flight = 0
+        
+        if self.workers > 0:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            with tqdm(desc="Crawling pages", unit="page") as pbar:
+                async def worker():
+                    nonlocal in_flight
+                    while True:
+                        async with changed:
+                            # Wait while other pages may still discover new URLs
+                            while not frontier and in_flight:
+                                await changed.wait()
+                            item = frontier.pop()
+                            if item is None:
+                                changed.notify_all()
+                                return
+                            in_flight += 1
+                            
+                        url, depth = item
+                        self._depths[url] = depth
+                        new_urls: List[str] = []
+                        try:
+                            new_urls = await self._scrape_page_async(client, url)
+                            pbar.update(1)
+                        finally:
+                            async with changed:
+                                for new_url in new_urls:
+                                    if not self._skip_disallowed(new_url):
+                                        frontier.push(new_url, depth + 1)
+                                in_flight -= 1
+                                changed.notify_all()
+                        if self._checkpoint_due():
+                            await self.flush_embeddings_async(client, deferred=False)
+                            self._write_checkpoint()
+                
+                try:
+                    await asyncio.gather(*(worker() for _ in range(concurrency)))
+                finally:
+                    if self._executor is not None:
+                        self._executor.shutdown()
+                        self._executor = None
+                
+            await self.flush_embeddings_async(client)
+            
+        self._sort_pages()
+        return self._finish_crawl()
@@ -0,0 +1,75 @@
+import json
+import re
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+# Must match the tokenizer of the search script in the generated HTML
+TOKEN_RE = re.compile(r'\w+')
+MIN_TOKEN_LENGTH = 2
+
+# Words too common to narrow a search down; the page skips them in queries too
+STOPWORDS = frozenset((
+    'a an and are as at be but by can do does for from has have how if in into is it its '
+    'of on or that the their then there these this to was were what when where which while '
+    'will with you your'
+).split())
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase a text and split it into searchable terms"""
+    return [
+        token for token in TOKEN_RE.findall(text.lower())
+        if len(token) >= MIN_TOKEN_LENGTH and token not in STOPWORDS
+    ]
+
+class SearchIndexBuilder:
+    """
+    Inverted index from terms to document sections, built while the HTML is written.
+
+    Every section is identified by the link to its heading. The serialized index
+    lists the sections once and maps each term, in sorted order so the page
+    can do prefix lookups with a binary search, to the ascending ids of the
+    sections containing it. The ids are delta-encoded, which keeps long
+    posting lists of common terms small.
+    """
+
+    def __init__(self):
+        self.sections: List[Tuple[str, str]] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self.sections)
+
+    def add_section(self, href: str, title: str, text: str):
+        """
+        Index one section of the document
+
+        Args:
+            href (str): Link to the section's heading, e.g. '#authentication'
+                or 'guides.html#authentication'
+            title (str): Heading text shown in search results
+            text (str): Searchable text of the section, title included
+        """
+        section_id = len(self.sections)
+        self.sections.append((href, title))
+        for term in set(tokenize(text)):
+            self._postings[term].append(section_id)
+
+    def to_dict(self) -> dict:
+        """Serializable form of the index with delta-encoded posting lists"""
+        terms = sorted(self._postings)
+        postings = []
+        for term in terms:
+            ids = self._postings[term]
+            postings.append([ids[0]] + [current - previous for previous, current in zip(ids, ids[1:])])
+        return {
+            'version': 1,
+            'sections': self.sections,
+            'stopwords': sorted(STOPWORDS),
+            'terms': terms,
+            'postings': postings
+        }
+
+    def write(self, path: str):
+        """Write the index as compact JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'), ensure_ascii=False)
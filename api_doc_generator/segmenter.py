@@ -0,0 +1,155 @@
+import re
+from typing import List, Tuple
+
+# Chunking contract shared with the Jina AI Segmenter API request
+MAX_CHUNK_LENGTH = 1000
+CHUNK_OVERLAP = 100
+
+SEGMENTER_BACKENDS = ('jina', 'local')
+
+FENCE_RE = re.compile(r'^\s*(```|~~~)')
+HEADING_RE = re.compile(r'^\s{0,3}#{1,6}\s')
+SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+WHITESPACE_RE = re.compile(r'\s+')
+
+class LocalSegmenter:
+    """
+    Offline replacement for segment.jina.ai
+
+    Splits text into chunks of at most `max_chunk_length` characters, each
+    starting with up to `chunk_overlap` characters from the end of the
+    previous chunk. Chunks break at paragraph boundaries where possible,
+    prefer to start at a heading, and keep fenced code blocks whole unless
+    a block alone exceeds the chunk size.
+    """
+
+    def __init__(self, max_chunk_length: int = MAX_CHUNK_LENGTH, chunk_overlap: int = CHUNK_OVERLAP):
+        """
+        Initialize the segmenter
+
+        Args:
+            max_chunk_length (int): Maximum characters per chunk, overlap included
+            chunk_overlap (int): Characters repeated from the previous chunk
+        """
+        if chunk_overlap >= max_chunk_length:
+            raise ValueError("chunk_overlap must be smaller than max_chunk_length")
+        self.max_chunk_length = max_chunk_length
+        self.chunk_overlap = chunk_overlap
+
+    @staticmethod
+    def _blocks(content: str) -> List[Tuple[str, str]]:
+        """Split content into (text, kind) blocks where kind is 'heading', 'code' or 'text'"""
+        blocks = []
+        current: List[str] = []
+        kind = 'text'
+        in_fence = False
+
+        def close():
+            if current:
+                blocks.append(('\n'.join(current), kind))
+                current.clear()
+
+        for line in content.splitlines():
+            if in_fence:
+                current.append(line)
+                if FENCE_RE.match(line):
+                    in_fence = False
+                    close()
+                    kind = 'text'
+            elif FENCE_RE.match(line):
+                close()
+                kind = 'code'
+                in_fence = True
+                current.append(line)
+            elif not line.strip():
+                close()
+            elif HEADING_RE.match(line):
+                close()
+                blocks.append((line, 'heading'))
+            else:
+                current.append(line)
+        close()
+        return blocks
+
+    @staticmethod
+    def _pack(units: List[str], separator: str, limit: int) -> List[str]:
+        """Greedily join units into pieces of at most `limit` characters, hard-cutting oversized units"""
+        pieces = []
+        current = ''
+        for unit in units:
+            while len(unit) > limit:
+                if current:
+                    pieces.append(current)
+                    current = ''
+                pieces.append(unit[:limit])
+                unit = unit[limit:]
+            if not current:
+                current = unit
+            elif len(current) + len(separator) + len(unit) <= limit:
+                current += separator + unit
+            else:
+                pieces.append(current)
+                current = unit
+        if current:
+            pieces.append(current)
+        return pieces
+
+    def _split(self, text: str, kind: str, limit: int) -> List[str]:
+        """Break a block longer than `limit` at line, sentence or word boundaries"""
+        if len(text) <= limit:
+            return [text]
+        if kind == 'code':
+            return self._pack(text.split('\n'), '\n', limit)
+
+        pieces = []
+        for line in text.split('\n'):
+            if len(line) <= limit:
+                pieces.append(line)
+                continue
+            for sentence in SENTENCE_END_RE.split(line):
+                if len(sentence) <= limit:
+                    pieces.append(sentence)
+                else:
+                    pieces.extend(self._pack(WHITESPACE_RE.split(sentence), ' ', limit))
+        return self._pack(pieces, '\n', limit)
+
+    def _overlap(self, chunk: str) -> str:
+        """Tail of a chunk carried into the next one, starting at a word boundary"""
+        if not self.chunk_overlap:
+            return ''
+        tail = chunk[-self.chunk_overlap:]
+        if len(chunk) > self.chunk_overlap:
+            match = WHITESPACE_RE.search(tail)
+            tail = tail[match.end():] if match else ''
+        return tail
+
+    def segment(self, content: str) -> List[str]:
+        """
+        Split content into overlapping chunks
+
+        Args:
+            content (str): Text to segment
+
+        Returns:
+            List[str]: Chunks of at most `max_chunk_length` characters
+        """
+        limit = self.max_chunk_length - self.chunk_overlap - 1
+        chunks = []
+        current = ''
+        has_content = False
+
+        for text, kind in self._blocks(content):
+            for piece in self._split(text, kind, limit):
+                too_long = len(current) + 1 + len(piece) > self.max_chunk_length
+                # Start a new chunk at a heading once the current one is reasonably full
+                at_heading = kind == 'heading' and len(current) >= self.max_chunk_length // 2
+                if has_content and (too_long or at_heading):
+                    chunks.append(current)
+                    current = self._overlap(current)
+                    has_content = False
+                current = f"{current}\n{piece}" if current else piece
+                has_content = True
+
+        if has_content:
+            chunks.append(current)
+        return chunks
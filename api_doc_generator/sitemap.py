@@ -0,0 +1,224 @@
+import logging
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+import xml.etree.ElementTree as ElementTree
+import httpx
+
+# Product token matched against the User-agent groups of robots.txt; '*' groups apply otherwise
+ROBOTS_USER_AGENT = 'api-doc-generator'
+
+# Sitemap and sitemap index documents fetched at most, to bound nested indexes
+MAX_SITEMAPS = 100
+
+# Largest uncompressed sitemap read, the limit of the sitemaps.org protocol
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+logger = logging.getLogger(__name__)
+
+def parse_lastmod(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a sitemap <lastmod> in W3C datetime format
+
+    Args:
+        value (Optional[str]): e.g. '2024-05-01' or '2024-05-01T10:30:00Z'
+
+    Returns:
+        Optional[float]: POSIX timestamp (UTC when no offset is given), or None
+        if the value is missing or malformed
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.endswith(('Z', 'z')):
+        value = value[:-1] + '+00:00'
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def _local_name(tag: str) -> str:
+    """Element name without its XML namespace"""
+    return tag.rsplit('}', 1)[-1]
+
+def decompress_sitemap(data: bytes) -> bytes:
+    """
+    Return sitemap XML, decompressing .xml.gz files
+
+    Raises:
+        ValueError: If the sitemap is larger than MAX_SITEMAP_BYTES uncompressed
+    """
+    if not data.startswith(GZIP_MAGIC):
+        if len(data) > MAX_SITEMAP_BYTES:
+            raise ValueError(f"Sitemap is larger than {MAX_SITEMAP_BYTES} bytes")
+        return data
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    xml = decompressor.decompress(data, MAX_SITEMAP_BYTES)
+    if decompressor.unconsumed_tail:
+        raise ValueError(f"Sitemap is larger than {MAX_SITEMAP_BYTES} bytes uncompressed")
+    return xml
+
+def parse_sitemap(data: bytes) -> Tuple[List[Tuple[str, Optional[float]]], List[str]]:
+    """
+    Parse a sitemap or sitemap index, gzip-compressed or not
+
+    Args:
+        data (bytes): Body of the sitemap response
+
+    Returns:
+        Tuple[List[Tuple[str, Optional[float]]], List[str]]: (page URL, lastmod
+        timestamp) pairs of a <urlset>, and the sitemap URLs of a <sitemapindex>
+
+    Raises:
+        ValueError: If the document is not well-formed XML or too large
+    """
+    try:
+        root = ElementTree.fromstring(decompress_sitemap(data))
+    except ElementTree.ParseError as e:
+        raise ValueError(f"Invalid sitemap: {e}")
+
+    pages: List[Tuple[str, Optional[float]]] = []
+    sitemaps: List[str] = []
+    for entry in root:
+        fields = {_local_name(child.tag): (child.text or '').strip() for child in entry}
+        if not fields.get('loc'):
+            continue
+        if _local_name(entry.tag) == 'sitemap':
+            sitemaps.append(fields['loc'])
+        elif _local_name(entry.tag) == 'url':
+            pages.append((fields['loc'], parse_lastmod(fields.get('lastmod'))))
+    return pages, sitemaps
+
+def parse_robots(text: str) -> Tuple[RobotFileParser, List[str]]:
+    """
+    Parse robots.txt into its access rules and the sitemaps it lists
+
+    Args:
+        text (str): Body of robots.txt
+
+    Returns:
+        Tuple[RobotFileParser, List[str]]: Rules to check URLs against, and the
+        URLs of its Sitemap: lines
+    """
+    lines = text.splitlines()
+    rules = RobotFileParser()
+    rules.parse(lines)
+    sitemaps = []
+    for line in lines:
+        key, _, value = line.partition(':')
+        if key.strip().lower() == 'sitemap' and value.strip():
+            sitemaps.append(value.strip())
+    return rules, sitemaps
+
+class SiteMap:
+    """
+    robots.txt rules and sitemap URLs of a documentation site, read before crawling.
+
+    `load` fetches /robots.txt and every sitemap it lists (or /sitemap.xml if
+    it lists none), following sitemap indexes up to MAX_SITEMAPS documents.
+    Pages outside the path of the base URL are ignored, so the sitemap of a
+    whole site only seeds its documentation. `seeds` returns the pages most
+    recently modified first, and `allowed` checks any URL against robots.txt.
+    A missing or unreachable robots.txt or sitemap leaves the crawl to link
+    discovery alone.
+    """
+
+    def __init__(self, base_url: str, user_agent: str = ROBOTS_USER_AGENT):
+        """
+        Initialize an empty site map
+
+        Args:
+            base_url (str): Root URL of the documentation; its path limits the seeds
+            user_agent (str): Product token whose robots.txt rules apply
+        """
+        parts = urlsplit(base_url)
+        self.root = f"{parts.scheme}://{parts.netloc}"
+        self.prefix = parts.path.rstrip('/')
+        self.user_agent = user_agent
+        self.rules: Optional[RobotFileParser] = None
+        self.pages: Dict[str, Optional[float]] = {}
+        self.sitemaps_read = 0
+
+    def _get(self, client: httpx.Client, url: str) -> Optional[httpx.Response]:
+        """GET a URL of the site, None on network errors and error responses"""
+        try:
+            response = client.get(url, follow_redirects=True)
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not fetch {url}: {str(e)}")
+            return None
+        if response.is_error:
+            logger.info(f"No {url} (HTTP {response.status_code})")
+            return None
+        return response
+
+    def _in_scope(self, url: str) -> bool:
+        """True if a sitemap URL is on the documentation site, under the base URL's path"""
+        parts = urlsplit(url)
+        if f"{parts.scheme}://{parts.netloc}" != self.root:
+            return False
+        return not self.prefix or parts.path == self.prefix or parts.path.startswith(self.prefix + '/')
+
+    def load(self, client: httpx.Client) -> 'SiteMap':
+        """
+        Fetch robots.txt and the sitemaps of the site
+
+        Args:
+            client (httpx.Client): Client used for the requests
+
+        Returns:
+            SiteMap: self, for chaining
+        """
+        sitemaps = [urljoin(self.root, '/sitemap.xml')]
+        response = self._get(client, urljoin(self.root, '/robots.txt'))
+        if response is not None:
+            self.rules, listed = parse_robots(response.text)
+            sitemaps = listed or sitemaps
+
+        queue = list(dict.fromkeys(sitemaps))
+        fetched = set(queue)
+        while queue and self.sitemaps_read < MAX_SITEMAPS:
+            url = queue.pop(0)
+            response = self._get(client, url)
+            if response is None:
+                continue
+            try:
+                pages, children = parse_sitemap(response.content)
+            except ValueError as e:
+                logger.warning(f"Skipping sitemap {url}: {str(e)}")
+                continue
+            self.sitemaps_read += 1
+            for page, lastmod in pages:
+                if self._in_scope(page):
+                    self.pages.setdefault(page, lastmod)
+            for child in children:
+                if child not in fetched:
+                    fetched.add(child)
+                    queue.append(child)
+        if queue:
+            logger.warning(f"Stopped after {MAX_SITEMAPS} sitemaps, {len(queue)} more were not read")
+        return self
+
+    def allowed(self, url: str) -> bool:
+        """True if robots.txt lets the crawler fetch `url` (always, without a robots.txt)"""
+        return self.rules is None or self.rules.can_fetch(self.user_agent, url)
+
+    def seeds(self) -> List[str]:
+        """
+        Sitemap pages that robots.txt allows, to queue before crawling
+
+        Returns:
+            List[str]: Pages with a lastmod, most recently modified first, then
+            the others in sitemap order
+        """
+        ordered = sorted(
+            enumerate(self.pages.items()),
+            key=lambda item: (item[1][1] is None, -(item[1][1] or 0), item[0])
+        )
+        return [url for _, (url, _) in ordered if self.allowed(url)]
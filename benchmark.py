@@ -0,0 +1,391 @@
+"""
+Offline benchmark of the crawl and documentation pipeline
+
+Starts local stand-ins for the Jina AI Reader, Segmenter and Embeddings APIs
+and the Gemini API in a separate process, serving a synthetic documentation
+site of N pages with configurable latency and error rates. Then runs
+APIScraper.crawl and DocumentationGenerator.generate end to end against them
+and reports throughput, per-stage latency, peak memory and output size.
+
+    python benchmark.py --pages 500 --concurrency 16 --latency 50
+"""
+import argparse
+import asyncio
+import functools
+import gzip
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import urlparse
+
+SITE_URL = 'https://docs.benchmark.local'
+
+# Page URLs per sitemap file of the synthetic site's sitemap index
+SITEMAP_PAGES = 1000
+
+WORDS = ('request response token client server endpoint header payload version resource '
+         'authentication authorization webhook pagination cursor limit error retry timeout '
+         'user account project key secret scope session callback event object field value').split()
+
+def page_url(i: int) -> str:
+    return f"{SITE_URL}/" if i == 0 else f"{SITE_URL}/docs/section-{i % 10}/page-{i}"
+
+def page_index(url: str) -> int:
+    path = urlparse(url).path.rstrip('/')
+    return int(path.rsplit('-', 1)[1]) if path.startswith('/docs/') else 0
+
+def synthetic_page(i: int, pages: int, links_per_page: int) -> dict:
+    """Reader API response for page i of the synthetic site"""
+    rng = random.Random(i)
+    # Links 2i+1 and 2i+2 make every page reachable; the rest are random
+    targets = [j for j in (2 * i + 1, 2 * i + 2) if j < pages]
+    targets += [rng.randrange(pages) for _ in range(max(0, links_per_page - len(targets)))]
+    paragraphs = [
+        ' '.join(rng.choice(WORDS) for _ in range(rng.randint(40, 120))).capitalize() + '.'
+        for _ in range(rng.randint(4, 12))
+    ]
+    code = '\n'.join(f"client.{rng.choice(WORDS)}(id={j})" for j in range(rng.randint(3, 15)))
+    content = '\n\n'.join(
+        ['Home Guides API Reference Changelog', f"# Page {i}"] + paragraphs[:2] +
+        [f"```python\n{code}\n```"] + paragraphs[2:] + ['Edit this page', '© Benchmark Docs']
+    )
+    return {'data': {
+        'title': f"Page {i}",
+        'description': f"Synthetic page {i}",
+        'content': content,
+        'links': {f"Page {j}": page_url(j) for j in targets}
+    }}
+
+def synthetic_sitemap(path: str, pages: int) -> bytes:
+    """robots.txt, the sitemap index or one gzip-compressed sitemap of the synthetic site"""
+    if path == '/robots.txt':
+        return f"User-agent: *\nDisallow: /private/\nSitemap: {SITE_URL}/sitemap_index.xml\n".encode('utf-8')
+    namespace = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+    if path == '/sitemap_index.xml':
+        entries = ''.join(
+            f"<sitemap><loc>{SITE_URL}/sitemap-{k}.xml.gz</loc></sitemap>"
+            for k in range((pages + SITEMAP_PAGES - 1) // SITEMAP_PAGES)
+        )
+        return f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex {namespace}>{entries}</sitemapindex>'.encode('utf-8')
+    k = int(path[len('/sitemap-'):-len('.xml.gz')])
+    entries = ''.join(
+        f"<url><loc>{page_url(i)}</loc><lastmod>2024-{1 + i % 12:02d}-{1 + i % 28:02d}</lastmod></url>"
+        for i in range(k * SITEMAP_PAGES, min(pages, (k + 1) * SITEMAP_PAGES))
+    )
+    return gzip.compress(f'<?xml version="1.0" encoding="UTF-8"?><urlset {namespace}>{entries}</urlset>'.encode('utf-8'))
+
+def fake_embedding(text: str, dim: int) -> List[float]:
+    """Deterministic pseudo-random vector for a text"""
+    rng = random.Random(hashlib.sha1(text.encode('utf-8')).digest())
+    return [round(rng.gauss(0, 1), 5) for _ in range(dim)]
+
+def split_chunks(content: str, max_length: int) -> List[str]:
+    """Segmenter stand-in: pack paragraphs into chunks of at most max_length characters"""
+    chunks = []
+    current = ''
+    for paragraph in content.split('\n\n'):
+        while len(paragraph) > max_length:
+            chunks.append(paragraph[:max_length])
+            paragraph = paragraph[max_length:]
+        if current and len(current) + 2 + len(paragraph) > max_length:
+            chunks.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Serves /reader, /segmenter, /embeddings, Gemini's /v1beta/models/... and the site's sitemap routes"""
+    config: dict = {}
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status: int, body, headers: Dict[str, str] = None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/robots.txt' or self.path.startswith('/sitemap'):
+            data = synthetic_sitemap(self.path, self.config['pages'])
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        else:
+            self._send_json(404, {'error': f"unknown route {self.path}"})
+
+    def do_POST(self):
+        config = self.config
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])) or b'{}')
+        is_gemini = self.path.startswith('/v1beta/')
+        latency = config['gemini_latency'] if is_gemini else config['latency']
+        time.sleep(max(0.0, random.gauss(latency, latency * config['jitter'])))
+
+        if random.random() < config['error_rate']:
+            if config['error_status'] == 429:
+                self._send_json(429, {'error': 'rate limited'}, {'Retry-After': '1'})
+            else:
+                self._send_json(config['error_status'], {'error': 'injected failure'})
+            return
+
+        if self.path.startswith('/reader'):
+            self._send_json(200, synthetic_page(page_index(payload['url']), config['pages'],
+                                                config['links_per_page']))
+        elif self.path.startswith('/segmenter'):
+            self._send_json(200, {'chunks': split_chunks(payload['content'], payload.get('max_chunk_length', 1000))})
+        elif self.path.startswith('/embeddings'):
+            self._send_json(200, {'data': [
+                {'index': i, 'embedding': fake_embedding(text, config['dim'])}
+                for i, text in enumerate(payload['input'])
+            ]})
+        elif is_gemini:
+            text = ("The documentation covers authentication and the main endpoints. "
+                    * (config['review_chars'] // 64 + 1))[:config['review_chars']]
+            response = {'candidates': [{'content': {'parts': [{'text': text}], 'role': 'model'},
+                                        'finishReason': 'STOP', 'index': 0}]}
+            self._send_json(200, [response] if 'streamGenerateContent' in self.path else response)
+        else:
+            self._send_json(404, {'error': f"unknown route {self.path}"})
+
+def serve(config: dict, ready):
+    """Run the mock server until the parent process terminates it"""
+    random.seed(config['seed'])
+    MockHandler.config = config
+    # A large listen backlog keeps bursts of concurrent requests from being dropped
+    ThreadingHTTPServer.request_queue_size = 1024
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockHandler)
+    server.daemon_threads = True
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+class StageTimer:
+    """Collects wall-clock durations of instrumented methods per stage"""
+
+    def __init__(self):
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+
+    def wrap(self, obj, method: str, stage: str):
+        """Replace obj.method with a timed wrapper (works for sync and async methods)"""
+        original = getattr(obj, method)
+        if asyncio.iscoroutinefunction(original):
+            @functools.wraps(original)
+            async def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await original(*args, **kwargs)
+                finally:
+                    self.durations[stage].append(time.perf_counter() - start)
+        else:
+            @functools.wraps(original)
+            def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    self.durations[stage].append(time.perf_counter() - start)
+        setattr(obj, method, timed)
+
+    def summary(self) -> Dict[str, dict]:
+        import numpy as np
+        return {
+            stage: {
+                'calls': len(values),
+                'p50_ms': float(np.percentile(values, 50) * 1000),
+                'p95_ms': float(np.percentile(values, 95) * 1000),
+                'total_s': float(sum(values))
+            }
+            for stage, values in self.durations.items() if values
+        }
+
+def directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+def peak_rss_mb() -> Dict[str, float]:
+    """Peak resident set size of this process and of its finished children (MB)"""
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return {
+        'self': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        'children': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    }
+
+def set_placeholder_keys():
+    """Set dummy API keys, which the stand-ins ignore, so the package can be imported"""
+    os.environ.setdefault('JINA_API_KEY', 'benchmark')
+    os.environ.setdefault('GOOGLE_API_KEY', 'benchmark')
+
+def run_benchmark(args) -> dict:
+    set_placeholder_keys()
+    from api_doc_generator import scraper as scraper_module
+    from api_doc_generator import APIScraper, DocumentationGenerator
+    import httpx
+
+    context = multiprocessing.get_context('spawn')
+    ready = context.Queue()
+    config = {
+        'pages': args.pages, 'links_per_page': args.links_per_page, 'dim': args.dim,
+        'latency': args.latency / 1000, 'gemini_latency': args.gemini_latency / 1000,
+        'jitter': args.jitter, 'error_rate': args.error_rate, 'error_status': args.error_status,
+        'review_chars': args.review_chars, 'seed': args.seed
+    }
+    server = context.Process(target=serve, args=(config, ready), daemon=True)
+    server.start()
+    base = f"http://127.0.0.1:{ready.get(timeout=30)}"
+    scraper_module.JINA_ENDPOINTS.update(
+        reader=f"{base}/reader", segmenter=f"{base}/segmenter", embeddings=f"{base}/embeddings"
+    )
+
+    output_dir = args.output or tempfile.mkdtemp(prefix='api_doc_benchmark_')
+    timer = StageTimer()
+    try:
+        rate = args.rate_limit
+        scraper = APIScraper(
+            SITE_URL,
+            rate_limits={'reader': rate, 'segmenter': rate, 'embeddings': rate},
+            workers=args.workers,
+            segmenter=args.segmenter,
+            store_dir=None if args.in_memory else os.path.join(output_dir, 'pages'),
+            use_sitemap=args.sitemap
+        )
+        # Requests to the synthetic site itself (robots.txt, sitemaps) go to the stand-in
+        mock = httpx.URL(base)
+        def to_mock(request):
+            if request.url.host == httpx.URL(SITE_URL).host:
+                request.url = request.url.copy_with(scheme=mock.scheme, host=mock.host, port=mock.port)
+        scraper.client = httpx.Client(timeout=30.0, event_hooks={'request': [to_mock]})
+        for method, stage in (('_call_reader_api', 'reader'), ('_call_reader_api_async', 'reader'),
+                              ('_segment_page', 'segmenter'), ('_segment_page_async', 'segmenter'),
+                              ('_get_embeddings', 'embeddings'), ('_get_embeddings_async', 'embeddings')):
+            timer.wrap(scraper, method, stage)
+
+        start = time.perf_counter()
+        api_docs = scraper.crawl(concurrency=args.concurrency, max_pages=args.pages)
+        crawl_seconds = time.perf_counter() - start
+
+        generator = DocumentationGenerator(
+            api_docs, output_dir,
+            review_mode=args.review_mode,
+            html_layout=args.html_layout,
+            gemini_endpoint=base
+        )
+        timer.wrap(generator, '_send_prompt', 'gemini')
+        start = time.perf_counter()
+        generator.generate()
+        generate_seconds = time.perf_counter() - start
+
+        files = {
+            os.path.relpath(os.path.join(root, name), output_dir): os.path.getsize(os.path.join(root, name))
+            for root, _, names in os.walk(output_dir) for name in names
+        }
+        return {
+            'config': vars(args),
+            'pages': len(api_docs),
+            'crawl_seconds': crawl_seconds,
+            'pages_per_second': len(api_docs) / crawl_seconds if crawl_seconds else 0.0,
+            'generate_seconds': generate_seconds,
+            'stages': timer.summary(),
+            'peak_rss_mb': peak_rss_mb(),
+            'output_bytes': directory_size(output_dir),
+            'largest_files': dict(sorted(files.items(), key=lambda item: -item[1])[:5])
+        }
+    finally:
+        server.terminate()
+        if not args.output and not args.keep_output:
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+def print_report(report: dict):
+    mb = 1024 * 1024
+    print("\nBenchmark results")
+    print("-" * 60)
+    print(f"Pages crawled:     {report['pages']}")
+    print(f"Crawl time:        {report['crawl_seconds']:.2f} s ({report['pages_per_second']:.1f} pages/s)")
+    print(f"Generate time:     {report['generate_seconds']:.2f} s")
+    print(f"\n{'Stage':<12}{'calls':>8}{'p50 ms':>10}{'p95 ms':>10}{'total s':>10}")
+    for stage, stats in report['stages'].items():
+        print(f"{stage:<12}{stats['calls']:>8}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['total_s']:>10.2f}")
+    rss = report['peak_rss_mb']
+    print(f"\nPeak RSS:          {rss['self']:.1f} MB (worker processes: {rss['children']:.1f} MB)")
+    print(f"Output size:       {report['output_bytes'] / mb:.2f} MB")
+    for name, size in report['largest_files'].items():
+        print(f"  {name}: {size / mb:.2f} MB")
+
+def main():
+    set_placeholder_keys()
+    from api_doc_generator.generator import REVIEW_MODES
+    from api_doc_generator.html_shards import HTML_LAYOUTS
+    from api_doc_generator.segmenter import SEGMENTER_BACKENDS
+
+    parser = argparse.ArgumentParser(description='Benchmark crawling and generation against local API stand-ins')
+    parser.add_argument('--pages', '-n', type=int, default=200,
+                      help='Pages of the synthetic documentation site (default: 200)')
+    parser.add_argument('--links-per-page', type=int, default=6,
+                      help='Links on each synthetic page (default: 6)')
+    parser.add_argument('--concurrency', '-c', type=int, default=8,
+                      help='Pages fetched in parallel; 1 uses the sequential crawler (default: 8)')
+    parser.add_argument('--workers', '-w', type=int, default=0,
+                      help='Worker processes for page extraction (default: 0)')
+    parser.add_argument('--segmenter', choices=SEGMENTER_BACKENDS, default='jina',
+                      help='Chunking backend (default: jina, i.e. the stand-in Segmenter API)')
+    parser.add_argument('--latency', type=float, default=50,
+                      help='Mean latency of the Jina stand-ins in ms (default: 50)')
+    parser.add_argument('--gemini-latency', type=float, default=500,
+                      help='Mean latency of the Gemini stand-in in ms (default: 500)')
+    parser.add_argument('--jitter', type=float, default=0.2,
+                      help='Standard deviation of the latency as a fraction of the mean (default: 0.2)')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                      help='Fraction of requests that fail (default: 0)')
+    parser.add_argument('--error-status', type=int, default=503,
+                      help='HTTP status of failed requests, e.g. 429 or 503 (default: 503)')
+    parser.add_argument('--rate-limit', type=float, default=10000,
+                      help='Client-side requests per second per service (default: 10000, effectively off)')
+    parser.add_argument('--in-memory', action='store_true',
+                      help='Keep scraped pages in memory instead of the on-disk page store')
+    parser.add_argument('--sitemap', action='store_true',
+                      help='Seed the crawl from the synthetic site\'s robots.txt and sitemap index '
+                           'instead of discovering pages by following links only')
+    parser.add_argument('--dim', type=int, default=1024,
+                      help='Embedding dimension returned by the stand-in (default: 1024)')
+    parser.add_argument('--review-mode', choices=REVIEW_MODES, default='auto',
+                      help='AI review strategy (default: auto)')
+    parser.add_argument('--review-chars', type=int, default=4000,
+                      help='Length of each stand-in Gemini response (default: 4000)')
+    parser.add_argument('--html-layout', choices=HTML_LAYOUTS, default='single',
+                      help='HTML output layout (default: single)')
+    parser.add_argument('--seed', type=int, default=0,
+                      help='Seed for latency jitter and injected errors (default: 0)')
+    parser.add_argument('--output', '-o', default=None,
+                      help='Output directory to keep (default: a temporary directory)')
+    parser.add_argument('--keep-output', action='store_true',
+                      help='Do not delete the temporary output directory')
+    parser.add_argument('--json', default=None,
+                      help='Also write the results as JSON to this file')
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
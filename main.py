@@ -1,42 +1,327 @@
 import argparse
 import os
+import sys
+import time
 from api_doc_generator import APIScraper, DocumentationGenerator
+from api_doc_generator.corpus import CorpusReader
+from api_doc_generator.embeddings import EMBEDDING_DTYPES
+from api_doc_generator.generator import ModelConfig, REVIEW_MODES
+from api_doc_generator.html_shards import HTML_LAYOUTS
+from api_doc_generator.index import VectorIndex, DEFAULT_NPROBE
+from api_doc_generator.metrics import Metrics
+from api_doc_generator.segmenter import SEGMENTER_BACKENDS
 import logging
 
-def main():
-    # Set up argument parser
-    parser = argparse.ArgumentParser(description='Generate API documentation from a documentation website')
+# File name of the crawl corpus in the output directory; its embeddings go next to it
+CORPUS_FILENAME = 'corpus.jsonl'
+
+
+def search(argv):
+    """Semantic search over the index of a previous run: main.py search "query" """
+    parser = argparse.ArgumentParser(prog='main.py search',
+                                     description='Search the scraped documentation by meaning')
+    parser.add_argument('query', help='What to look for')
+    parser.add_argument('--index', default=os.path.join('output', 'index'),
+                      help='Index directory written by a previous run (default: output/index)')
+    parser.add_argument('--top-k', '-k', type=int, default=10,
+                      help='Number of chunks to return (default: 10)')
+    parser.add_argument('--nprobe', type=int, default=DEFAULT_NPROBE,
+                      help=f'Clusters searched in a partitioned index (default: {DEFAULT_NPROBE})')
+    parser.add_argument('--exact', action='store_true',
+                      help='Score every chunk even if the index is partitioned')
+    parser.add_argument('--cache-dir', default='.api_doc_cache',
+                      help='Directory for the persistent Jina API response cache (default: .api_doc_cache)')
+    parser.add_argument('--no-cache', action='store_true',
+                      help='Disable the persistent API response cache')
+    args = parser.parse_args(argv)
+    
+    index = VectorIndex(args.index)
+    if not index.exists():
+        print(f"No search index found in {args.index}. Generate documentation first.")
+        return
+    index.open()
+    
+    # Embed the query with the same model the chunks were embedded with
+    scraper = APIScraper(index.base_url, cache_dir=None if args.no_cache else args.cache_dir)
+    query_vector = scraper.embed_query(args.query)
+    
+    start = time.perf_counter()
+    results = index.search(query_vector, k=args.top_k, nprobe=args.nprobe, exact=args.exact)
+    elapsed = (time.perf_counter() - start) * 1000
+    
+    for rank, result in enumerate(results, 1):
+        snippet = ' '.join(result['text'].split())
+        print(f"\n{rank}. {result['title']} ({result['score']:.3f})")
+        print(f"   {result['url']}")
+        print(f"   {snippet[:300]}{'...' if len(snippet) > 300 else ''}")
+    print(f"\n{len(results)} results from {index.meta['count']} chunks in {elapsed:.1f} ms")
+    index.close()
+
+
+def add_scrape_arguments(parser):
+    """Crawl options shared by the default command and `scrape`"""
     parser.add_argument('url', help='URL of the API documentation website')
+    parser.add_argument('--concurrency', '-c', type=int, default=1,
+                      help='Number of pages to fetch in parallel; 1 uses the sequential crawler (default: 1)')
+    parser.add_argument('--workers', '-w', type=int, default=0,
+                      help='Worker processes for page cleaning and code extraction when crawling '
+                           'concurrently (default: 0, run them in the crawler process)')
+    parser.add_argument('--segmenter', choices=SEGMENTER_BACKENDS, default='jina',
+                      help="Chunking backend: 'jina' calls segment.jina.ai, 'local' chunks offline (default: jina)")
+    parser.add_argument('--boilerplate-threshold', type=float, default=0.5,
+                      help='Strip runs of lines that appear on at least this fraction of pages, such as '
+                           'navigation and footers (default: 0.5)')
+    parser.add_argument('--keep-boilerplate', action='store_true',
+                      help='Keep lines repeated across pages in the page content')
+    parser.add_argument('--max-pages', type=int, default=None,
+                      help='Stop crawling after this many pages (default: no limit)')
+    parser.add_argument('--max-depth', type=int, default=None,
+                      help='Do not follow links more than this many hops from the start URL (default: no limit)')
+    parser.add_argument('--no-sitemap', action='store_true',
+                      help='Find pages by following links only, without reading robots.txt and the sitemaps')
+    parser.add_argument('--manifest-dir', default=None,
+                      help='Directory of the crawl manifest; pages unchanged since the last crawl '
+                           'skip segmentation and embedding (default: disabled)')
+    parser.add_argument('--reader-cache-ttl', type=float, default=1,
+                      help='Hours before a cached Reader response, i.e. a fetched page, expires; '
+                           'kept short so a re-run sees changed pages (default: 1)')
+    parser.add_argument('--resume', action='store_true',
+                      help='Resume an interrupted crawl from the checkpoint journal in the output directory')
+    parser.add_argument('--checkpoint-interval', type=int, default=50,
+                      help='Pages between frontier checkpoints in the crawl journal (default: 50)')
+    parser.add_argument('--embedding-dtype', choices=EMBEDDING_DTYPES, default='float32',
+                      help='Storage type of the chunk embedding matrix (default: float32)')
+    parser.add_argument('--in-memory', action='store_true',
+                      help='Keep scraped pages in memory instead of the page store in <output>/pages')
+
+
+def add_build_arguments(parser):
+    """Documentation options shared by the default command and `build`"""
+    parser.add_argument('--duplicate-threshold', type=float, default=None,
+                      help='Document pages whose embeddings are at least this similar to an earlier page '
+                           '(e.g. other versions of a page) once, with cross-references; 0.97 is a good '
+                           'start (default: every page is documented)')
+    parser.add_argument('--model', choices=list(ModelConfig.MODELS), default='gemini-1.5-pro',
+                      help='Gemini model of the AI review (default: gemini-1.5-pro)')
+    parser.add_argument('--review-mode', choices=REVIEW_MODES, default='auto',
+                      help="AI review strategy: 'single' sends the whole document in one prompt, 'select' sends "
+                           "the most representative chunks that fit the model's prompt token budget, 'map-reduce' "
+                           "reviews it in parts concurrently and merges the results, 'auto' selects chunks only "
+                           "when the document exceeds the budget (default: auto)")
+    parser.add_argument('--review-workers', type=int, default=4,
+                      help='Parts of a map-reduce review sent to Gemini at the same time (default: 4)')
+    parser.add_argument('--refresh-review', action='store_true',
+                      help='Request a new AI review even if a cached one matches the documentation')
+    parser.add_argument('--index-clusters', type=int, default=None,
+                      help='k-means clusters of the search index; 0 always searches exhaustively '
+                           '(default: about sqrt(chunks) for 50k chunks and more, otherwise 0)')
+    parser.add_argument('--html-layout', choices=HTML_LAYOUTS, default='single',
+                      help="'single' writes one HTML page; 'page' one HTML file per page and 'prefix' one per URL "
+                           "directory, with an index page, in <output>/html (default: single)")
+    parser.add_argument('--html-workers', type=int, default=None,
+                      help='Processes rendering HTML files in parallel (default: one per CPU)')
+
+
+def add_common_arguments(parser):
+    """Output, cache and profiling options of every command"""
     parser.add_argument('--output', '-o', default='output',
                       help='Output directory for generated documentation (default: output)')
+    parser.add_argument('--cache-dir', default='.api_doc_cache',
+                      help='Directory for the persistent Jina API response cache (default: .api_doc_cache)')
+    parser.add_argument('--cache-ttl', type=float, default=168,
+                      help='Hours before a cached Segmenter, Embeddings or Gemini review response '
+                           'expires (default: 168); Reader responses use --reader-cache-ttl')
+    parser.add_argument('--no-cache', action='store_true',
+                      help='Disable the persistent API response cache')
+    parser.add_argument('--profile', action='store_true',
+                      help='Print per-stage latencies, traffic, retries, cache hits and tokens at the end')
+    parser.add_argument('--metrics-out', default=None,
+                      help='Write the same metrics to this file: Prometheus text format for .prom/.txt, '
+                           'JSON otherwise (default: disabled)')
+
+
+def run_scrape(args, metrics):
+    """
+    Crawl args.url, streaming completed pages to the corpus in the output directory
     
-    args = parser.parse_args()
+    Returns:
+        Tuple[APIScraper, Mapping[str, dict]]: The scraper and the scraped pages
+    """
+    os.makedirs(args.output, exist_ok=True)
+    
+    print(f"Starting to scrape API documentation from {args.url}")
+    scraper = APIScraper(
+        args.url,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        cache_ttl=args.cache_ttl * 3600,
+        reader_cache_ttl=args.reader_cache_ttl * 3600,
+        embedding_dtype=args.embedding_dtype,
+        manifest_dir=args.manifest_dir,
+        checkpoint_path=os.path.join(args.output, 'crawl_journal.jsonl'),
+        checkpoint_interval=args.checkpoint_interval,
+        workers=args.workers,
+        segmenter=args.segmenter,
+        boilerplate_threshold=None if args.keep_boilerplate else args.boilerplate_threshold,
+        metrics=metrics,
+        store_dir=None if args.in_memory else os.path.join(args.output, 'pages'),
+        corpus_path=os.path.join(args.output, CORPUS_FILENAME),
+        use_sitemap=not args.no_sitemap
+    )
+    with metrics.time('crawl'):
+        api_docs = scraper.crawl(
+            concurrency=args.concurrency,
+            max_pages=args.max_pages,
+            max_depth=args.max_depth,
+            resume=args.resume
+        )
+    
+    if scraper.manifest is not None:
+        changes = scraper.changes
+        print(f"Changes since last crawl: {len(changes['added'])} added, {len(changes['changed'])} changed, "
+              f"{len(changes['unchanged'])} unchanged, {len(changes['removed'])} removed")
+    return scraper, api_docs
+
+
+def run_build(args, api_docs, base_url, metrics):
+    """Generate the documentation and search index of scraped pages into args.output"""
+    os.makedirs(args.output, exist_ok=True)
+    
+    print("\nGenerating documentation...")
+    generator = DocumentationGenerator(
+        api_docs,
+        args.output,
+        model_name=args.model,
+        duplicate_threshold=args.duplicate_threshold,
+        review_mode=args.review_mode,
+        review_workers=args.review_workers,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        cache_ttl=args.cache_ttl * 3600,
+        refresh_review=args.refresh_review,
+        html_layout=args.html_layout,
+        html_workers=args.html_workers,
+        metrics=metrics
+    )
+    with metrics.time('generate'):
+        generator.generate()
+    with metrics.time('index'):
+        indexed = VectorIndex(os.path.join(args.output, 'index')).build(api_docs, base_url, args.index_clusters)
+    
+    print(f"\nDocumentation generated successfully!")
+    print(f"Markdown file: {os.path.join(args.output, 'api_documentation.md')}")
+    if args.html_layout == 'single':
+        print(f"HTML file: {os.path.join(args.output, 'api_documentation.html')}")
+    else:
+        print(f"HTML files: {os.path.join(args.output, 'html', 'index.html')}")
+    print(f"Search index: {os.path.join(args.output, 'index')} ({indexed} chunks), "
+          f"query it with: python main.py search \"your question\" --index {os.path.join(args.output, 'index')}")
+
+
+def report_metrics(args, metrics):
+    """Print and write the metrics of a run as requested by --profile and --metrics-out"""
+    if args.profile:
+        print(f"\nProfile:\n{metrics.report()}")
+    if args.metrics_out:
+        metrics.write(args.metrics_out)
+        print(f"Metrics: {args.metrics_out}")
+
+
+def scrape(argv):
+    """Crawl only and stream the pages to a corpus: main.py scrape URL"""
+    parser = argparse.ArgumentParser(prog='main.py scrape',
+                                     description='Crawl a documentation website into a corpus for main.py build')
+    add_scrape_arguments(parser)
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+    metrics = Metrics()
+    
+    try:
+        scraper, api_docs = run_scrape(args, metrics)
+        if not api_docs:
+            print("No API documentation content was found. Please check the URL and try again.")
+            return
+        print(f"\nCorpus: {scraper.corpus.path} ({len(api_docs)} pages), "
+              f"build documentation from it with: python main.py build --corpus {scraper.corpus.path}")
+        
+    except Exception as e:
+        logging.error(f"An error occurred: {str(e)}")
+        raise
+        
+    finally:
+        report_metrics(args, metrics)
+
+
+def build(argv):
+    """Generate documentation from the corpus of a previous crawl: main.py build"""
+    parser = argparse.ArgumentParser(prog='main.py build',
+                                     description='Generate documentation from a corpus written by main.py scrape')
+    parser.add_argument('--corpus', default=None,
+                      help=f'Corpus written by a previous crawl (default: <output>/{CORPUS_FILENAME})')
+    add_build_arguments(parser)
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+    metrics = Metrics()
+    corpus_path = args.corpus or os.path.join(args.output, CORPUS_FILENAME)
     
+    if not os.path.exists(corpus_path):
+        print(f"No corpus found at {corpus_path}. Run python main.py scrape first.")
+        return
+    
+    api_docs = None
     try:
-        # Create output directory
-        os.makedirs(args.output, exist_ok=True)
+        # Pages are read from the corpus one at a time as the generator reaches them
+        with metrics.time('load'):
+            api_docs = CorpusReader(corpus_path)
+        print(f"Loaded {len(api_docs)} pages of {api_docs.base_url} from {corpus_path}")
+        if not api_docs:
+            print("The corpus has no pages. Please check the crawl and try again.")
+            return
+        run_build(args, api_docs, api_docs.base_url, metrics)
+        
+    except Exception as e:
+        logging.error(f"An error occurred: {str(e)}")
+        raise
+        
+    finally:
+        if api_docs is not None:
+            api_docs.close()
+        report_metrics(args, metrics)
+
+
+def main():
+    commands = {'search': search, 'scrape': scrape, 'build': build}
+    if len(sys.argv) > 1 and sys.argv[1] in commands:
+        return commands[sys.argv[1]](sys.argv[2:])
         
-        # Initialize and run the scraper
-        print(f"Starting to scrape API documentation from {args.url}")
-        scraper = APIScraper(args.url)
-        api_docs = scraper.crawl()
+    # Set up argument parser
+    parser = argparse.ArgumentParser(description='Generate API documentation from a documentation website')
+    add_scrape_arguments(parser)
+    add_build_arguments(parser)
+    add_common_arguments(parser)
+    
+    args = parser.parse_args()
+    metrics = Metrics()
+    
+    try:
+        # Crawl, then build from the pages still held by the scraper
+        scraper, api_docs = run_scrape(args, metrics)
         
         if not api_docs:
             print("No API documentation content was found. Please check the URL and try again.")
             return
         
-        # Generate documentation
-        print("\nGenerating documentation...")
-        generator = DocumentationGenerator(api_docs, args.output)
-        generator.generate()
-        
-        print(f"\nDocumentation generated successfully!")
-        print(f"Markdown file: {os.path.join(args.output, 'api_documentation.md')}")
-        print(f"HTML file: {os.path.join(args.output, 'api_documentation.html')}")
+        run_build(args, api_docs, args.url, metrics)
+        scraper.save_embeddings(os.path.join(args.output, 'embeddings.npy'))
+        print(f"Embeddings: {os.path.join(args.output, 'embeddings.npy')}")
+        print(f"Corpus: {scraper.corpus.path}, rebuild from it with: python main.py build -o {args.output}")
         
     except Exception as e:
         logging.error(f"An error occurred: {str(e)}")
         raise
+        
+    finally:
+        # Also report interrupted runs, which are often the slow ones
+        report_metrics(args, metrics)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+from functools import partial
+import httpx
+import pytest
+
+# The scraper refuses to import without an API key; the tests never reach the real APIs
+os.environ.setdefault('JINA_API_KEY', 'test')
+os.environ.setdefault('GOOGLE_API_KEY', 'test')
+
+SITE_URL = 'https://docs.example.com'
+
+# No client-side throttling against the fake services
+NO_RATE_LIMITS = {'reader': 1e6, 'segmenter': 1e6, 'embeddings': 1e6}
+
+EMBEDDING_DIM = 8
+
+def fake_vector(text: str):
+    """Deterministic embedding of a text"""
+    digest = hashlib.sha256(text.encode('utf-8')).digest()
+    return [byte / 255 for byte in digest[:EMBEDDING_DIM]]
+
+def json_body(request: httpx.Request) -> dict:
+    return json.loads(request.content)
+
+class FakeSite:
+    """
+    Stand-in for a documentation site and the Jina AI APIs behind one httpx.MockTransport.
+
+    `pages` maps a path to (content, linked paths); `validators` optionally
+    maps a path to its response headers (ETag, Last-Modified), and `files`
+    serves other site files such as robots.txt as they are. Every request
+    is counted, and `crash_after` raises KeyboardInterrupt from the Reader API
+    once that many pages were read, like a crawl killed mid-run.
+    """
+
+    def __init__(self):
+        self.pages = {}
+        self.validators = {}
+        self.files = {}
+        self.reader_calls = []
+        self.embedded_texts = []
+        self.embedding_requests = 0
+        self.crash_after = None
+
+    def add_page(self, path: str, content: str, links=()):
+        self.pages[path] = (content, list(links))
+
+    def _reader(self, url: str) -> httpx.Response:
+        if self.crash_after is not None and len(self.reader_calls) >= self.crash_after:
+            raise KeyboardInterrupt
+        self.reader_calls.append(url)
+        path = httpx.URL(url).path
+        content, links = self.pages[path]
+        return httpx.Response(200, json={'data': {
+            'title': path, 'description': '', 'content': content,
+            'links': {link: SITE_URL + link for link in links}
+        }})
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        if host == 'r.jina.ai':
+            return self._reader(json_body(request)['url'])
+        if host == 'api.jina.ai':
+            texts = json_body(request)['input']
+            self.embedding_requests += 1
+            self.embedded_texts.extend(texts)
+            return httpx.Response(200, json={'data': [
+                {'index': i, 'embedding': fake_vector(text)} for i, text in enumerate(texts)
+            ]})
+        if host == httpx.URL(SITE_URL).host and request.url.path in self.files:
+            return httpx.Response(200, text=self.files[request.url.path])
+        if host == httpx.URL(SITE_URL).host and request.url.path in self.pages:
+            return httpx.Response(200, headers=self.validators.get(request.url.path, {}))
+        return httpx.Response(404)
+
+@pytest.fixture
+def site(monkeypatch) -> FakeSite:
+    """Route every httpx client the scraper creates to a FakeSite"""
+    fake = FakeSite()
+    transport = httpx.MockTransport(fake.handler)
+    monkeypatch.setattr(httpx, 'Client', partial(httpx.Client, transport=transport))
+    monkeypatch.setattr(httpx, 'AsyncClient', partial(httpx.AsyncClient, transport=transport))
+    return fake
+
+@pytest.fixture
+def make_scraper(tmp_path):
+    """Build APIScrapers for SITE_URL that chunk locally and keep state under tmp_path"""
+    from api_doc_generator import APIScraper
+
+    def make(**options) -> APIScraper:
+        options.setdefault('rate_limits', NO_RATE_LIMITS)
+        options.setdefault('segmenter', 'local')
+        options.setdefault('boilerplate_threshold', None)
+        return APIScraper(SITE_URL + '/', **options)
+    return make
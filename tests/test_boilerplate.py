@@ -0,0 +1,80 @@
+from api_doc_generator.boilerplate import BoilerplateDetector
+from conftest import SITE_URL
+
+NAVIGATION = "Home\nGuides\nAPI Reference\nChangelog"
+FOOTER = "Was this page helpful?\nEdit this page on GitHub\n\nCopyright 2024 Example Inc."
+
+def page(i: int) -> str:
+    return "\n".join([
+        NAVIGATION,
+        f"# Endpoint {i}",
+        f"Creates resource number {i}.",
+        "Parameters",
+        f"- `id_{i}`: identifier of resource {i}",
+        "Returns",
+        f"The created resource {i}.",
+        "```",
+        "Home\nGuides\nAPI Reference",
+        "```",
+        FOOTER
+    ])
+
+def observed_detector(pages: int = 10) -> BoilerplateDetector:
+    detector = BoilerplateDetector(threshold=0.5, min_pages=5, sample_size=pages)
+    for i in range(pages):
+        detector.observe(page(i))
+    assert detector.ready
+    return detector
+
+def test_navigation_runs_are_stripped():
+    detector = observed_detector()
+    stripped = detector.strip(page(3))
+
+    assert "Changelog" not in stripped
+    assert "Edit this page" not in stripped
+    assert "Creates resource number 3." in stripped
+    # Code blocks are kept even when they repeat the navigation
+    assert "```\nHome\nGuides\nAPI Reference\n```" in stripped
+
+def test_recurring_labels_are_kept():
+    detector = observed_detector()
+    stripped = detector.strip(page(3))
+
+    assert "\nParameters\n" in stripped
+    assert "\nReturns\n" in stripped
+
+def test_short_headers_and_footers_are_stripped():
+    detector = BoilerplateDetector(min_pages=5)
+    pages = [f"Docs home\n\n# Page {i}\nParameters\nBody of page {i}.\n\nEdit this page" for i in range(6)]
+    for content in pages:
+        detector.observe(content)
+
+    assert detector.strip(pages[2]) == "\n# Page 2\nParameters\nBody of page 2.\n"
+    assert detector.stripped_lines == 2
+
+def test_nothing_is_stripped_before_min_pages():
+    detector = BoilerplateDetector(min_pages=5)
+    for i in range(4):
+        detector.observe(page(i))
+
+    assert detector.strip(page(0)) == page(0)
+    assert detector.stripped_lines == 0
+
+def add_site_pages(site, changed: int = -1):
+    site.add_page('/', NAVIGATION + "\nWelcome to the guides.\n" + FOOTER, [f'/g{i}' for i in range(8)])
+    for i in range(8):
+        body = f"Guide {i} {'was rewritten' if i == changed else 'explains'} endpoint {i} in detail."
+        site.add_page(f'/g{i}', "\n".join([NAVIGATION, body, FOOTER]))
+
+def test_recrawl_strips_changed_and_restored_pages_alike(site, make_scraper, tmp_path):
+    options = dict(boilerplate_threshold=0.5, manifest_dir=str(tmp_path / 'manifest'))
+    add_site_pages(site)
+    make_scraper(**options).crawl()
+
+    add_site_pages(site, changed=3)
+    docs = make_scraper(**options).crawl()
+
+    assert "was rewritten" in docs[SITE_URL + '/g3']['content']
+    for url in ('/g3', '/g4'):
+        assert "Changelog" not in docs[SITE_URL + url]['content']
+        assert "Copyright" not in docs[SITE_URL + url]['content']
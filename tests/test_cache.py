@@ -0,0 +1,55 @@
+import os
+import time
+from api_doc_generator.cache import ResponseCache
+
+def test_values_round_trip_per_namespace(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.set('reader', {'url': 'https://a'}, {'data': [1, 2, 3]})
+
+    assert cache.get('reader', {'url': 'https://a'}) == {'data': [1, 2, 3]}
+    assert cache.get('segmenter', {'url': 'https://a'}) is None
+    assert cache.stats() == {'reader': {'hits': 1, 'misses': 0}, 'segmenter': {'hits': 0, 'misses': 1}}
+
+def test_get_many_keeps_payload_order(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.set_many('chunks', [('b', [2.0]), ('a', [1.0])])
+
+    assert cache.get_many('chunks', ['a', 'missing', 'b']) == [[1.0], None, [2.0]]
+
+def test_entries_persist_and_expire(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path), ttl=60)
+    cache.set('reader', 'page', 'body')
+    cache.close()
+
+    reopened = ResponseCache(str(tmp_path), ttl=60)
+    assert reopened.get('reader', 'page') == 'body'
+
+    now = time.time()
+    monkeypatch.setattr('api_doc_generator.cache.time.time', lambda: now + 61)
+    assert reopened.get('reader', 'page') is None
+    assert reopened.get('reader', 'page') is None
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    clock = iter(range(1000))
+    monkeypatch.setattr('api_doc_generator.cache.time.time', lambda: next(clock))
+    cache = ResponseCache(str(tmp_path), ttl=0, max_bytes=2000)
+    # Random hex only compresses to about 560 bytes, so three values fit and four do not
+    values = {key: os.urandom(500).hex() for key in 'abcd'}
+    for key in 'abc':
+        cache.set('x', key, values[key])
+    cache.get('x', 'a')
+    cache.set('x', 'd', values['d'])
+
+    assert cache.get('x', 'a') == values['a']
+    assert cache.get('x', 'b') is None
+    assert cache.get('x', 'd') == values['d']
+
+def test_namespaces_can_expire_sooner(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path), ttl=3600, namespace_ttls={'reader': 60})
+    cache.set('reader', 'page', 'body')
+    cache.set('embeddings', 'chunk', [1.0])
+
+    now = time.time()
+    monkeypatch.setattr('api_doc_generator.cache.time.time', lambda: now + 61)
+    assert cache.get('reader', 'page') is None
+    assert cache.get('embeddings', 'chunk') == [1.0]
@@ -0,0 +1,57 @@
+import pytest
+from api_doc_generator.checkpoint import CrawlJournal
+from conftest import SITE_URL
+
+def add_pages(site, count: int):
+    site.add_page('/', 'Index of the guides', [f'/guide-{i}' for i in range(count)])
+    for i in range(count):
+        site.add_page(f'/guide-{i}', f'Guide {i}. ' * 50, ['/'])
+
+@pytest.mark.parametrize('concurrency', [1, 4])
+def test_resume_does_not_refetch_checkpointed_pages(site, make_scraper, tmp_path, concurrency):
+    add_pages(site, 40)
+    journal = str(tmp_path / 'crawl_journal.jsonl')
+    options = dict(checkpoint_path=journal, checkpoint_interval=5)
+    site.crash_after = 30
+    with pytest.raises(KeyboardInterrupt):
+        make_scraper(**options).crawl(concurrency=concurrency)
+    first_run = set(site.reader_calls)
+
+    site.crash_after = None
+    site.reader_calls.clear()
+    docs = make_scraper(**options).crawl(concurrency=concurrency, resume=True)
+
+    refetched = first_run & set(site.reader_calls)
+    # Only pages scraped after the last checkpoint (and those in flight) are fetched twice
+    assert len(refetched) < 5 + concurrency
+    assert len(docs) == 41
+    assert all(len(page['embeddings']) == len(page['chunks']) for page in docs.values())
+
+def test_resume_refetches_pages_held_back_for_boilerplate(site, make_scraper, tmp_path):
+    site.add_page('/', 'Index of the guides', [f'/guide-{i}' for i in range(8)])
+    for i in range(8):
+        site.add_page(f'/guide-{i}', f'Guide {i}. ' * 50)
+    journal = str(tmp_path / 'crawl_journal.jsonl')
+    options = dict(checkpoint_path=journal, checkpoint_interval=2, boilerplate_threshold=0.5)
+    site.crash_after = 3
+    with pytest.raises(KeyboardInterrupt):
+        make_scraper(**options).crawl()
+
+    site.crash_after = None
+    docs = make_scraper(**options).crawl(resume=True)
+
+    assert set(docs) == {SITE_URL + '/'} | {f'{SITE_URL}/guide-{i}' for i in range(8)}
+
+def test_journal_restores_pages_and_frontier(tmp_path):
+    journal = CrawlJournal(str(tmp_path / 'journal.jsonl'))
+    journal.open(resume=False)
+    journal.append_page(SITE_URL + '/', 0, {'url': SITE_URL + '/', 'content': 'Home', 'chunks': ['Home'],
+                                            'embeddings': [[1.0, 0.0]]})
+    journal.append_frontier([(SITE_URL + '/next', 1)])
+    journal.close()
+
+    pages, pending = CrawlJournal(journal.path).load()
+    (url, depth, page, vectors), = pages
+    assert (url, depth, page['content']) == (SITE_URL + '/', 0, 'Home')
+    assert vectors.tolist() == [[1.0, 0.0]]
+    assert pending == [(SITE_URL + '/next', 1)]
@@ -0,0 +1,44 @@
+import numpy as np
+from api_doc_generator.context import estimate_tokens, select_chunks
+from api_doc_generator.generator import DocumentationGenerator
+
+# Three copies of one chunk and two different ones
+VECTORS = np.array([[1, 0.1, 0], [1, 0.1, 0], [1, 0.1, 0], [0.6, 0.8, 0], [0.6, 0, 0.8]], dtype=np.float32)
+
+def test_selection_fits_the_budget():
+    token_counts = np.array([10, 10, 10, 50, 10])
+    selected = select_chunks(VECTORS, token_counts, budget=35)
+
+    assert sum(token_counts[selected]) <= 35
+    assert 3 not in selected
+    assert selected == sorted(selected)
+
+def test_diversity_skips_redundant_chunks():
+    token_counts = np.ones(len(VECTORS), dtype=int)
+
+    assert select_chunks(VECTORS, token_counts, budget=3) == [0, 3, 4]
+    assert select_chunks(VECTORS, token_counts, budget=3, diversity=0) == [0, 1, 2]
+
+def test_nothing_is_selected_without_chunks_or_budget():
+    assert select_chunks(np.empty((0, 3)), np.array([]), budget=10) == []
+    assert select_chunks(VECTORS, np.ones(5, dtype=int), budget=0) == []
+
+def test_review_context_lists_selected_chunks_under_their_pages(tmp_path):
+    api_docs = {
+        f"https://docs.example.com/{name}": {
+            'title': name.title(),
+            'chunks': [f"{name} chunk {i}. " * 10 for i in range(len(vectors))],
+            'embeddings': np.array(vectors, dtype=np.float32)
+        }
+        for name, vectors in (('auth', VECTORS[:3]), ('billing', VECTORS[3:]))
+    }
+    generator = DocumentationGenerator(api_docs, str(tmp_path))
+    # Auth chunks take 37 tokens and billing chunks 45 with their share of the page headers,
+    # so 90% of the budget holds three chunks but not four
+    assert estimate_tokens(api_docs["https://docs.example.com/auth"]['chunks'][0]) == 35
+    context, selected, total = generator._select_review_context(150)
+
+    assert (selected, total) == (3, 5)
+    assert context.index("## Auth") < context.index("auth chunk 0") < context.index("## Billing")
+    assert "auth chunk 1" not in context
+    assert "billing chunk 0" in context and "billing chunk 1" in context
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from api_doc_generator.corpus import CorpusReader, CorpusWriter
+
+def page(content: str, rows: int) -> dict:
+    return {'title': content, 'content': content, 'raw_content': 'raw ' + content,
+            'embeddings': np.full((rows, 4), rows, dtype=np.float32)}
+
+def test_pages_and_embeddings_round_trip_in_final_order(tmp_path):
+    path = str(tmp_path / 'corpus.jsonl')
+    writer = CorpusWriter(path)
+    writer.open('https://docs.example.com')
+    writer.append_page('/b', page('B', 2))
+    writer.append_page('/a', page('A', 3))
+    writer.append_page('/empty', page('Empty', 0))
+    writer.close(order=['/a', '/b'])
+
+    reader = CorpusReader(path)
+    assert reader.base_url == 'https://docs.example.com'
+    assert list(reader) == ['/a', '/b']
+    assert reader['/a']['content'] == 'A'
+    assert 'raw_content' not in reader['/a']
+    assert reader['/a']['embeddings'].shape == (3, 4)
+    assert np.all(reader['/b']['embeddings'] == 2)
+
+def test_resumed_corpus_replaces_pages_and_skips_a_truncated_line(tmp_path):
+    path = str(tmp_path / 'corpus.jsonl')
+    writer = CorpusWriter(path)
+    writer.open('https://docs.example.com')
+    writer.append_page('/a', page('old', 1))
+    writer.close()
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"type": "page", "url": "/half')
+
+    writer = CorpusWriter(path)
+    writer.open('https://docs.example.com', resume=True)
+    writer.append_page('/b', page('B', 1))
+    writer.append_page('/a', page('new', 2))
+    writer.close()
+
+    reader = CorpusReader(path)
+    assert list(reader) == ['/b', '/a']
+    assert reader['/a']['content'] == 'new'
+    assert reader['/a']['embeddings'].shape == (2, 4)
+
+def test_files_that_are_not_a_corpus_are_rejected(tmp_path):
+    path = tmp_path / 'other.jsonl'
+    path.write_text('{"type": "meta", "version": 99}\n')
+
+    with pytest.raises(ValueError):
+        CorpusReader(str(path))
@@ -0,0 +1,37 @@
+import numpy as np
+from api_doc_generator.dedup import duplicate_clusters, page_vectors, similar_pairs
+
+def page(*vectors):
+    return {'embeddings': np.array(vectors, dtype=np.float32)}
+
+def test_page_vectors_skip_pages_without_embeddings():
+    urls, vectors = page_vectors({'a': page([3, 4], [3, 4]), 'b': {'embeddings': []}, 'c': page([0, 2])})
+
+    assert urls == ['a', 'c']
+    assert np.allclose(vectors, [[0.6, 0.8], [0, 1]])
+
+def test_similar_pairs_match_across_blocks():
+    vectors = np.array([[1, 0], [0, 1], [1, 0], [0, 1], [1, 0]], dtype=np.float32)
+    expected = {(0, 2), (0, 4), (2, 4), (1, 3)}
+
+    for block_size in (1, 2, 16):
+        assert {tuple(pair) for pair in similar_pairs(vectors, 0.99, block_size)} == expected
+
+def test_clusters_are_keyed_by_the_first_page():
+    api_docs = {
+        '/v2/auth': page([1, 0, 0]),
+        '/guide': page([0, 1, 0]),
+        '/v1/auth': page([0.99, 0.1, 0]),
+        '/other': page([0, 0, 1])
+    }
+    clusters = duplicate_clusters(api_docs, threshold=0.97, block_size=2)
+
+    assert clusters == {'/v2/auth': ['/v1/auth']}
+
+def test_chains_of_similar_pages_are_not_merged():
+    # Each page is 0.98 similar to the next but only 0.92 to the one after that
+    angles = np.radians([0, 11.5, 23, 34.5, 46])
+    api_docs = {f"/p{i}": page([np.cos(angle), np.sin(angle)]) for i, angle in enumerate(angles)}
+    clusters = duplicate_clusters(api_docs, threshold=0.97, block_size=2)
+
+    assert clusters == {'/p0': ['/p1'], '/p2': ['/p3']}
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from api_doc_generator.docstore import DocStore, PageRecord
+from api_doc_generator.embeddings import EmbeddingStore
+
+def page(url: str, content: str) -> dict:
+    return {'url': url, 'title': url.upper(), 'content': content, 'chunks': [content],
+            'links': {'next': url + '/next'}, 'embeddings': [[1.0, 0.0], [0.0, 1.0]]}
+
+def test_pages_round_trip_and_persist(tmp_path):
+    store = DocStore(str(tmp_path), EmbeddingStore())
+    store['a'] = page('a', 'Content of a')
+    store['b'] = page('b', 'Content of b')
+    record = store['a']
+
+    assert isinstance(record, PageRecord)
+    assert record['title'] == 'A' and record['content'] == 'Content of a'
+    assert record['links'] == {'next': 'a/next'}
+    assert np.allclose(np.asarray(record['embeddings']), [[1, 0], [0, 1]])
+    store.close()
+
+    reopened = DocStore(str(tmp_path))
+    assert list(reopened) == ['a', 'b']
+    assert reopened['b']['chunks'] == ['Content of b']
+    assert reopened['b']['embeddings'] == []
+
+def test_assigned_fields_are_written_through(tmp_path):
+    store = DocStore(str(tmp_path))
+    store['a'] = page('a', 'old')
+    store['a']['content'] = 'new'
+    store['a']['title'] = 'Renamed'
+
+    assert store['a']['content'] == 'new'
+    assert store['a']['title'] == 'Renamed'
+    with pytest.raises(KeyError):
+        store['a']['unknown'] = 1
+
+def test_reorder_and_delete(tmp_path):
+    store = DocStore(str(tmp_path))
+    for url in 'abcd':
+        store[url] = page(url, url)
+    store.reorder(['c', 'a'])
+    del store['d']
+
+    assert [url for url, _ in store.items()] == ['c', 'a', 'b']
+    assert len(store) == 3 and 'd' not in store
+    store['e'] = page('e', 'e')
+    assert list(store)[-1] == 'e'
+
+def test_clear_removes_a_previous_run(tmp_path):
+    store = DocStore(str(tmp_path))
+    store['a'] = page('a', 'a')
+    store.close()
+
+    assert len(DocStore(str(tmp_path), clear=True)) == 0
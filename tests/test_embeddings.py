@@ -0,0 +1,74 @@
+import numpy as np
+from api_doc_generator.cache import ResponseCache
+from api_doc_generator.embeddings import EmbeddingBatcher, EmbeddingStore
+from conftest import fake_vector
+
+def add_pages(site, count: int):
+    site.add_page('/', 'Index of the guides', [f'/guide-{i}' for i in range(count)])
+    for i in range(count):
+        site.add_page(f'/guide-{i}', '\n\n'.join(f'Paragraph {j} of guide {i}. ' * 20 for j in range(3)))
+
+def test_batcher_deduplicates_chunks_across_pages():
+    batcher = EmbeddingBatcher(batch_size=10)
+    batcher.add('a', ['shared', 'only a'])
+    batcher.add('b', ['shared', 'only b'])
+    batch = batcher.next_batch()
+    assert sorted(text for _, text in batch) == ['only a', 'only b', 'shared']
+
+    batcher.resolve(batch, [fake_vector(text) for _, text in batch])
+    pages = dict(batcher.completed_pages())
+    assert np.allclose(np.asarray(pages['a'])[0], np.asarray(pages['b'])[0])
+    assert batcher.store.size == 4
+
+def test_short_response_fails_the_texts_without_a_vector():
+    batcher = EmbeddingBatcher(batch_size=10)
+    batcher.add('a', ['one'])
+    batcher.add('b', ['two'])
+    batch = batcher.next_batch()
+    batcher.resolve(batch, [fake_vector(batch[0][1])])
+
+    pages = dict(batcher.completed_pages())
+    assert pages['a'] is not None
+    assert pages['b'] is None
+
+def test_failed_chunks_are_queued_again_for_later_pages():
+    batcher = EmbeddingBatcher(batch_size=10)
+    batcher.add('a', ['flaky'])
+    batcher.fail(batcher.next_batch())
+    assert dict(batcher.completed_pages()) == {'a': None}
+
+    batcher.add('b', ['flaky'])
+    batch = batcher.next_batch()
+    assert [text for _, text in batch] == ['flaky']
+    batcher.resolve(batch, [fake_vector('flaky')])
+    assert dict(batcher.completed_pages())['b'] is not None
+
+def test_batcher_reads_chunk_vectors_from_the_cache(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    first = EmbeddingBatcher(batch_size=2, cache=cache, model='m')
+    first.add('a', ['one', 'two', 'three'])
+    while first.has_pending():
+        batch = first.next_batch()
+        first.resolve(batch, [fake_vector(text) for _, text in batch])
+
+    second = EmbeddingBatcher(batch_size=3, store=EmbeddingStore(), cache=cache, model='m')
+    second.add('b', ['three', 'one', 'four'])
+    assert second.cache_hits == 2
+    assert [text for _, text in second.next_batch()] == ['four']
+
+    other_model = EmbeddingBatcher(cache=cache, model='other')
+    other_model.add('c', ['one'])
+    assert other_model.cache_hits == 0
+
+def test_concurrent_recrawl_embeds_nothing_again(site, make_scraper, tmp_path):
+    add_pages(site, 30)
+    cache_dir = str(tmp_path / 'cache')
+    make_scraper(cache_dir=cache_dir, embedding_batch_size=7).crawl(concurrency=8)
+    assert site.embedded_texts
+    site.embedded_texts.clear()
+
+    # Different batch boundaries, as timing would give at any concurrency
+    docs = make_scraper(cache_dir=cache_dir, embedding_batch_size=5).crawl(concurrency=8)
+
+    assert site.embedded_texts == []
+    assert all(len(page['embeddings']) == len(page['chunks']) for page in docs.values())
@@ -0,0 +1,46 @@
+from api_doc_generator.extraction import clean_code_block, extract_page
+from conftest import SITE_URL
+
+def test_text_skips_scripts_and_styles():
+    text, _ = extract_page(
+        '<html><head><style>p { color: red }</style></head>'
+        '<body><h1>Tokens</h1><script>track()</script><p>Create a token.</p></body></html>'
+    )
+
+    assert text.splitlines() == ['Tokens', 'Create a token.']
+
+def test_code_samples_from_html_and_fenced_blocks():
+    content = (
+        "Install it:\n\n```bash\npip install example\n```\n"
+        "<pre><code>client = Client()\nclient.get()</code></pre>"
+        "<p>Call <code>client.get()</code> again.</p>"
+    )
+    _, code_samples = extract_page(content)
+
+    # Nested <code> is part of its <pre>, and inline code is a sample of its own
+    assert code_samples == ['pip install example', 'client = Client()\nclient.get()', 'client.get()']
+
+def test_code_samples_are_deduplicated_in_page_order():
+    _, code_samples = extract_page('<pre>first()</pre><pre>second()</pre><pre>first()</pre><pre>  </pre>')
+
+    assert code_samples == ['first()', 'second()']
+
+def test_clean_code_block_strips_line_numbers_and_indentation():
+    assert clean_code_block('\n    def f():\n        return x\n\n\n') == 'def f():\n    return x'
+    assert clean_code_block('_1 curl https://api.example.com _2') == 'curl https://api.example.com'
+    assert clean_code_block('') == ''
+
+def test_worker_processes_extract_like_the_sequential_crawler(site, make_scraper):
+    site.add_page('/', '<h1>Guides</h1>', ['/b', '/a'])
+    site.add_page('/a', '<p>Page A</p><pre>a()</pre>', ['/c'])
+    site.add_page('/b', '<p>Page B</p><pre>b()</pre>', ['/c'])
+    site.add_page('/c', '<p>Page C</p>\n\n```\nc()\n```')
+
+    sequential = make_scraper().crawl()
+    pooled = make_scraper(workers=2).crawl(concurrency=4)
+
+    # Concurrent crawls are reordered breadth-first along the links, like the sequential one
+    assert list(pooled) == list(sequential) == [SITE_URL + path for path in ('/', '/b', '/a', '/c')]
+    for url, page in sequential.items():
+        assert (pooled[url]['content'], pooled[url]['code_samples']) == (page['content'], page['code_samples'])
+    assert pooled[SITE_URL + '/c']['code_samples'] == ['c()']
@@ -0,0 +1,31 @@
+from api_doc_generator.frontier import CrawlFrontier, canonicalize_url
+
+def test_canonicalize_url():
+    assert canonicalize_url('HTTPS://Docs.Example.com:443/guide/?b=2&utm_source=x&a=1#intro') == \
+        'https://docs.example.com/guide?a=1&b=2'
+    assert canonicalize_url('http://docs.example.com:8080') == 'http://docs.example.com:8080/'
+
+def test_urls_are_queued_once_and_handed_out_shallowest_first():
+    frontier = CrawlFrontier()
+    assert frontier.push('https://docs.example.com/deep', 2)
+    assert frontier.extend(['https://docs.example.com/a', 'https://docs.example.com/b'], 1) == 2
+    assert not frontier.push('https://docs.example.com/a/#top', 1)
+    frontier.mark_seen('https://docs.example.com/seen')
+    assert not frontier.push('https://docs.example.com/seen', 0)
+
+    assert [frontier.pop() for _ in range(3)] == [
+        ('https://docs.example.com/a', 1),
+        ('https://docs.example.com/b', 1),
+        ('https://docs.example.com/deep', 2)
+    ]
+    assert frontier.pop() is None
+
+def test_limits():
+    frontier = CrawlFrontier(max_pages=2, max_depth=1)
+    assert not frontier.push('https://docs.example.com/too-deep', 2)
+    frontier.extend([f'https://docs.example.com/{i}' for i in range(3)], 1)
+
+    assert frontier.snapshot() == [(f'https://docs.example.com/{i}', 1) for i in range(3)]
+    assert frontier.pop() and frontier.pop()
+    assert not frontier and frontier.exhausted
+    assert len(frontier) == 1
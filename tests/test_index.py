@@ -0,0 +1,57 @@
+import numpy as np
+from api_doc_generator.index import VectorIndex
+
+def page(title, *vectors):
+    return {
+        'title': title,
+        'chunks': [f"{title} chunk {i}" for i in range(len(vectors))],
+        'embeddings': np.array(vectors, dtype=np.float32)
+    }
+
+API_DOCS = {
+    '/auth': page('Auth', [1, 0, 0], [0.9, 0.1, 0]),
+    '/billing': page('Billing', [0, 1, 0], [0, 0.9, 0.1]),
+    '/webhooks': page('Webhooks', [0, 0, 1])
+}
+
+def build(tmp_path, api_docs=API_DOCS, n_clusters=0):
+    index = VectorIndex(str(tmp_path / 'index'))
+    index.build(api_docs, 'https://docs.example.com', n_clusters=n_clusters)
+    return VectorIndex(index.directory).open()
+
+def test_exact_search_ranks_chunks_by_similarity(tmp_path):
+    index = build(tmp_path)
+    results = index.search([1, 0.05, 0], k=2)
+
+    assert [result['text'] for result in results] == ['Auth chunk 0', 'Auth chunk 1']
+    assert results[0]['url'] == '/auth' and results[0]['title'] == 'Auth'
+    assert results[0]['score'] > results[1]['score']
+    index.close()
+
+def test_clustered_search_matches_exact_search(tmp_path):
+    index = build(tmp_path, n_clusters=3)
+    query = [0.1, 1, 0]
+
+    assert index.centroids is not None
+    assert index.search(query, k=2, nprobe=3) == index.search(query, k=2, exact=True)
+    index.close()
+
+def test_clustered_search_probes_more_clusters_until_k_candidates(tmp_path):
+    index = build(tmp_path, n_clusters=3)
+    results = index.search([1, 0, 0], k=4, nprobe=1)
+
+    assert len(results) == 4
+    assert [result['url'] for result in results[:2]] == ['/auth', '/auth']
+    index.close()
+
+def test_empty_nearest_cluster_and_no_results(tmp_path):
+    # Identical vectors leave clusters 2 and 3 without rows
+    api_docs = {'/a': page('A', [1, 0], [1, 0]), '/b': page('B', [0, 1], [0, 1])}
+    index = build(tmp_path, api_docs, n_clusters=4)
+    assert index.meta['offsets'] == [0, 2, 4, 4, 4]
+    # Move the empty cluster 2 closest to the rows of cluster 0
+    index.centroids = np.array([[0.8, 0.6], [0, 1], [1, 0], [0, 1]], dtype=np.float32)
+
+    assert [result['url'] for result in index.search([1, 0], k=1, nprobe=1)] == ['/a']
+    assert index.search([1, 0], k=0) == []
+    index.close()
@@ -0,0 +1,58 @@
+import numpy as np
+from api_doc_generator.embeddings import EmbeddingStore
+from api_doc_generator.manifest import CrawlManifest, content_hash
+from conftest import SITE_URL
+
+def test_page_changed_without_validators_is_refetched(site, make_scraper, tmp_path):
+    # No ETag or Last-Modified, and the response cache is on as in main.py
+    site.add_page('/', 'Start page with enough text to chunk', ['/guide'])
+    site.add_page('/guide', 'Page content v1')
+    options = dict(cache_dir=str(tmp_path / 'cache'), manifest_dir=str(tmp_path / 'manifest'))
+    make_scraper(**options).crawl()
+
+    site.add_page('/guide', 'Page content v2')
+    scraper = make_scraper(**options)
+    docs = scraper.crawl()
+
+    assert 'v2' in docs[SITE_URL + '/guide']['content']
+    assert scraper.changes['changed'] == [SITE_URL + '/guide']
+    assert scraper.changes['unchanged'] == [SITE_URL + '/']
+
+def test_unchanged_validators_skip_the_reader(site, make_scraper, tmp_path):
+    site.add_page('/', 'Start page', ['/guide'])
+    site.add_page('/guide', 'Guide')
+    site.validators = {'/': {'ETag': '"a"'}, '/guide': {'ETag': '"b"'}}
+    options = dict(cache_dir=str(tmp_path / 'cache'), manifest_dir=str(tmp_path / 'manifest'))
+    make_scraper(**options).crawl()
+    site.reader_calls.clear()
+
+    scraper = make_scraper(**options)
+    scraper.crawl()
+
+    assert site.reader_calls == []
+    assert sorted(scraper.changes['unchanged']) == [SITE_URL + '/', SITE_URL + '/guide']
+
+def test_manifest_saves_and_restores_pages(tmp_path):
+    store = EmbeddingStore()
+    start, stop = store.append([[1.0, 0.0], [0.0, 1.0]])
+    api_docs = {'https://docs.example.com/a': {
+        'title': 'A', 'content': 'Content', 'raw_content': 'Raw', 'chunks': ['Content'],
+        'links': {}, 'url': 'https://docs.example.com/a', 'content_hash': content_hash('Content'),
+        'embeddings': store.range(start, stop)
+    }}
+    validators = {'https://docs.example.com/a': {'etag': '"v1"', 'last_modified': 'Mon, 01 Jan 2024 00:00:00 GMT'}}
+    CrawlManifest(str(tmp_path)).save(api_docs, store, validators, {'added': list(api_docs)})
+
+    manifest = CrawlManifest(str(tmp_path))
+    assert manifest.conditional_headers('https://docs.example.com/a') == {
+        'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'
+    }
+    assert manifest.conditional_headers('https://docs.example.com/new') == {}
+
+    current = EmbeddingStore()
+    current.append([[0.5, 0.5]])
+    page = manifest.restore('https://docs.example.com/a', current)
+    assert page['content'] == 'Content' and page['raw_content'] == ''
+    assert np.allclose(np.asarray(page['embeddings']), [[1, 0], [0, 1]])
+    assert page['embeddings'].start == 1
+    assert manifest.restore('https://docs.example.com/new', current) is None
@@ -0,0 +1,71 @@
+import json
+import pytest
+from api_doc_generator.metrics import Histogram, Metrics
+
+def sample_metrics() -> Metrics:
+    metrics = Metrics()
+    for seconds in (0.02, 0.03, 0.04, 0.2):
+        metrics.observe('reader', seconds, service='jina')
+    metrics.inc('requests_total', service='reader', status=200)
+    metrics.inc('requests_total', 2, service='reader', status=429)
+    metrics.inc('bytes_sent_total', 1024, service='reader')
+    return metrics
+
+def test_quantiles_are_interpolated_within_the_observed_range():
+    histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+    for value in (0.02, 0.03, 0.04, 0.2):
+        histogram.observe(value)
+
+    # The median falls into the (0.01, 0.1] bucket, which starts at the smallest observation
+    assert 0.02 <= histogram.quantile(0.5) <= 0.1
+    assert histogram.quantile(0.99) <= 0.2
+    assert histogram.cumulative_counts() == [0, 3, 4, 4]
+    assert Histogram().quantile(0.5) == 0.0
+
+def test_timed_blocks_are_recorded_even_when_they_raise():
+    metrics = Metrics()
+    with pytest.raises(ValueError):
+        with metrics.time('parse'):
+            raise ValueError
+
+    assert metrics.to_dict()['stages']['parse']['count'] == 1
+
+def test_json_export(tmp_path):
+    path = tmp_path / 'metrics.json'
+    sample_metrics().write(str(path))
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    stage = data['stages']['reader{service="jina"}']
+    assert stage['count'] == 4
+    assert stage['total_seconds'] == pytest.approx(0.29)
+    assert data['counters'] == {
+        'bytes_sent_total{service="reader"}': 1024,
+        'requests_total{service="reader",status="200"}': 1,
+        'requests_total{service="reader",status="429"}': 2
+    }
+
+def test_prometheus_export(tmp_path):
+    path = tmp_path / 'metrics.prom'
+    sample_metrics().write(str(path))
+    with open(path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+
+    assert '# TYPE api_doc_stage_duration_seconds histogram' in lines
+    assert 'api_doc_stage_duration_seconds_bucket{stage="reader",service="jina",le="0.05"} 3' in lines
+    assert 'api_doc_stage_duration_seconds_bucket{stage="reader",service="jina",le="+Inf"} 4' in lines
+    assert 'api_doc_stage_duration_seconds_count{stage="reader",service="jina"} 4' in lines
+    # One TYPE line per counter, however many label sets it has
+    assert lines.count('# TYPE api_doc_requests_total counter') == 1
+    assert 'api_doc_requests_total{service="reader",status="429"} 2.0' in lines
+
+def test_crawl_counts_requests_and_cache_hits(site, make_scraper, tmp_path):
+    site.add_page('/', 'Home page', ['/a'])
+    site.add_page('/a', 'Page A')
+    cache_dir = str(tmp_path / 'cache')
+    make_scraper(cache_dir=cache_dir).crawl()
+
+    scraper = make_scraper(cache_dir=cache_dir)
+    scraper.crawl()
+    assert scraper.metrics.counter('cache_hits_total', service='reader') == 2
+    assert scraper.metrics.counter('requests_total', service='reader', status=200) == 0
@@ -0,0 +1,121 @@
+import json
+import os
+import pytest
+from api_doc_generator.generator import DocumentationGenerator, SEARCH_INDEX_FILENAME
+from api_doc_generator.html_shards import SHARD_MANIFEST_FILENAME, shard_filename, shard_key
+
+REVIEW = "The guides cover authentication well."
+
+def make_docs(count: int) -> dict:
+    return {
+        f"https://docs.example.com/guide-{i}": {
+            'title': f"Guide {i}",
+            'content': f"How to use endpoint number {i}.",
+            'code_samples': [f"client.call({i})"],
+            'links': {'Home': 'https://docs.example.com/'}
+        }
+        for i in range(count)
+    }
+
+@pytest.fixture
+def make_generator(tmp_path, monkeypatch):
+    """Build DocumentationGenerators whose Gemini review always returns REVIEW"""
+    prompts = []
+
+    def send_prompt(self, model, model_config, prompt):
+        prompts.append(prompt)
+        return REVIEW
+    monkeypatch.setattr(DocumentationGenerator, '_create_model', lambda self, model_config: None)
+    monkeypatch.setattr(DocumentationGenerator, '_send_prompt', send_prompt)
+
+    def make(api_docs, **options) -> DocumentationGenerator:
+        generator = DocumentationGenerator(api_docs, str(tmp_path / 'docs'), **options)
+        generator.prompts = prompts
+        return generator
+    return make
+
+def read(path) -> str:
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+def test_streamed_markdown_matches_the_document_and_ends_with_the_review(make_generator, tmp_path):
+    generator = make_generator(make_docs(5))
+    generator.generate()
+
+    markdown = read(tmp_path / 'docs' / 'api_documentation.md')
+    document, review = markdown.split("\n\n---\n\n## AI Documentation Review\n")
+    assert document.split("\n", 3)[3] == generator._generate_markdown().split("\n", 3)[3]
+    assert review.endswith(REVIEW)
+    # The single review is sent the document without its "Generated on" line
+    assert generator.prompts and "Generated on" not in generator.prompts[0]
+    assert "## Guide 4" in generator.prompts[0]
+
+def test_html_and_search_index_cover_every_page_in_order(make_generator, tmp_path):
+    make_generator(make_docs(5)).generate()
+
+    html = read(tmp_path / 'docs' / 'api_documentation.html')
+    positions = [html.index(f">Guide {i}</h2>") for i in range(5)]
+    assert positions == sorted(positions)
+    assert html.index(REVIEW) > positions[-1]
+    assert html.rstrip().endswith("</html>")
+
+    index = json.loads(read(tmp_path / 'docs' / SEARCH_INDEX_FILENAME))
+    titles = [title for _, title in index['sections']]
+    assert titles == [f"Guide {i}" for i in range(5)] + ["AI Documentation Review"]
+    assert index['sections'][0][0] == '#guide-0'
+
+def test_failed_review_still_writes_the_pages(make_generator, tmp_path, monkeypatch):
+    def fail(self, model, model_config, prompt):
+        raise RuntimeError("quota exceeded")
+    monkeypatch.setattr(DocumentationGenerator, '_send_prompt', fail)
+    make_generator(make_docs(2)).generate()
+
+    markdown = read(tmp_path / 'docs' / 'api_documentation.md')
+    assert "## Guide 1" in markdown
+    assert "AI Documentation Review" not in markdown
+
+def test_shard_keys_and_unique_filenames():
+    assert shard_key('https://docs.example.com/api/users/', 'page') == '/api/users'
+    assert shard_key('https://docs.example.com/api/users', 'prefix') == '/api'
+    assert shard_key('https://docs.example.com/', 'prefix') == '/'
+
+    taken = {}
+    names = [shard_filename(key, taken) for key in ('/', '/api/users', '/api-users', '/index')]
+    assert names == ['home.html', 'api-users.html', 'api-users-2.html', 'index-page.html']
+
+def test_page_layout_writes_one_file_per_page_with_an_index(make_generator, tmp_path):
+    make_generator(make_docs(3), html_layout='page', html_workers=2).generate()
+
+    html_dir = tmp_path / 'docs' / 'html'
+    assert sorted(os.listdir(html_dir)) == sorted([
+        'guide-0.html', 'guide-1.html', 'guide-2.html', 'index.html',
+        SEARCH_INDEX_FILENAME, SHARD_MANIFEST_FILENAME, 'style.css'
+    ])
+    index = read(html_dir / 'index.html')
+    assert '<a href="guide-1.html#guide-1">Guide 1</a>' in index
+    assert REVIEW in index
+    assert 'client.call(1)' in read(html_dir / 'guide-1.html')
+
+    search = json.loads(read(html_dir / SEARCH_INDEX_FILENAME))
+    assert [href for href, _ in search['sections']] == [
+        'guide-0.html#guide-0', 'guide-1.html#guide-1', 'guide-2.html#guide-2', 'index.html#ai-documentation-review'
+    ]
+
+def test_only_changed_shards_are_rendered_again(make_generator, tmp_path, capsys):
+    api_docs = make_docs(4)
+    make_generator(api_docs, html_layout='page', html_workers=1).generate()
+    html_dir = tmp_path / 'docs' / 'html'
+    unchanged = os.path.getmtime(html_dir / 'guide-0.html')
+
+    api_docs['https://docs.example.com/guide-2']['content'] = "Endpoint 2 was renamed."
+    del api_docs['https://docs.example.com/guide-3']
+    capsys.readouterr()
+    make_generator(api_docs, html_layout='page', html_workers=1).generate()
+
+    assert "Rendered 1 of 3 HTML files (2 unchanged)" in capsys.readouterr().out
+    assert os.path.getmtime(html_dir / 'guide-0.html') == unchanged
+    assert "renamed" in read(html_dir / 'guide-2.html')
+    assert not os.path.exists(html_dir / 'guide-3.html')
+    # Unchanged shards stay searchable under their recorded headings
+    search = json.loads(read(html_dir / SEARCH_INDEX_FILENAME))
+    assert search['sections'][0] == ['guide-0.html#guide-0', 'Guide 0']
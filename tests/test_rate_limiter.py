@@ -0,0 +1,34 @@
+import time
+from email.utils import formatdate
+from api_doc_generator.rate_limiter import AdaptiveRateLimiter, parse_retry_after
+
+def test_parse_retry_after():
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after('-5') == 0.0
+    assert 55 < parse_retry_after(formatdate(time.time() + 60, usegmt=True)) <= 60
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
+
+def test_burst_then_wait_for_tokens():
+    limiter = AdaptiveRateLimiter(rate=10, burst=2)
+
+    assert limiter._reserve() == 0
+    assert limiter._reserve() == 0
+    assert 0.05 < limiter._reserve() <= 0.1
+
+def test_throttling_halves_the_rate_and_success_recovers_it():
+    limiter = AdaptiveRateLimiter(rate=8, min_rate=1, recovery_steps=4)
+    for expected in (4, 2, 1, 1):
+        limiter.on_throttle()
+        assert limiter.rate == expected
+    assert limiter.throttled == 4
+
+    for _ in range(10):
+        limiter.on_success()
+    assert limiter.rate == 8
+
+def test_retry_after_blocks_the_bucket():
+    limiter = AdaptiveRateLimiter(rate=100)
+    limiter.on_throttle(retry_after=2)
+
+    assert 1.9 < limiter._reserve() <= 2
@@ -0,0 +1,63 @@
+import io
+from api_doc_generator.generator import DocumentationGenerator, ModelConfig
+
+DOCUMENT = "\n".join(
+    ["# API Integration Guide\n", "Generated on: 2024-01-01 00:00:00\n"] +
+    [f"## Page {i}\n\nSource: https://docs.example.com/{i}\n\n" + "Text. " * (20 * i) for i in range(8)]
+) + "\n"
+
+def test_review_shards_are_read_from_the_document_in_page_order(tmp_path):
+    generator = DocumentationGenerator({}, str(tmp_path), review_shard_chars=300)
+    shards = list(generator._iter_review_shards(lambda: io.StringIO(DOCUMENT)))
+
+    text = "".join(shards)
+    assert len(shards) > 1
+    assert "Generated on" not in text
+    # Pages longer than a shard are cut, and parts are joined with newlines
+    assert text.replace("\n", "") == DOCUMENT.replace("Generated on: 2024-01-01 00:00:00\n", "").replace("\n", "")
+    assert [text.index(f"## Page {i}") for i in range(8)] == sorted(text.index(f"## Page {i}") for i in range(8))
+
+class FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+class FakeModel:
+    """Stands in for a Gemini model, answering every prompt with a numbered review"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def start_chat(self, history):
+        return self
+
+    def send_message(self, prompt, stream, generation_config, safety_settings):
+        self.calls += 1
+        return [FakeChunk(f"Review {self.calls}: "), FakeChunk("looks good.")]
+
+def review(generator, model) -> str:
+    model_config = ModelConfig.get_model_config(generator.model_name, generator.temperature)
+    return generator._send_prompt(model, model_config, "Review these docs")
+
+def test_reviews_are_cached_per_prompt_and_model_configuration(tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    model = FakeModel()
+    first = DocumentationGenerator({}, str(tmp_path), cache_dir=cache_dir)
+    assert review(first, model) == "Review 1: looks good."
+
+    second = DocumentationGenerator({}, str(tmp_path), cache_dir=cache_dir)
+    assert review(second, model) == "Review 1: looks good."
+    assert second.metrics.counter('cache_hits_total', service='gemini') == 1
+
+    warmer = DocumentationGenerator({}, str(tmp_path), cache_dir=cache_dir, temperature=0.9)
+    assert review(warmer, model) == "Review 2: looks good."
+    assert model.calls == 2
+
+def test_refresh_review_asks_the_model_again(tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    model = FakeModel()
+    review(DocumentationGenerator({}, str(tmp_path), cache_dir=cache_dir), model)
+
+    refreshed = DocumentationGenerator({}, str(tmp_path), cache_dir=cache_dir, refresh_review=True)
+    assert review(refreshed, model) == "Review 2: looks good."
+    # The new review replaces the cached one
+    assert review(DocumentationGenerator({}, str(tmp_path), cache_dir=cache_dir), model) == "Review 2: looks good."
@@ -0,0 +1,59 @@
+import json
+import shutil
+import subprocess
+import pytest
+from api_doc_generator.generator import SEARCH_SCRIPT
+from api_doc_generator.search_index import SearchIndexBuilder, tokenize
+
+# Minimal DOM for SEARCH_SCRIPT: runs a query against the index and prints the result links
+NODE_HARNESS = """
+const handlers = {};
+const list = {innerHTML: '', items: [], appendChild(item) { this.items.push(item); }};
+const input = {
+    dataset: {index: 'index.json'}, value: process.argv[1],
+    addEventListener(name, handler) { handlers[name] = handler; }
+};
+global.document = {
+    getElementById: (id) => id === 'search-input' ? input : list,
+    createElement: () => ({children: [], appendChild(child) { this.children.push(child); }})
+};
+global.fetch = () => Promise.resolve({json: () => Promise.resolve(INDEX)});
+SCRIPT
+handlers.input();
+setTimeout(() => console.log(JSON.stringify(list.items.map((item) => item.children[0].href))), 10);
+"""
+
+def build() -> SearchIndexBuilder:
+    index = SearchIndexBuilder()
+    index.add_section('#authentication', 'Authentication', 'Authentication: send the token in a header')
+    index.add_section('#tokens', 'Tokens', 'Tokens expire after an hour; refresh the token')
+    index.add_section('#webhooks', 'Webhooks', 'Webhooks are signed with your token')
+    return index
+
+def search(index: SearchIndexBuilder, query: str) -> list:
+    script = SEARCH_SCRIPT.split('<script>', 1)[1].rsplit('</script>', 1)[0]
+    harness = NODE_HARNESS.replace('INDEX', json.dumps(index.to_dict())).replace('SCRIPT', script)
+    result = subprocess.run(['node', '-e', harness, query], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+def test_tokenize_drops_stopwords_and_short_terms():
+    assert tokenize("How do I refresh a Token?") == ['refresh', 'token']
+
+def test_posting_lists_are_sorted_by_term_and_delta_encoded():
+    data = build().to_dict()
+    postings = dict(zip(data['terms'], data['postings']))
+
+    assert data['terms'] == sorted(data['terms'])
+    assert data['sections'][1] == ('#tokens', 'Tokens')
+    assert postings['token'] == [0, 1, 1]
+    assert postings['webhooks'] == [2]
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='needs Node.js to run the search script')
+def test_search_script_ranks_exact_terms_and_headings_first():
+    index = build()
+
+    assert search(index, 'tokens') == ['#tokens']
+    # Prefix matches count as well, below the section whose heading matches
+    assert search(index, 'token') == ['#tokens', '#authentication', '#webhooks']
+    assert search(index, 'signed tok') == ['#webhooks']
+    assert search(index, 'the') == []
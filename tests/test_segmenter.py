@@ -0,0 +1,29 @@
+import pytest
+from api_doc_generator.segmenter import LocalSegmenter
+
+def test_chunks_respect_the_length_limit_and_overlap():
+    content = "\n\n".join(f"Paragraph {i} explains one more detail of the endpoint." * 3 for i in range(40))
+    segmenter = LocalSegmenter(max_chunk_length=300, chunk_overlap=50)
+    chunks = segmenter.segment(content)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 300 for chunk in chunks)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        overlap = segmenter._overlap(previous)
+        assert overlap and chunk.startswith(overlap)
+
+def test_code_blocks_stay_whole():
+    code = "```python\n" + "\n".join(f"client.call({i})" for i in range(10)) + "\n```"
+    content = "Intro text. " * 20 + "\n\n" + code + "\n\n" + "Outro text. " * 20
+    chunks = LocalSegmenter(max_chunk_length=400, chunk_overlap=20).segment(content)
+
+    assert sum(code in chunk for chunk in chunks) == 1
+
+def test_long_words_are_cut():
+    chunks = LocalSegmenter(max_chunk_length=100, chunk_overlap=0).segment("x" * 250)
+
+    assert ''.join(chunks) == "x" * 250
+
+def test_overlap_must_be_smaller_than_chunks():
+    with pytest.raises(ValueError):
+        LocalSegmenter(max_chunk_length=100, chunk_overlap=100)
@@ -0,0 +1,72 @@
+import gzip
+import httpx
+import pytest
+from api_doc_generator.sitemap import SiteMap, parse_lastmod, parse_robots, parse_sitemap
+from conftest import SITE_URL
+
+ROBOTS = "User-agent: *\nDisallow: /private/\n"
+
+@pytest.mark.parametrize('concurrency', [1, 4])
+def test_disallowed_links_are_counted_once(site, make_scraper, concurrency):
+    site.files['/robots.txt'] = ROBOTS
+    site.add_page('/', 'Home page', links=['/a', '/b', '/private/x'])
+    site.add_page('/a', 'Page A', links=['/private/x', '/private/y'])
+    site.add_page('/b', 'Page B', links=['/private/x', '/a'])
+    site.add_page('/private/x', 'Secret page')
+
+    scraper = make_scraper()
+    docs = scraper.crawl(concurrency=concurrency)
+
+    assert sorted(docs) == [SITE_URL + '/', SITE_URL + '/a', SITE_URL + '/b']
+    assert not any('/private/' in url for url in site.reader_calls)
+    assert scraper.metrics.counter('robots_disallowed_total') == 2
+
+def test_disallowed_base_url_is_not_crawled(site, make_scraper):
+    site.files['/robots.txt'] = "User-agent: *\nDisallow: /\n"
+    site.add_page('/', 'Home page')
+
+    scraper = make_scraper()
+    docs = scraper.crawl()
+
+    assert len(docs) == 0
+    assert site.reader_calls == []
+    assert scraper.metrics.counter('robots_disallowed_total') == 1
+
+def test_parse_sitemap_and_index():
+    urlset = (b'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+              b'<url><loc> https://docs.example.com/a </loc><lastmod>2024-05-01</lastmod></url>'
+              b'<url><loc>https://docs.example.com/b</loc></url><url><lastmod>2024-01-01</lastmod></url>'
+              b'</urlset>')
+    pages, sitemaps = parse_sitemap(gzip.compress(urlset))
+    assert pages == [('https://docs.example.com/a', parse_lastmod('2024-05-01T00:00:00Z')),
+                     ('https://docs.example.com/b', None)]
+    assert sitemaps == []
+
+    index = (b'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+             b'<sitemap><loc>https://docs.example.com/sitemap-1.xml</loc></sitemap></sitemapindex>')
+    assert parse_sitemap(index) == ([], ['https://docs.example.com/sitemap-1.xml'])
+    with pytest.raises(ValueError):
+        parse_sitemap(b'<urlset>')
+
+def test_parse_robots():
+    rules, sitemaps = parse_robots(ROBOTS + "Sitemap: https://docs.example.com/sitemap.xml\n")
+
+    assert sitemaps == ['https://docs.example.com/sitemap.xml']
+    assert not rules.can_fetch('api-doc-generator', SITE_URL + '/private/x')
+    assert rules.can_fetch('api-doc-generator', SITE_URL + '/public')
+
+def test_site_map_seeds_in_scope_pages_newest_first(site):
+    site.files['/robots.txt'] = f"User-agent: *\nDisallow: /docs/private/\nSitemap: {SITE_URL}/sitemap.xml\n"
+    site.files['/sitemap.xml'] = (
+        '<urlset>'
+        f'<url><loc>{SITE_URL}/docs/old</loc><lastmod>2023-01-01</lastmod></url>'
+        f'<url><loc>{SITE_URL}/docs/undated</loc></url>'
+        f'<url><loc>{SITE_URL}/docs/new</loc><lastmod>2024-06-01T10:00:00+02:00</lastmod></url>'
+        f'<url><loc>{SITE_URL}/blog/post</loc><lastmod>2024-07-01</lastmod></url>'
+        f'<url><loc>{SITE_URL}/docs/private/x</loc></url>'
+        '</urlset>'
+    )
+    site_map = SiteMap(SITE_URL + '/docs/').load(httpx.Client())
+
+    assert site_map.sitemaps_read == 1
+    assert site_map.seeds() == [SITE_URL + '/docs/new', SITE_URL + '/docs/old', SITE_URL + '/docs/undated']